@@ -0,0 +1,27 @@
+"""add video media_url_expires_at
+
+Revision ID: 4c1e7b2a9d3f
+Revises: 99612f792e96
+Create Date: 2026-10-18 02:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel # added
+
+
+# revision identifiers, used by Alembic.
+revision = '4c1e7b2a9d3f'
+down_revision = '99612f792e96'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('video') as batch_op:
+        batch_op.add_column(sa.Column('media_url_expires_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('video') as batch_op:
+        batch_op.drop_column('media_url_expires_at')
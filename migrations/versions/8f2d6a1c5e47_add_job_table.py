@@ -0,0 +1,38 @@
+"""add job table
+
+Revision ID: 8f2d6a1c5e47
+Revises: 4c1e7b2a9d3f
+Create Date: 2026-10-18 02:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel # added
+
+
+# revision identifiers, used by Alembic.
+revision = '8f2d6a1c5e47'
+down_revision = '4c1e7b2a9d3f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('job',
+    sa.Column('id', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('kind', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('entity_id', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('priority', sa.Integer(), nullable=False),
+    sa.Column('due_at', sa.DateTime(), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('last_error', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_job_due_at'), 'job', ['due_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_job_due_at'), table_name='job')
+    op.drop_table('job')
@@ -0,0 +1,26 @@
+"""add source feed fingerprint
+
+Revision ID: a4e2c7f9b316
+Revises: f1b6d3e8a507
+Create Date: 2026-10-18 08:50:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel # added
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4e2c7f9b316'
+down_revision = 'f1b6d3e8a507'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('source', sa.Column('feed_fingerprint', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('source') as batch_op:
+        batch_op.drop_column('feed_fingerprint')
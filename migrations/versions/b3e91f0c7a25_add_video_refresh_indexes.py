@@ -0,0 +1,33 @@
+"""add video refresh indexes
+
+Revision ID: b3e91f0c7a25
+Revises: 8f2d6a1c5e47
+Create Date: 2026-10-18 03:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel # added
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3e91f0c7a25'
+down_revision = '8f2d6a1c5e47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f('ix_video_source_id'), 'video', ['source_id'], unique=False)
+    op.create_index(op.f('ix_video_updated_at'), 'video', ['updated_at'], unique=False)
+    op.create_index(op.f('ix_video_released_at'), 'video', ['released_at'], unique=False)
+    op.create_index(op.f('ix_video_media_url_expires_at'), 'video', ['media_url_expires_at'], unique=False)
+    op.create_index('ix_video_media_url_is_null', 'video', ['id'], unique=False, sqlite_where=sa.text('media_url IS NULL'))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_video_media_url_is_null', table_name='video')
+    op.drop_index(op.f('ix_video_media_url_expires_at'), table_name='video')
+    op.drop_index(op.f('ix_video_released_at'), table_name='video')
+    op.drop_index(op.f('ix_video_updated_at'), table_name='video')
+    op.drop_index(op.f('ix_video_source_id'), table_name='video')
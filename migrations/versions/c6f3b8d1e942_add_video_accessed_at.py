@@ -0,0 +1,26 @@
+"""add video accessed_at
+
+Revision ID: c6f3b8d1e942
+Revises: a4e2c7f9b316
+Create Date: 2026-10-18 12:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel # added
+
+
+# revision identifiers, used by Alembic.
+revision = 'c6f3b8d1e942'
+down_revision = 'a4e2c7f9b316'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('video', sa.Column('accessed_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('video') as batch_op:
+        batch_op.drop_column('accessed_at')
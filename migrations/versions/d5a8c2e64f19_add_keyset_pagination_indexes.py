@@ -0,0 +1,29 @@
+"""add keyset pagination indexes
+
+Revision ID: d5a8c2e64f19
+Revises: b3e91f0c7a25
+Create Date: 2026-10-18 04:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel # added
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5a8c2e64f19'
+down_revision = 'b3e91f0c7a25'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.drop_index(op.f('ix_video_updated_at'), table_name='video')
+    op.create_index('ix_video_updated_at_id', 'video', ['updated_at', 'id'], unique=False)
+    op.create_index('ix_source_updated_at_id', 'source', ['updated_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_source_updated_at_id', table_name='source')
+    op.drop_index('ix_video_updated_at_id', table_name='video')
+    op.create_index(op.f('ix_video_updated_at'), 'video', ['updated_at'], unique=False)
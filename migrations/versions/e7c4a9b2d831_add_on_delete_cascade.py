@@ -0,0 +1,56 @@
+"""add on delete cascade
+
+Revision ID: e7c4a9b2d831
+Revises: d5a8c2e64f19
+Create Date: 2026-10-18 06:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel # added
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7c4a9b2d831'
+down_revision = 'd5a8c2e64f19'
+branch_labels = None
+depends_on = None
+
+# SQLite can not alter foreign keys, so the tables are recreated. The foreign keys
+# of the init revision are unnamed, so they are found by this naming convention.
+naming_convention = {
+    'fk': 'fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s',
+}
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('video', naming_convention=naming_convention) as batch_op:
+        batch_op.drop_constraint('fk_video_source_id_source', type_='foreignkey')
+        batch_op.create_foreign_key(
+            'fk_video_source_id_source', 'source', ['source_id'], ['id'], ondelete='CASCADE'
+        )
+    with op.batch_alter_table('source', naming_convention=naming_convention) as batch_op:
+        batch_op.drop_constraint('fk_source_created_by_userdb', type_='foreignkey')
+        batch_op.create_foreign_key(
+            'fk_source_created_by_userdb', 'userdb', ['created_by'], ['id'], ondelete='CASCADE'
+        )
+    # The partial index is recreated without its WHERE clause, so create it again.
+    op.drop_index('ix_video_media_url_is_null', table_name='video')
+    op.create_index(
+        'ix_video_media_url_is_null', 'video', ['id'], unique=False,
+        sqlite_where=sa.text('media_url IS NULL'),
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('source', naming_convention=naming_convention) as batch_op:
+        batch_op.drop_constraint('fk_source_created_by_userdb', type_='foreignkey')
+        batch_op.create_foreign_key('fk_source_created_by_userdb', 'userdb', ['created_by'], ['id'])
+    with op.batch_alter_table('video', naming_convention=naming_convention) as batch_op:
+        batch_op.drop_constraint('fk_video_source_id_source', type_='foreignkey')
+        batch_op.create_foreign_key('fk_video_source_id_source', 'source', ['source_id'], ['id'])
+    op.drop_index('ix_video_media_url_is_null', table_name='video')
+    op.create_index(
+        'ix_video_media_url_is_null', 'video', ['id'], unique=False,
+        sqlite_where=sa.text('media_url IS NULL'),
+    )
@@ -0,0 +1,43 @@
+"""add video archive table
+
+Revision ID: f1b6d3e8a507
+Revises: e7c4a9b2d831
+Create Date: 2026-10-18 07:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel # added
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1b6d3e8a507'
+down_revision = 'e7c4a9b2d831'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('videoarchive',
+    sa.Column('source_id', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('id', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('handler', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('uploader', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('title', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('duration', sa.Integer(), nullable=True),
+    sa.Column('thumbnail', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('url', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('feed_media_url', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('media_filesize', sa.Integer(), nullable=True),
+    sa.Column('released_at', sa.DateTime(), nullable=True),
+    sa.Column('added_at', sa.DateTime(), nullable=True),
+    sa.Column('archived_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['source_id'], ['source.id'], name='fk_videoarchive_source_id_source', ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_videoarchive_source_id'), 'videoarchive', ['source_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_videoarchive_source_id'), table_name='videoarchive')
+    op.drop_table('videoarchive')
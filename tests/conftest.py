@@ -1,9 +1,15 @@
+from typing import AsyncIterator
+
 import datetime
+from pathlib import Path
 
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import StaticPool
 from sqlmodel import Session, SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from youtube_rss import crud
 from youtube_rss.core.app import app
@@ -16,12 +22,28 @@ from youtube_rss.models.video import VideoCreate
 @pytest.fixture(name="db")
 def fixture_db() -> Session:
     test_db_uri = "sqlite:///:memory:"  # using an in-memory SQLite3 database
-    test_engine = create_engine(test_db_uri)
+    # One connection, shared with the threads the app and the executors run in.
+    test_engine = create_engine(
+        test_db_uri, connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
     SQLModel.metadata.create_all(bind=test_engine)
     with Session(bind=test_engine) as session:
         return session
 
 
+@pytest.fixture(name="async_db")
+async def fixture_async_db(tmp_path: Path) -> AsyncIterator[AsyncSession]:
+    """
+    Fixture for an async (aiosqlite) session on a temporary SQLite3 database.
+    """
+    test_db_file = tmp_path / "test.db"
+    SQLModel.metadata.create_all(bind=create_engine(f"sqlite:///{test_db_file}"))
+    test_engine = create_async_engine(f"sqlite+aiosqlite:///{test_db_file}")
+    async with AsyncSession(bind=test_engine, expire_on_commit=False) as session:
+        yield session
+    await test_engine.dispose()
+
+
 @pytest.fixture(name="auth_handler")
 def fixture_auth_handler() -> AuthHandler:
     return AuthHandler()
@@ -0,0 +1,287 @@
+from typing import Callable
+
+import asyncio
+import threading
+import time
+from functools import partial
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, event, insert, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import QueuePool
+from sqlmodel import Session, SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from youtube_rss import crud, settings
+from youtube_rss.core.database import (
+    DBBind,
+    ReadWriteRouter,
+    RoutingSession,
+    create_async_read_engine,
+    create_async_write_engine,
+    create_read_engine,
+    create_write_engine,
+    db_commit,
+    db_execute,
+    open_session,
+)
+from youtube_rss.models.source import Source
+from youtube_rss.models.user import UserDB
+from youtube_rss.models.video import Video, VideoCreate
+
+
+def make_video_create(i: int) -> VideoCreate:
+    return VideoCreate(
+        url=f"https://rumble.com/v{i}-video.html",
+        source_id="source_id",
+        title=f"Video {i}",
+        released_at=None,
+    )
+
+
+# A query that keeps SQLite busy for a while, without any tables.
+SLOW_QUERY = text(
+    "WITH RECURSIVE numbers(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM numbers WHERE n < 2000000) "
+    "SELECT count(*) FROM numbers"
+)
+
+
+async def get_max_event_loop_lag(bind: DBBind) -> tuple[float, float]:
+    """
+    Runs the slow query while measuring how late a ticker on the event loop gets.
+
+    Returns:
+        The duration of the query and the maximum lag of the ticker, in seconds.
+    """
+    max_lag = 0.0
+    done = asyncio.Event()
+
+    async def _ticker() -> None:
+        nonlocal max_lag
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            max_lag = max(max_lag, time.perf_counter() - start - 0.001)
+
+    ticker = asyncio.create_task(_ticker())
+    await asyncio.sleep(0.01)
+    async with open_session(bind=bind) as db:
+        start = time.perf_counter()
+        result = await db_execute(db, SLOW_QUERY)
+        duration = time.perf_counter() - start
+        assert result.scalar() == 2_000_000
+    done.set()
+    await ticker
+    return duration, max_lag
+
+
+async def test_async_session_does_not_block_event_loop(tmp_path: Path) -> None:
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+
+    sync_duration, sync_lag = await get_max_event_loop_lag(bind=engine)
+    async_duration, async_lag = await get_max_event_loop_lag(bind=async_engine)
+    await async_engine.dispose()
+
+    # The sync query blocks the event loop for its whole duration, the async one does not.
+    assert sync_lag > sync_duration * 0.8
+    assert async_lag < async_duration * 0.2
+
+
+def get_routing_session(path: Path) -> RoutingSession:
+    write_engine = create_write_engine(database_file=path)
+    SQLModel.metadata.create_all(bind=write_engine)
+    # The write engine enforces foreign keys, so the videos need their source.
+    with write_engine.begin() as connection:
+        connection.execute(
+            insert(UserDB.__table__).prefix_with("OR IGNORE"),  # type: ignore
+            {
+                "id": "user_id",
+                "username": "test_user",
+                "email": "test@example.com",
+                "password": "x",
+            },
+        )
+        connection.execute(
+            insert(Source.__table__).prefix_with("OR IGNORE"),  # type: ignore
+            {"id": "source_id", "created_by": "user_id"},
+        )
+    return RoutingSession(
+        read_bind=create_read_engine(database_file=path), bind=write_engine, expire_on_commit=False
+    )
+
+
+async def test_routing_session(tmp_path: Path) -> None:
+    with get_routing_session(path=tmp_path / "test.db") as db:
+        engines = []
+        for engine in (db.read_bind, db.bind):
+            statements: list[str] = []
+            event.listen(
+                engine, "before_cursor_execute", lambda *args, s=statements: s.append(args[2])
+            )
+            engines.append(statements)
+        reads, writes = engines
+
+        created = await crud.video.create_many(
+            in_objs=[make_video_create(i=i) for i in range(3)], db=db
+        )
+        assert len(created) == 3
+        assert reads and all(statement.startswith("SELECT") for statement in reads)
+        assert any(statement.startswith("INSERT") for statement in writes)
+        # The write was committed, which returned the writer connection.
+        assert isinstance(db.bind, Engine) and isinstance(db.bind.pool, QueuePool)
+        assert db.bind.pool.checkedout() == 0
+
+        # After a write, the transaction reads its own changes from the writer.
+        reads.clear()
+        writes.clear()
+        db.add(Video(**make_video_create(i=3).dict()))
+        assert len(await crud.video.get_all(db=db) or []) == 4
+        assert reads == []
+        await db_commit(db)
+
+        reads.clear()
+        assert len(await crud.video.get_all(db=db) or []) == 4
+        assert len(reads) == 1
+
+        # Read connections are read-only, and use WAL.
+        with db.read_bind.connect() as connection:
+            assert connection.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+            assert connection.exec_driver_sql("PRAGMA busy_timeout").scalar() == (
+                settings.database_busy_timeout_ms
+            )
+            with pytest.raises(OperationalError):
+                connection.exec_driver_sql("DELETE FROM video")
+
+
+async def test_writers_wait_without_blocking_event_loop(tmp_path: Path) -> None:
+    with get_routing_session(path=tmp_path / "test.db") as first, RoutingSession(
+        read_bind=first.read_bind, bind=first.bind, expire_on_commit=False
+    ) as second:
+        events: list[str] = []
+        first.add(Video(**make_video_create(i=0).dict()))
+        # The pending video is flushed, so the first session holds the writer.
+        await crud.video.get_all(db=first)
+
+        async def _write() -> None:
+            await crud.video.create(in_obj=make_video_create(i=1), db=second)
+            events.append("second written")
+
+        task = asyncio.create_task(_write())
+        # The second session waits for the writer, without blocking the event loop.
+        await asyncio.sleep(0.1)
+        events.append("first committing")
+        await db_commit(first)
+        await task
+        assert events == ["first committing", "second written"]
+        assert len(await crud.video.get_all(db=second) or []) == 2
+
+
+async def test_async_routing(tmp_path: Path) -> None:
+    get_routing_session(path=tmp_path / "test.db").close()
+    write_engine = create_async_write_engine(database_file=tmp_path / "test.db")
+    read_engine = create_async_read_engine(database_file=tmp_path / "test.db")
+    engines = []
+    for engine in (read_engine, write_engine):
+        statements: list[str] = []
+        event.listen(
+            engine.sync_engine,
+            "before_cursor_execute",
+            lambda *args, s=statements: s.append(args[2]),
+        )
+        engines.append(statements)
+    reads, writes = engines
+
+    async with AsyncSession(bind=write_engine, expire_on_commit=False) as db:
+        ReadWriteRouter(session=db.sync_session, read_bind=read_engine.sync_engine)
+        created = await crud.video.create_many(
+            in_objs=[make_video_create(i=i) for i in range(3)], db=db
+        )
+        assert len(created) == 3
+        assert reads and all(statement.startswith("SELECT") for statement in reads)
+        assert any(statement.startswith("INSERT") for statement in writes)
+
+        # After a write, the transaction reads its own changes from the writer.
+        reads.clear()
+        db.add(Video(**make_video_create(i=3).dict()))
+        assert len(await crud.video.get_all(db=db) or []) == 4
+        assert reads == []
+        await db_commit(db)
+
+        assert len(await crud.video.get_all(db=db) or []) == 4
+        assert len(reads) == 1
+
+    await write_engine.dispose()
+    await read_engine.dispose()
+
+
+def test_write_contention_benchmark(tmp_path: Path) -> None:
+    """
+    Refresh writes mixed with concurrent feed reads that stream their videos.
+    """
+
+    def _run(make_session: Callable[[], Session], seconds: float = 2) -> dict[str, float]:
+        stop_at = time.perf_counter() + seconds
+        stats = {"writes": 0, "reads": 0, "errors": 0, "max_write_seconds": 0.0}
+        with make_session() as db:
+            asyncio.run(
+                crud.video.create_many(in_objs=[make_video_create(i=i) for i in range(500)], db=db)
+            )
+
+        def _write() -> None:
+            k = 0
+            while time.perf_counter() < stop_at:
+                k += 1
+                in_objs = [
+                    VideoCreate(**make_video_create(i=i).dict(exclude={"title"}), title=f"{k}")
+                    for i in range(50)
+                ]
+                start = time.perf_counter()
+                try:
+                    with make_session() as db:
+                        asyncio.run(crud.video.upsert_many(in_objs=in_objs, db=db))
+                except OperationalError:
+                    stats["errors"] += 1
+                    continue
+                stats["writes"] += 1
+                stats["max_write_seconds"] = max(
+                    stats["max_write_seconds"], time.perf_counter() - start
+                )
+                time.sleep(0.01)
+
+        def _read() -> None:
+            while time.perf_counter() < stop_at:
+                try:
+                    with make_session() as db:
+                        statement = select(Video).execution_options(yield_per=50)
+                        for _ in db.exec(statement):
+                            time.sleep(0.0002)
+                except OperationalError:
+                    stats["errors"] += 1
+                    continue
+                stats["reads"] += 1
+
+        threads = [threading.Thread(target=_write)] + [
+            threading.Thread(target=_read) for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return stats
+
+    default_engine = create_engine(
+        f"sqlite:///{tmp_path / 'default.db'}", connect_args={"check_same_thread": False}
+    )
+    SQLModel.metadata.create_all(bind=default_engine)
+    default_stats = _run(make_session=lambda: Session(bind=default_engine, expire_on_commit=False))
+
+    routing_session = partial(get_routing_session, path=tmp_path / "routing.db")
+    routing_session()
+    routing_stats = _run(make_session=routing_session)
+
+    assert routing_stats["errors"] == 0
+    assert routing_stats["writes"] > default_stats["writes"] * 2
@@ -0,0 +1,84 @@
+import asyncio
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlmodel import Session, SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from youtube_rss import crud
+from youtube_rss.api.deps import get_db
+from youtube_rss.api.v1.endpoints.admin import get_query_stats
+from youtube_rss.core.app import app
+from youtube_rss.core.query_stats import reset_query_stats, track_queries
+from youtube_rss.models.user import UserCreate
+
+
+async def test_track_queries(db_with_source_videos: Session) -> None:
+    db = db_with_source_videos
+    with track_queries(name="test", record=False) as stats:
+        await crud.video.get_all(db=db)
+        await crud.source.get(id="7hyhcvzT", db=db, load="videos")
+    assert stats.statement_count == 3
+    assert stats.total_seconds > 0
+    slowest = stats.dict()["slowest"]
+    assert len(slowest) == 3
+    assert [entry["ms"] for entry in slowest] == sorted([entry["ms"] for entry in slowest])[::-1]
+    assert all(entry["statement"].startswith("SELECT") for entry in slowest)
+
+    # Not tracked outside of the context.
+    await crud.video.get_all(db=db)
+    assert stats.statement_count == 3
+
+
+async def test_track_queries_attribution(db_with_source_videos: Session) -> None:
+    db = db_with_source_videos
+
+    async def _run(name: str, queries: int) -> int:
+        with track_queries(name=name, record=False) as stats:
+            # Statements in tasks created in the context are attributed to it.
+            await asyncio.gather(
+                *[asyncio.create_task(crud.video.get_all(db=db)) for _ in range(queries)]
+            )
+            await asyncio.sleep(0)
+        return stats.statement_count
+
+    counts = await asyncio.gather(_run(name="a", queries=1), _run(name="b", queries=4))
+    assert list(counts) == [1, 4]
+
+
+async def test_track_queries_async_session(async_db: AsyncSession) -> None:
+    with track_queries(name="test", record=False) as stats:
+        await crud.video.get_all(db=async_db)
+        await crud.source.get_or_none(id="missing", db=async_db)
+    assert stats.statement_count == 2
+
+
+async def test_request_query_stats(tmp_path: Path, client: TestClient) -> None:
+    # The app runs in another thread, so use a database file rather than in-memory.
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'test.db'}", connect_args={"check_same_thread": False}
+    )
+    SQLModel.metadata.create_all(bind=engine)
+    db = Session(bind=engine)
+    await crud.user.create(
+        in_obj=UserCreate(username="test_user", email="test@example.com", password="password"),
+        db=db,
+    )
+
+    reset_query_stats()
+    app.dependency_overrides[get_db] = lambda: db
+    try:
+        for _ in range(3):
+            assert client.get("/u/test_user").status_code == 200
+        assert client.get("/u/missing_user").status_code == 404
+    finally:
+        app.dependency_overrides.pop(get_db)
+
+    summary = await get_query_stats(_=None)
+    totals = summary["totals"]["GET /u/{username}"]
+    assert totals["count"] == 4
+    # The user, then their sources.
+    assert totals["max_statement_count"] == 2
+    assert [stats["statement_count"] for stats in summary["recent"]] == [1, 2, 2, 2]
+    reset_query_stats()
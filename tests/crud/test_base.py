@@ -0,0 +1,216 @@
+import datetime
+import time
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, update
+from sqlmodel import Session, SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from youtube_rss import crud
+from youtube_rss.core.database import load_relationships
+from youtube_rss.models.source import SourceCreate
+from youtube_rss.models.video import Video, VideoCreate, VideoUpdate
+
+
+def make_video_create(i: int, source_id: str = "source_id") -> VideoCreate:
+    return VideoCreate(
+        url=f"https://rumble.com/v{i}-video.html",
+        source_id=source_id,
+        title=f"Video {i}",
+        released_at=None,
+    )
+
+
+async def test_create_many_skips_existing(db: Session) -> None:
+    existing = await crud.video.create(in_obj=make_video_create(i=0), db=db)
+
+    created = await crud.video.create_many(
+        in_objs=[make_video_create(i=i) for i in range(3)] + [make_video_create(i=1)], db=db
+    )
+    assert sorted(video.title or "" for video in created) == ["Video 1", "Video 2"]
+    assert existing.id not in [video.id for video in created]
+
+    videos = await crud.video.get_all(db=db) or []
+    assert sorted(video.title or "" for video in videos) == ["Video 0", "Video 1", "Video 2"]
+    assert all(video.feed_media_url == f"/media/{video.id}" for video in videos)
+
+    assert await crud.video.create_many(in_objs=[make_video_create(i=2)], db=db) == []
+    assert await crud.video.create_many(in_objs=[], db=db) == []
+
+
+def get_file_db(path: Path) -> Session:
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    SQLModel.metadata.create_all(bind=engine)
+    return Session(bind=engine)
+
+
+async def test_create_many_benchmark(tmp_path: Path) -> None:
+    per_call_count = 200
+    with get_file_db(path=tmp_path / "per_call.db") as db:
+        in_objs = [make_video_create(i=i) for i in range(per_call_count)]
+        start = time.perf_counter()
+        for in_obj in in_objs:
+            await crud.video.create(in_obj=in_obj, db=db)
+        per_call_rate = per_call_count / (time.perf_counter() - start)
+
+    bulk_rates = {}
+    for count in (1_000, 10_000):
+        with get_file_db(path=tmp_path / f"bulk_{count}.db") as db:
+            in_objs = [make_video_create(i=i) for i in range(count)]
+            start = time.perf_counter()
+            created = await crud.video.create_many(in_objs=in_objs, db=db)
+            bulk_rates[count] = count / (time.perf_counter() - start)
+            assert len(created) == count
+
+    assert bulk_rates[1_000] > per_call_rate * 5
+    assert bulk_rates[10_000] > per_call_rate * 5
+
+
+async def test_upsert_many(db: Session) -> None:
+    existing = await crud.video.create(
+        in_obj=VideoCreate(
+            **make_video_create(i=0).dict(exclude={"media_url"}),
+            media_url="https://sp.rmbl.ws/v0.mp4",
+        ),
+        db=db,
+    )
+    added_at = existing.added_at
+
+    # media_url is None, so the existing media_url is kept.
+    in_objs = [
+        VideoCreate(**make_video_create(i=i).dict(exclude={"title"}), title=f"New Title {i}")
+        for i in range(3)
+    ]
+    upserted = await crud.video.upsert_many(in_objs=in_objs, returning=True, db=db)
+    assert [video.title for video in upserted] == ["New Title 0", "New Title 1", "New Title 2"]
+    assert upserted[0].id == existing.id
+    assert upserted[0].media_url == "https://sp.rmbl.ws/v0.mp4"
+    assert upserted[0].added_at == added_at
+
+    assert len(await crud.video.get_all(db=db) or []) == 3
+    assert await crud.video.upsert_many(in_objs=in_objs, db=db) == []
+
+
+async def test_update_many(db: Session) -> None:
+    existing = await crud.video.create_many(
+        in_objs=[
+            VideoCreate(
+                **make_video_create(i=i).dict(exclude={"media_url"}),
+                media_url=f"https://sp.rmbl.ws/v{i}.mp4",
+            )
+            for i in range(2)
+        ],
+        db=db,
+    )
+
+    # media_url is None, so the existing media_url is kept. Video 2 does not exist.
+    in_objs = [
+        VideoCreate(**make_video_create(i=i).dict(exclude={"title"}), title=f"New Title {i}")
+        for i in range(3)
+    ]
+    updated = await crud.video.update_many(in_objs=in_objs, returning=True, db=db)
+    assert [video.title for video in updated] == ["New Title 0", "New Title 1"]
+    assert [video.id for video in updated] == [video.id for video in existing]
+    assert updated[0].media_url == "https://sp.rmbl.ws/v0.mp4"
+
+    assert len(await crud.video.get_all(db=db) or []) == 2
+    assert await crud.video.update_many(in_objs=in_objs, db=db) == []
+    no_objs: list[VideoCreate] = []
+    assert await crud.video.update_many(in_objs=no_objs, returning=True, db=db) == []
+
+
+async def test_upsert_many_benchmark(tmp_path: Path) -> None:
+    count = 500
+    with get_file_db(path=tmp_path / "videos.db") as db:
+        await crud.video.create_many(in_objs=[make_video_create(i=i) for i in range(count)], db=db)
+        in_objs = [
+            VideoCreate(**make_video_create(i=i).dict(exclude={"title"}), title=f"New Title {i}")
+            for i in range(count)
+        ]
+
+        start = time.perf_counter()
+        for in_obj in in_objs[:100]:
+            video_id = crud.video.model(**in_obj.dict()).id
+            await crud.video.update(in_obj=in_obj, id=video_id, db=db)
+        update_rate = 100 / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await crud.video.upsert_many(in_objs=in_objs, db=db)
+        upsert_rate = count / (time.perf_counter() - start)
+
+    assert upsert_rate > update_rate * 5
+
+
+async def test_crud_with_async_session(async_db: AsyncSession) -> None:
+    source = await crud.source.create(
+        in_obj=SourceCreate(url="https://rumble.com/c/source", name="Source", created_by="user"),
+        db=async_db,
+    )
+    video = await crud.video.create(in_obj=make_video_create(i=0, source_id=source.id), db=async_db)
+    created = await crud.video.create_many(
+        in_objs=[make_video_create(i=i, source_id=source.id) for i in range(3)], db=async_db
+    )
+    assert sorted(video.title or "" for video in created) == ["Video 1", "Video 2"]
+
+    in_obj = make_video_create(i=0, source_id=source.id).dict(exclude={"title"})
+    upserted = await crud.video.upsert_many(
+        in_objs=[VideoCreate(**in_obj, title="New Title 0")], returning=True, db=async_db
+    )
+    assert upserted[0].title == "New Title 0"
+    updated = await crud.video.update(
+        in_obj=VideoUpdate(title="Newer Title 0"), id=video.id, db=async_db
+    )
+    assert updated.title == "Newer Title 0"
+
+    db_source = await load_relationships(
+        async_db, await crud.source.get(id=source.id, db=async_db), ["videos"]
+    )
+    assert sorted(video.title or "" for video in db_source.videos) == [
+        "Newer Title 0",
+        "Video 1",
+        "Video 2",
+    ]
+
+    await crud.video.delete(id=video.id, db=async_db)
+    assert await crud.video.get_or_none(id=video.id, db=async_db) is None
+    assert len(await crud.video.get_many(source_id=source.id, db=async_db)) == 2
+
+
+async def test_get_page(db: Session) -> None:
+    await crud.video.create_many(in_objs=[make_video_create(i=i) for i in range(25)], db=db)
+    # Same updated_at for all, so the pages are ordered by id.
+    db.execute(update(Video).values(updated_at=datetime.datetime(2023, 1, 1)))
+    await crud.video.create_many(
+        in_objs=[make_video_create(i=i, source_id="other_source") for i in range(25, 30)], db=db
+    )
+
+    pages = []
+    cursor = None
+    while True:
+        videos, cursor = await crud.video.get_page(
+            db=db, limit=10, cursor=cursor, source_id="source_id"
+        )
+        pages.append([video.id for video in videos])
+        if cursor is None:
+            break
+    assert [len(page) for page in pages] == [10, 10, 5]
+    ids = [video_id for page in pages for video_id in page]
+    assert ids == sorted(ids)
+    assert len(set(ids)) == 25
+
+    # Updated records move to the end, so no record is skipped.
+    videos, cursor = await crud.video.get_page(db=db, limit=10)
+    await crud.video.update(
+        VideoUpdate(title="Updated", updated_at=datetime.datetime(2024, 1, 1)),
+        id=videos[0].id,
+        db=db,
+    )
+    remaining_ids = []
+    while cursor is not None:
+        videos, cursor = await crud.video.get_page(db=db, limit=10, cursor=cursor)
+        remaining_ids += [video.id for video in videos]
+    assert len(remaining_ids) == 21
+
+    with pytest.raises(crud.InvalidCursorError):
+        await crud.video.get_page(db=db, limit=10, cursor="not a cursor")
@@ -0,0 +1,53 @@
+import datetime
+from pathlib import Path
+
+from sqlalchemy import insert
+from sqlmodel import Session, SQLModel, select
+
+from youtube_rss import crud
+from youtube_rss.core.database import create_write_engine
+from youtube_rss.core.query_stats import track_queries
+from youtube_rss.models.source import Source
+from youtube_rss.models.user import UserDB
+from youtube_rss.models.video import Video
+
+
+async def test_delete_cascades_in_database(tmp_path: Path) -> None:
+    # The write engine enables foreign keys, which SQLite leaves off by default.
+    engine = create_write_engine(database_file=tmp_path / "test.db")
+    SQLModel.metadata.create_all(bind=engine)
+    now = datetime.datetime(2023, 1, 1)
+    with Session(bind=engine) as db:
+        db.execute(
+            insert(UserDB.__table__),  # type: ignore
+            [{"id": "u0", "username": "test_user", "email": "test@example.com", "password": "x"}],
+        )
+        db.execute(
+            insert(Source.__table__),  # type: ignore
+            [{"id": f"s{i}", "created_by": "u0", "updated_at": now} for i in range(2)],
+        )
+        db.execute(
+            insert(Video.__table__),  # type: ignore
+            [
+                {
+                    "id": f"v{i}",
+                    "source_id": f"s{i % 2}",
+                    "handler": "RumbleHandler",
+                    "updated_at": now,
+                }
+                for i in range(20_000)
+            ],
+        )
+        db.commit()
+
+        with track_queries(name="test", record=False) as stats:
+            await crud.source.delete(id="s0", db=db)
+        # Selecting the source, then deleting it. Its videos are never loaded.
+        assert stats.statement_count == 2
+        assert len(db.exec(select(Video.id)).all()) == 10_000
+        assert not db.exec(select(Video).where(Video.source_id == "s0")).all()
+
+        await crud.user.delete(id="u0", db=db)
+        assert not db.exec(select(Source)).all()
+        assert not db.exec(select(Video)).all()
+    engine.dispose()
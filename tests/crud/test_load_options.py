@@ -0,0 +1,123 @@
+from typing import Any, Iterator
+
+import datetime
+from contextlib import contextmanager
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlmodel import Session, SQLModel
+
+from youtube_rss import crud
+from youtube_rss.models.source import SourceCreate
+from youtube_rss.models.user import UserCreate
+from youtube_rss.models.video import VideoCreate
+from youtube_rss.services.feed import build_rss_file
+from youtube_rss.views.endpoints.sources import read_root
+
+
+@contextmanager
+def count_statements(db: Session) -> Iterator[list[str]]:
+    """
+    Records the SQL statements executed on the session's engine.
+    """
+    statements: list[str] = []
+
+    def _before_cursor_execute(*args: Any) -> None:
+        statements.append(args[2])
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", _before_cursor_execute)
+
+
+async def make_library(source_count: int, video_count: int) -> Session:
+    """
+    Creates a user with `source_count` sources of `video_count` videos each.
+    """
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(bind=engine)
+    db = Session(bind=engine)
+    user = await crud.user.create(
+        in_obj=UserCreate(username="test_user", email="test@example.com", password="password"),
+        db=db,
+    )
+    for i in range(source_count):
+        source = await crud.source.create(
+            in_obj=SourceCreate(
+                url=f"https://rumble.com/c/source{i}", name=f"Source {i}", created_by=user.id
+            ),
+            db=db,
+        )
+        await crud.video.create_many(
+            in_objs=[
+                VideoCreate(
+                    url=f"https://rumble.com/v{i}-{j}.html",
+                    source_id=source.id,
+                    title=f"Video {j}",
+                    released_at=datetime.datetime(2023, 1, 1),
+                )
+                for j in range(video_count)
+            ],
+            db=db,
+        )
+    db.expunge_all()
+    return db
+
+
+@pytest.mark.parametrize("video_count", [5, 50])
+async def test_build_feed_statement_count(
+    video_count: int, tmp_path: Path, monkeypatch: MagicMock
+) -> None:
+    monkeypatch.setattr(
+        "youtube_rss.services.feed.get_rss_file_path",
+        lambda source_id: tmp_path / f"{source_id}.rss",
+    )
+    db = await make_library(source_count=1, video_count=video_count)
+    (db_source,) = await crud.source.get_all(db=db) or []
+    db.expunge_all()
+
+    with count_statements(db=db) as statements:
+        source = await crud.source.get(id=db_source.id, db=db, load="videos")
+        await build_rss_file(source=source, db=db)
+    assert len(source.videos) == video_count
+    # The source, then all of its videos, then storing the feed fingerprint.
+    assert len(statements) == 3
+
+
+@pytest.mark.parametrize("source_count", [2, 20])
+async def test_user_page_statement_count(source_count: int) -> None:
+    db = await make_library(source_count=source_count, video_count=2)
+
+    with count_statements(db=db) as statements:
+        response = await read_root(request=MagicMock(), username="test_user", db=db)
+    assert response.status_code == 200
+    assert all(f"Source {i}".encode() in response.body for i in range(source_count))
+    # The user, then all of their sources.
+    assert len(statements) == 2
+
+
+@pytest.mark.parametrize("source_count", [2, 20])
+async def test_get_all_sources_with_videos_statement_count(source_count: int) -> None:
+    db = await make_library(source_count=source_count, video_count=3)
+
+    with count_statements(db=db) as statements:
+        sources = await crud.source.get_all(db=db) or []
+        assert sum(len(source.videos) for source in sources) == source_count * 3
+    # Lazy loading: one query per source.
+    assert len(statements) == 1 + source_count
+
+    db.expunge_all()
+    with count_statements(db=db) as statements:
+        sources = await crud.source.get_all(db=db, load="videos") or []
+        assert sum(len(source.videos) for source in sources) == source_count * 3
+    assert len(statements) == 2
+
+
+async def test_unknown_load_strategy(db: Session) -> None:
+    with pytest.raises(ValueError):
+        await crud.source.get(id="missing", db=db, load="unknown")
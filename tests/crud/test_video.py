@@ -0,0 +1,44 @@
+from typing import Any
+
+import sys
+from unittest.mock import MagicMock
+
+from sqlmodel import Session
+
+from youtube_rss import crud
+from youtube_rss.models.video import VideoCreate
+
+
+async def test_fetch_videos_skips_deleted_videos(
+    db_with_source_videos: Session, monkeypatch: MagicMock
+) -> None:
+    db = db_with_source_videos
+    db_videos = await crud.video.get_many(db, source_id="7hyhcvzT")
+    deleted_video = db_videos[0]
+
+    async def get_video_info_dict(url: str, **kwargs: Any) -> dict[str, Any]:
+        # The video is deleted while the videos are being extracted.
+        if await crud.video.get_or_none(id=deleted_video.id, db=db):
+            await crud.video.delete(id=deleted_video.id, db=db)
+        return {"webpage_url": url}
+
+    async def get_video_from_video_info_dict(
+        video_info_dict: dict[str, Any], source_id: str
+    ) -> VideoCreate:
+        return VideoCreate(
+            url=video_info_dict["webpage_url"], source_id=source_id, title="Refreshed"
+        )
+
+    # `youtube_rss.crud.video` is the VideoCRUD instance, so patch the module itself.
+    video_crud = sys.modules["youtube_rss.crud.video"]
+    monkeypatch.setattr(video_crud, "get_video_info_dict", get_video_info_dict)
+    monkeypatch.setattr(
+        video_crud, "get_video_from_video_info_dict", get_video_from_video_info_dict
+    )
+
+    fetched = await crud.video.fetch_videos(
+        video_ids=[db_video.id for db_video in db_videos], db=db
+    )
+    assert [video.id for video in fetched] == [db_video.id for db_video in db_videos[1:]]
+    assert all(video.title == "Refreshed" for video in fetched)
+    assert await crud.video.get_or_none(id=deleted_video.id, db=db) is None
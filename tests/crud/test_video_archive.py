@@ -0,0 +1,68 @@
+import datetime
+
+from sqlmodel import Session, select
+
+from youtube_rss import crud
+from youtube_rss.models.job import Job
+from youtube_rss.models.video import VideoArchive, VideoCreate
+from youtube_rss.services.scheduler import schedule_video_jobs
+from youtube_rss.services.source import add_new_source_videos_from_fetched_videos
+
+
+def make_video_create(i: int) -> VideoCreate:
+    return VideoCreate(
+        source_id="7hyhcvzT",
+        title=f"Video {i}",
+        description=f"This is video {i}.",
+        url=f"https://rumble.com/v{i}-video.html",
+        released_at=datetime.datetime(2023, 1, 1) + datetime.timedelta(days=i),
+    )
+
+
+async def test_archive_and_promote(db_with_source: Session) -> None:
+    db = db_with_source
+    videos = await crud.video.create_many(
+        in_objs=[make_video_create(i=i) for i in range(10)], db=db
+    )
+    await schedule_video_jobs(db=db, videos=videos)
+
+    # Videos 0-1 are too old, and videos 2-4 are outside the feed window of 5.
+    archived_video_ids = await crud.video_archive.archive_source_videos(
+        db=db,
+        source_id="7hyhcvzT",
+        published_before=datetime.datetime(2023, 1, 3),
+        keep=5,
+    )
+    assert sorted(archived_video_ids) == sorted(video.id for video in videos[:5])
+    hot_video_ids = {video.id for video in await crud.video.get_all(db=db) or []}
+    assert hot_video_ids == {video.id for video in videos[5:]}
+    assert len(db.exec(select(VideoArchive)).all()) == 5
+    # The refresh jobs of archived videos are deleted.
+    assert {job.entity_id for job in db.exec(select(Job)).all()} == hot_video_ids
+
+    # Fetching the source again does not add the archived videos back.
+    db_source = await crud.source.get(id="7hyhcvzT", db=db)
+    added_videos = await add_new_source_videos_from_fetched_videos(
+        fetched_videos=[make_video_create(i=i) for i in range(11)], db_source=db_source, db=db
+    )
+    assert [video.title for video in added_videos] == ["Video 10"]
+
+    # Promoting moves the video back, with the fields that were kept.
+    video = await crud.video_archive.promote(video_id=videos[0].id, db=db)
+    assert video.title == "Video 0"
+    assert video.url == videos[0].url
+    assert video.released_at == videos[0].released_at
+    assert video.description is None
+    assert await crud.video_archive.get_or_none(id=videos[0].id, db=db) is None
+
+    # The promoted video is in use, so it is not archived again with the next archive.
+    assert video.accessed_at is not None
+    archived_video_ids = await crud.video_archive.archive_source_videos(
+        db=db,
+        source_id="7hyhcvzT",
+        published_before=datetime.datetime(2023, 1, 3),
+        keep=5,
+        accessed_before=datetime.datetime.utcnow() - datetime.timedelta(days=30),
+    )
+    assert archived_video_ids == [videos[5].id]
+    assert await crud.video.get_or_none(id=videos[0].id, db=db) is not None
@@ -1,13 +1,26 @@
 from typing import Any
 
+import asyncio
 from pathlib import Path
 from unittest.mock import MagicMock
 
+import httpx
 from fastapi.testclient import TestClient
 from sqlmodel import Session
+from starlette.applications import Starlette
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.routing import Mount
 
 from youtube_rss import crud
+from youtube_rss.api.deps import get_db
+from youtube_rss.core.app import app
+from youtube_rss.core.auth import AuthHandler
+from youtube_rss.core.feed_response import FeedStaticFiles, get_feed_response
+from youtube_rss.services import feed
+from youtube_rss.services.cache import CachedFeed
 from youtube_rss.services.feed import build_rss_file
+from youtube_rss.services.feed_queue import feed_build_queue
 
 
 def test_get_rss_not_found(client: TestClient) -> None:
@@ -38,9 +51,136 @@ async def test_build_and_get_rss_success(
     )
     # monkeypatch.return_value = tmp_rss_file_path
 
-    rss_file = await build_rss_file(source=source)
+    rss_file = await build_rss_file(source=source, db=db_with_source_videos)
     assert rss_file == tmp_path / f"{source_id}.rss"
 
     # Try accessing the RSS file
     response = client.get(f"/feed/{source_id}")
     assert response.status_code == 200
+
+
+async def test_build_rss_is_not_debounced(
+    db_with_source_videos: Session,
+    tmp_path: Path,
+    monkeypatch: MagicMock,
+    auth_handler: AuthHandler,
+) -> None:
+    db = db_with_source_videos
+    source_id = "7hyhcvzT"
+    monkeypatch.setattr(feed, "get_rss_file_path", lambda source_id: tmp_path / f"{source_id}.rss")
+    monkeypatch.setattr(feed_build_queue, "debounce_seconds", 60)
+    access_token = auth_handler.encode_access_token(user_id="ZbFPeSXW")
+
+    app.dependency_overrides[get_db] = lambda: db
+    feed_build_queue.start(bind=db.get_bind())
+    try:
+        async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+            # An explicit rebuild does not wait for the debounce.
+            response = await asyncio.wait_for(
+                client.put(
+                    f"/feed/{source_id}", headers={"Authorization": f"Bearer {access_token}"}
+                ),
+                timeout=5,
+            )
+    finally:
+        await feed_build_queue.stop()
+        app.dependency_overrides.pop(get_db)
+
+    assert response.status_code == 200
+    assert response.text == (tmp_path / f"{source_id}.rss").read_text()
+    assert feed_build_queue.pending == {}
+
+
+async def test_get_rss_conditional(
+    db_with_source_videos: Session,
+    tmp_path: Path,
+    monkeypatch: MagicMock,
+    client: TestClient,
+) -> None:
+    source_id = "7hyhcvzT"
+    monkeypatch.setattr(
+        "youtube_rss.services.feed.get_rss_file_path",
+        lambda source_id: tmp_path / f"{source_id}.rss",
+    )
+    source = await crud.source.get(id=source_id, db=db_with_source_videos)
+    rss_file = await build_rss_file(source=source, db=db_with_source_videos)
+
+    response = client.get(f"/feed/{source_id}")
+    assert response.status_code == 200
+    assert response.content == rss_file.read_bytes()
+    etag = response.headers["etag"]
+    last_modified = response.headers["last-modified"]
+
+    # A current copy is not sent again.
+    for headers in (
+        {"If-None-Match": etag},
+        {"If-None-Match": f'"other", W/{etag}'},
+        {"If-Modified-Since": last_modified},
+    ):
+        response = client.get(f"/feed/{source_id}", headers=headers)
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+
+    # If-None-Match takes precedence over If-Modified-Since.
+    response = client.get(
+        f"/feed/{source_id}",
+        headers={"If-None-Match": '"other"', "If-Modified-Since": last_modified},
+    )
+    assert response.status_code == 200
+
+    # A rebuilt feed has a new ETag.
+    source.videos[0].title = "Updated title"
+    db_with_source_videos.commit()
+    await build_rss_file(source=source, db=db_with_source_videos)
+    response = client.get(f"/feed/{source_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert b"Updated title" in response.content
+    assert response.headers["etag"] != etag
+
+
+def test_feed_static_files_conditional(tmp_path: Path) -> None:
+    (tmp_path / "source.rss").write_bytes(b"<rss/>")
+    (tmp_path / "other.txt").write_bytes(b"text")
+    client = TestClient(Starlette(routes=[Mount("/feed", app=FeedStaticFiles(directory=tmp_path))]))
+
+    response = client.get("/feed/source.rss")
+    assert response.status_code == 200
+    assert response.content == b"<rss/>"
+    assert response.headers["content-type"] == "application/rss+xml"
+    response = client.get("/feed/source.rss", headers={"If-None-Match": response.headers["etag"]})
+    assert response.status_code == 304
+
+    response = client.get("/feed/other.txt")
+    assert response.status_code == 200
+    assert response.content == b"text"
+    assert client.get("/feed/missing.rss").status_code == 404
+
+
+def test_get_feed_response_encoding() -> None:
+    feed = CachedFeed(
+        content=b"<rss/>",
+        etag='"abc"',
+        last_modified="Sun, 18 Oct 2026 00:00:00 GMT",
+        stat_key=(0, 6),
+        encoded_content={"br": b"br", "gzip": b"gzip"},
+    )
+
+    def get(accept_encoding: str, **headers: str) -> Response:
+        return get_feed_response(
+            feed=feed, request_headers=Headers({"accept-encoding": accept_encoding, **headers})
+        )
+
+    assert get("gzip, deflate, br").body == b"br"
+    assert get("gzip, deflate, br").headers["etag"] == '"abc-br"'
+    assert get("gzip, br;q=0.5").headers["content-encoding"] == "gzip"
+    assert get("*").headers["content-encoding"] == "br"
+    assert get("br;q=0, *").headers["content-encoding"] == "gzip"
+    assert "content-encoding" not in get("deflate").headers
+    assert get("deflate").body == b"<rss/>"
+    assert get("").headers["vary"] == "Accept-Encoding"
+
+    # The ETag of each variant only matches that variant.
+    assert get("gzip", **{"if-none-match": '"abc-gzip"'}).status_code == 304
+    assert get("br", **{"if-none-match": '"abc-gzip"'}).status_code == 200
+    assert get("", **{"if-none-match": '"abc"'}).status_code == 304
@@ -0,0 +1,129 @@
+from typing import Any
+
+import asyncio
+import datetime
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi import HTTPException, status
+from sqlmodel import Session
+from yt_dlp.utils import DownloadError, ExtractorError
+
+from youtube_rss import crud, settings
+from youtube_rss.api.v1.endpoints.media import handle_media
+from youtube_rss.models.video import Video
+
+
+async def test_handle_media_single_flight(
+    db_with_source_videos: Session, monkeypatch: MagicMock
+) -> None:
+    video = (await crud.video.get_all(db=db_with_source_videos) or [])[0]
+    fetches = 0
+
+    async def mock_fetch_video(video_id: str, db: Session, **kwargs: Any) -> Video:
+        nonlocal fetches
+        fetches += 1
+        await asyncio.sleep(0.1)
+        db_video = await crud.video.get(id=video_id, db=db)
+        db_video.media_url = f"https://sp.rmbl.ws/{video_id}.mp4"
+        db.commit()
+        return db_video
+
+    monkeypatch.setattr(crud.video, "fetch_video", mock_fetch_video)
+
+    responses = await asyncio.gather(
+        *[
+            handle_media(video_id=video.id, request=MagicMock(), db=db_with_source_videos)
+            for _ in range(10)
+        ]
+    )
+    assert fetches == 1
+    assert all(response.status_code == 307 for response in responses)
+    assert all(
+        response.headers["location"] == f"https://sp.rmbl.ws/{video.id}.mp4"
+        for response in responses
+    )
+
+    # The media_url is now stored, so no further fetches.
+    await handle_media(video_id=video.id, request=MagicMock(), db=db_with_source_videos)
+    assert fetches == 1
+
+    # The request marked the video as accessed, which is not written again right away.
+    accessed_at = video.accessed_at
+    assert accessed_at is not None
+    await handle_media(video_id=video.id, request=MagicMock(), db=db_with_source_videos)
+    assert video.accessed_at == accessed_at
+
+
+async def test_handle_media_fetch_timeout(
+    db_with_source_videos: Session, monkeypatch: MagicMock
+) -> None:
+    video = (await crud.video.get_all(db=db_with_source_videos) or [])[0]
+
+    async def mock_fetch_video(video_id: str, db: Session, **kwargs: Any) -> Video:
+        await asyncio.sleep(0.3)
+        return await crud.video.get(id=video_id, db=db)
+
+    monkeypatch.setattr(crud.video, "fetch_video", mock_fetch_video)
+    monkeypatch.setattr(settings, "media_url_fetch_timeout_seconds", 0.05)
+
+    with pytest.raises(HTTPException) as exc_info:
+        await handle_media(video_id=video.id, request=MagicMock(), db=db_with_source_videos)
+    assert exc_info.value.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert exc_info.value.headers == {"Retry-After": "0.05"}
+
+    # The fetch was not cancelled, and did not find a media_url.
+    monkeypatch.setattr(settings, "media_url_fetch_timeout_seconds", 1)
+    with pytest.raises(HTTPException) as exc_info:
+        await handle_media(video_id=video.id, request=MagicMock(), db=db_with_source_videos)
+    assert exc_info.value.status_code == status.HTTP_502_BAD_GATEWAY
+
+
+@pytest.mark.parametrize(
+    "error", [DownloadError("Video unavailable"), ExtractorError("Unable to extract")]
+)
+async def test_handle_media_ytdlp_error(
+    db_with_source_videos: Session, monkeypatch: MagicMock, error: Exception
+) -> None:
+    video = (await crud.video.get_all(db=db_with_source_videos) or [])[0]
+
+    async def mock_fetch_video(video_id: str, db: Session, **kwargs: Any) -> Video:
+        raise error
+
+    monkeypatch.setattr(crud.video, "fetch_video", mock_fetch_video)
+
+    with pytest.raises(HTTPException) as exc_info:
+        await handle_media(video_id=video.id, request=MagicMock(), db=db_with_source_videos)
+    assert exc_info.value.status_code == status.HTTP_502_BAD_GATEWAY
+
+
+async def test_handle_media_not_found(db: Session) -> None:
+    with pytest.raises(HTTPException) as exc_info:
+        await handle_media(video_id="missing", request=MagicMock(), db=db)
+    assert exc_info.value.status_code == status.HTTP_404_NOT_FOUND
+
+
+async def test_handle_media_promotes_archived_video(
+    db_with_source_videos: Session, monkeypatch: MagicMock
+) -> None:
+    video = (await crud.video.get_all(db=db_with_source_videos) or [])[0]
+    await crud.video_archive.archive_source_videos(
+        db=db_with_source_videos,
+        source_id=video.source_id,
+        published_before=datetime.datetime(2024, 1, 1),
+        keep=0,
+    )
+    assert await crud.video.get_or_none(id=video.id, db=db_with_source_videos) is None
+
+    async def mock_fetch_video(video_id: str, db: Session, **kwargs: Any) -> Video:
+        db_video = await crud.video.get(id=video_id, db=db)
+        db_video.media_url = f"https://sp.rmbl.ws/{video_id}.mp4"
+        db.commit()
+        return db_video
+
+    monkeypatch.setattr(crud.video, "fetch_video", mock_fetch_video)
+
+    response = await handle_media(video_id=video.id, request=MagicMock(), db=db_with_source_videos)
+    assert response.headers["location"] == f"https://sp.rmbl.ws/{video.id}.mp4"
+    assert await crud.video_archive.get_or_none(id=video.id, db=db_with_source_videos) is None
+    assert (await crud.video.get(id=video.id, db=db_with_source_videos)).accessed_at is not None
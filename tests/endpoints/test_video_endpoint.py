@@ -0,0 +1,49 @@
+import datetime
+
+import pytest
+from fastapi import HTTPException, status
+from sqlmodel import Session
+
+from youtube_rss.api.v1.endpoints.video import get_all
+
+
+async def test_get_all_filters(db_with_source_videos: Session) -> None:
+    page = await get_all(source_id="7hyhcvzT", limit=2, cursor=None, db=db_with_source_videos)
+    assert len(page.items) == 2
+    assert page.next_cursor is not None
+    next_page = await get_all(
+        source_id="7hyhcvzT", limit=2, cursor=page.next_cursor, db=db_with_source_videos
+    )
+    assert len(next_page.items) == 1
+    assert next_page.next_cursor is None
+
+    page = await get_all(source_id="other", limit=10, cursor=None, db=db_with_source_videos)
+    assert page.items == []
+
+    page = await get_all(
+        handler="RumbleHandler",
+        released_after=datetime.datetime(2023, 1, 1),
+        released_before=datetime.datetime(2023, 2, 1),
+        missing_media_url=True,
+        limit=10,
+        cursor=None,
+        db=db_with_source_videos,
+    )
+    assert len(page.items) == 3
+
+    page = await get_all(missing_media_url=False, limit=10, cursor=None, db=db_with_source_videos)
+    assert page.items == []
+
+    page = await get_all(
+        released_after=datetime.datetime(2023, 2, 1),
+        limit=10,
+        cursor=None,
+        db=db_with_source_videos,
+    )
+    assert page.items == []
+
+
+async def test_get_all_invalid_cursor(db_with_source_videos: Session) -> None:
+    with pytest.raises(HTTPException) as exc_info:
+        await get_all(limit=10, cursor="invalid", db=db_with_source_videos)
+    assert exc_info.value.status_code == status.HTTP_400_BAD_REQUEST
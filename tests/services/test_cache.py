@@ -0,0 +1,172 @@
+from typing import Any
+
+import gzip
+import json
+import os
+import time
+from pathlib import Path
+from unittest.mock import MagicMock
+
+from youtube_rss.services import ytdlp
+from youtube_rss.services.cache import FeedCache, InfoDictCache
+
+
+def test_cache_get_set(tmp_path: Path) -> None:
+    cache = InfoDictCache(path=tmp_path, max_bytes=1024 * 1024)
+    key = cache.get_key(url="https://rumble.com/v1", ydl_opts={"format": "worst"})
+
+    assert cache.get(key=key, ttl=60) is None
+    cache.set(key=key, info_dict={"id": "v1", "title": "Video 1"})
+    assert cache.get(key=key, ttl=60) == {"id": "v1", "title": "Video 1"}
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # Stored as gzipped json, not pickle
+    entry = json.loads(gzip.decompress(cache.get_file_path(key=key).read_bytes()))
+    assert entry["info_dict"]["id"] == "v1"
+
+
+def test_cache_key_includes_ydl_opts(tmp_path: Path) -> None:
+    cache = InfoDictCache(path=tmp_path, max_bytes=1024 * 1024)
+    url = "https://rumble.com/c/channel"
+    assert cache.get_key(url=url, ydl_opts={"extract_flat": True}) != cache.get_key(
+        url=url, ydl_opts={"extract_flat": False}
+    )
+    assert cache.get_key(url=url, ydl_opts={"logger": object()}) == cache.get_key(
+        url=url, ydl_opts={}
+    )
+
+
+def test_cache_ttl_expiry(tmp_path: Path, monkeypatch: MagicMock) -> None:
+    cache = InfoDictCache(path=tmp_path, max_bytes=1024 * 1024)
+    cache.set(key="key", info_dict={"id": "v1"})
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 120)
+    assert cache.get(key="key", ttl=60) is None
+    assert not cache.get_file_path(key="key").exists()
+
+
+def test_cache_lru_eviction(tmp_path: Path) -> None:
+    cache = InfoDictCache(path=tmp_path, max_bytes=1024 * 1024)
+    for i in range(3):
+        cache.set(key=f"key{i}", info_dict={"id": i, "data": os.urandom(256).hex()})
+        os.utime(cache.get_file_path(key=f"key{i}"), (i, i))
+    entry_size = cache.get_file_path(key="key0").stat().st_size
+
+    # Use key0, making key1 the least recently used.
+    assert cache.get(key="key0", ttl=60) is not None
+
+    cache.max_bytes = entry_size * 3 + entry_size // 2
+    cache.set(key="key3", info_dict={"id": 3, "data": os.urandom(256).hex()})
+
+    assert cache.evictions == 1
+    assert not cache.get_file_path(key="key1").exists()
+    assert cache.get_file_path(key="key0").exists()
+    assert cache.get_file_path(key="key3").exists()
+
+
+def test_cache_unreadable_entries_are_misses(tmp_path: Path) -> None:
+    cache = InfoDictCache(path=tmp_path, max_bytes=1024 * 1024)
+    entries = {
+        "corrupt": b"not gzip",
+        "not_json": gzip.compress(b"{"),
+        "old_format": gzip.compress(json.dumps({"id": "v1"}).encode()),
+        "not_a_dict": gzip.compress(json.dumps(["v1"]).encode()),
+    }
+    for key, content in entries.items():
+        cache.get_file_path(key=key).write_bytes(content)
+        assert cache.get(key=key, ttl=60) is None
+        assert not cache.get_file_path(key=key).exists()
+    assert cache.misses == len(entries)
+
+
+def test_cache_get_evicted_while_reading(tmp_path: Path, monkeypatch: MagicMock) -> None:
+    cache = InfoDictCache(path=tmp_path, max_bytes=1024 * 1024)
+    cache.set(key="key0", info_dict={"id": 0})
+    utime = os.utime
+
+    def evict_then_utime(path: Path) -> None:
+        # Another thread evicts the entry after it is read.
+        cache.remove(cache_file=path)
+        utime(path)
+
+    monkeypatch.setattr(os, "utime", evict_then_utime)
+    assert cache.get(key="key0", ttl=60) == {"id": 0}
+    assert cache.hits == 1
+
+
+def test_cache_total_bytes(tmp_path: Path) -> None:
+    cache = InfoDictCache(path=tmp_path, max_bytes=1024 * 1024)
+    cache.set(key="key0", info_dict={"id": 0})
+    cache.set(key="key1", info_dict={"id": 1})
+    cache.set(key="key1", info_dict={"id": 1, "title": "Video 1"})
+
+    # Kept as a running count, not by scanning the folder.
+    sizes = {path.name: path.stat().st_size for path in tmp_path.iterdir()}
+    assert cache.get_total_bytes() == sum(sizes.values())
+
+    cache.remove(cache_file=cache.get_file_path(key="key0"))
+    assert cache.get_total_bytes() == sizes[cache.get_file_path(key="key1").name]
+    cache.clear()
+    assert cache.get_total_bytes() == 0
+    assert list(tmp_path.iterdir()) == []
+
+
+async def test_get_info_dict_uses_cache(tmp_path: Path, monkeypatch: MagicMock) -> None:
+    calls = 0
+
+    def mock_extract_info(url: str, *args: Any, **kwargs: Any) -> dict[str, Any]:
+        nonlocal calls
+        calls += 1
+        return {"webpage_url": url}
+
+    monkeypatch.setattr(ytdlp, "extract_info", mock_extract_info)
+    cache = InfoDictCache(path=tmp_path, max_bytes=1024 * 1024)
+    kwargs: dict[str, Any] = {
+        "url": "https://rumble.com/v1",
+        "ydl_opts": {},
+        "cache": cache,
+        "cache_ttl": 60,
+    }
+
+    await ytdlp.get_info_dict(**kwargs)
+    info_dict = await ytdlp.get_info_dict(**kwargs)
+    assert calls == 1
+    assert info_dict["metadata"]["url"] == "https://rumble.com/v1"
+
+    # Bypass the cache for forced fetches.
+    await ytdlp.get_info_dict(**kwargs, use_cache=False)
+    assert calls == 2
+
+
+def test_feed_cache(tmp_path: Path) -> None:
+    cache = FeedCache(max_bytes=10)
+    feed_a = tmp_path / "a.rss"
+    feed_b = tmp_path / "b.rss"
+    feed_a.write_bytes(b"aaaa")
+    feed_b.write_bytes(b"bbbb")
+
+    entry = cache.get(path=feed_a)
+    assert entry.content == b"aaaa"
+    assert entry.etag.startswith('"') and entry.etag.endswith('"')
+    assert cache.get(path=feed_a) is entry
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # A file changed on disk is read again.
+    feed_a.write_bytes(b"aaaaa")
+    os.utime(feed_a, ns=(1, 1))
+    entry = cache.get(path=feed_a)
+    assert entry.content == b"aaaaa"
+    assert cache.misses == 2
+
+    # The least recently used feed is evicted.
+    cache.get(path=feed_b)
+    feed_c = tmp_path / "c.rss"
+    feed_c.write_bytes(b"cccc")
+    cache.get(path=feed_c)
+    assert list(cache.entries) == [feed_b, feed_c]
+    assert (cache.total_bytes, cache.evictions) == (8, 1)
+
+    cache.invalidate(path=feed_b)
+    assert list(cache.entries) == [feed_c]
+    assert cache.total_bytes == 4
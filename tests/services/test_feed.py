@@ -0,0 +1,225 @@
+from types import SimpleNamespace
+from typing import Any, Callable
+
+import datetime
+import gzip
+import io
+import os
+import time
+import tracemalloc
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+from sqlmodel import Session
+
+from youtube_rss import crud
+from youtube_rss.services import feed
+from youtube_rss.services.cache import feed_cache
+from youtube_rss.services.feed import build_rss_file
+from youtube_rss.services.rss import get_feed_published_at, write_rss
+
+
+async def test_build_rss_file_skips_unchanged_feed(
+    db_with_source_videos: Session, tmp_path: Path, monkeypatch: MagicMock
+) -> None:
+    db = db_with_source_videos
+    monkeypatch.setattr(feed, "get_rss_file_path", lambda source_id: tmp_path / f"{source_id}.rss")
+    builds = 0
+
+    def counting_write_rss(**kwargs: Any) -> None:
+        nonlocal builds
+        builds += 1
+        write_rss(**kwargs)
+
+    monkeypatch.setattr(feed, "write_rss", counting_write_rss)
+
+    source = await crud.source.get(id="7hyhcvzT", db=db)
+    rss_file = await build_rss_file(source=source, db=db)
+    content = rss_file.read_bytes()
+    assert builds == 1
+    assert source.feed_fingerprint is not None
+
+    # Unchanged, so neither generated nor written.
+    rss_file.touch()
+    mtime = rss_file.stat().st_mtime_ns
+    await build_rss_file(source=source, db=db)
+    assert builds == 1
+    assert rss_file.stat().st_mtime_ns == mtime
+
+    # A forced rebuild of the same content is byte for byte identical.
+    source.feed_fingerprint = None
+    await build_rss_file(source=source, db=db)
+    assert builds == 2
+    assert rss_file.read_bytes() == content
+
+    # A changed video is rebuilt.
+    source.videos[0].title = "Updated title"
+    db.commit()
+    await build_rss_file(source=source, db=db)
+    assert builds == 3
+    assert b"Updated title" in rss_file.read_bytes()
+
+    # A deleted feed file is rebuilt.
+    rss_file.unlink()
+    await build_rss_file(source=source, db=db)
+    assert builds == 4
+    assert rss_file.exists()
+
+
+def make_feed_source(video_count: int, **kwargs: Any) -> SimpleNamespace:
+    videos = [
+        SimpleNamespace(
+            id=f"v{i}",
+            uploader=f"Uploader {i}",
+            title=f"Video {i}",
+            url=f"https://rumble.com/v{i}-video.html",
+            description=f"This is video {i}.",
+            feed_media_url=f"/media/v{i}",
+            media_filesize=1000 + i,
+            duration=60 + i,
+            thumbnail=f"https://sp.rmbl.ws/v{i}.jpg",
+            released_at=datetime.datetime(2023, 1, 1) + datetime.timedelta(hours=i),
+            added_at=datetime.datetime(2023, 1, 2),
+        )
+        for i in range(video_count)
+    ]
+    return SimpleNamespace(
+        **{
+            "id": "7hyhcvzT",
+            "name": "Styxhexenhammer666",
+            "author": "Styxhexenhammer666",
+            "url": "https://rumble.com/c/Styxhexenhammer666",
+            "logo": "https://sp.rmbl.ws/logo.png",
+            "description": "Styxhexenhammer666's Rumble Channel",
+            "feed_url": "/feed/7hyhcvzT",
+            "added_at": datetime.datetime(2022, 1, 1),
+            "videos": videos,
+            **kwargs,
+        }
+    )
+
+
+def generate_with_feedgen(source: Any, path: Path) -> bytes:
+    feed.SourceFeedGenerator(source=source).rss_file(
+        filename=str(path), encoding="UTF-8", pretty=True
+    )
+    return path.read_bytes()
+
+
+def generate_with_write_rss(source: Any) -> bytes:
+    videos = list(reversed(source.videos))
+    file = io.BytesIO()
+    write_rss(
+        file=file,
+        source=source,
+        videos=videos,
+        published_at=get_feed_published_at(source=source, videos=videos),
+    )
+    return file.getvalue()
+
+
+async def test_write_rss_matches_feedgen(
+    db_with_source_videos: Session, tmp_path: Path, monkeypatch: MagicMock
+) -> None:
+    monkeypatch.setattr(feed, "get_rss_file_path", lambda source_id: tmp_path / f"{source_id}.rss")
+
+    db_source = await crud.source.get(id="7hyhcvzT", db=db_with_source_videos, load="videos")
+    assert generate_with_write_rss(db_source) == generate_with_feedgen(
+        db_source, tmp_path / "a.rss"
+    )
+
+    # Escaping, missing optional fields, and non-ASCII text.
+    source = make_feed_source(
+        video_count=4,
+        name='Styx & "Friends" <Live>',
+        author=None,
+        description=None,
+        logo="https://sp.rmbl.ws/logo.png?a=1&b='2'",
+    )
+    source.videos[0].title = None
+    source.videos[0].description = "Line 1\nLine 2\r\n\tTabbed & <b>bold</b> > 'quoted'"
+    source.videos[1].uploader = None
+    source.videos[1].duration = None
+    source.videos[1].media_filesize = None
+    source.videos[2].description = "Émoji 🎉, ümlaut, 日本語"
+    source.videos[2].duration = 0
+    source.videos[3].thumbnail = 'https://sp.rmbl.ws/"quoted"\n<thumb>&.jpg'
+    source.videos[3].released_at = datetime.datetime(2023, 1, 2)
+    assert generate_with_write_rss(source) == generate_with_feedgen(source, tmp_path / "b.rss")
+
+    # Both refuse text that XML can not represent.
+    source.videos[0].description = "Bell \x07"
+    with pytest.raises(ValueError):
+        generate_with_feedgen(source, tmp_path / "c.rss")
+    with pytest.raises(ValueError):
+        generate_with_write_rss(source)
+
+
+def test_write_rss_benchmark(tmp_path: Path) -> None:
+    """
+    Time and peak (Python) memory of generating a feed with feedgen, and with the
+    streaming `write_rss`, at increasing numbers of videos.
+    """
+
+    def _measure(generate: Callable[[], object]) -> tuple[float, int]:
+        tracemalloc.start()
+        start = time.perf_counter()
+        generate()
+        seconds = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return seconds, peak
+
+    def _write_rss_file(source: Any) -> None:
+        videos = list(reversed(source.videos))
+        with (tmp_path / "streamed.rss").open("wb") as file:
+            write_rss(
+                file=file,
+                source=source,
+                videos=videos,
+                published_at=get_feed_published_at(source=source, videos=videos),
+            )
+
+    results = {}
+    for video_count in (100, 1_000, 10_000):
+        source = make_feed_source(video_count=video_count)
+        feedgen_seconds, feedgen_peak = _measure(
+            lambda: generate_with_feedgen(source, tmp_path / "feedgen.rss")
+        )
+        streamed_seconds, streamed_peak = _measure(lambda: _write_rss_file(source))
+        results[video_count] = (feedgen_seconds, feedgen_peak, streamed_seconds, streamed_peak)
+
+    feedgen_seconds, feedgen_peak, streamed_seconds, streamed_peak = results[10_000]
+    assert streamed_seconds < feedgen_seconds
+    assert streamed_peak < feedgen_peak / 10
+
+
+async def test_build_rss_file_writes_precompressed_variants(
+    db_with_source_videos: Session, tmp_path: Path, monkeypatch: MagicMock
+) -> None:
+    db = db_with_source_videos
+    monkeypatch.setattr(feed, "get_rss_file_path", lambda source_id: tmp_path / f"{source_id}.rss")
+    monkeypatch.setattr(
+        feed, "brotli", SimpleNamespace(compress=lambda content, quality: b"br:" + content)
+    )
+
+    source = await crud.source.get(id="7hyhcvzT", db=db)
+    rss_file = await build_rss_file(source=source, db=db)
+    content = rss_file.read_bytes()
+    gzip_file = tmp_path / "7hyhcvzT.rss.gz"
+    assert gzip.decompress(gzip_file.read_bytes()) == content
+    assert (tmp_path / "7hyhcvzT.rss.br").read_bytes() == b"br:" + content
+    assert gzip_file.stat().st_mtime_ns == rss_file.stat().st_mtime_ns
+
+    cached_feed = feed_cache.get(path=rss_file)
+    assert list(cached_feed.encoded_content) == ["br", "gzip"]
+    assert cached_feed.get_etag(encoding="gzip") != cached_feed.get_etag()
+
+    # A variant of another build of the feed is not used.
+    os.utime(gzip_file, ns=(1, 1))
+    feed_cache.invalidate(path=rss_file)
+    assert list(feed_cache.get(path=rss_file).encoded_content) == ["br"]
+
+    await feed.delete_rss_file(source_id="7hyhcvzT")
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,128 @@
+from types import SimpleNamespace
+from typing import Any
+
+import asyncio
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+from sqlmodel import Session
+
+from youtube_rss import crud
+from youtube_rss.services import feed, feed_queue
+from youtube_rss.services.feed_queue import FeedBuildQueue
+
+
+async def test_feed_build_queue_coalesces_builds(
+    db_with_source_videos: Session, tmp_path: Path, monkeypatch: MagicMock
+) -> None:
+    db = db_with_source_videos
+    monkeypatch.setattr(feed, "get_rss_file_path", lambda source_id: tmp_path / f"{source_id}.rss")
+    queue = FeedBuildQueue(debounce_seconds=0.05, max_concurrency=2)
+    queue.start(bind=db.get_bind())
+    try:
+        # A burst of changes is built once, and every caller gets the result.
+        futures = [queue.mark_dirty(source_id="7hyhcvzT") for _ in range(3)]
+        assert len(set(futures)) == 1
+        source = await crud.source.get(id="7hyhcvzT", db=db)
+        rss_file = await queue.build(source=source, db=db)
+        assert rss_file == tmp_path / "7hyhcvzT.rss"
+        assert rss_file.exists()
+        assert (queue.builds, queue.coalesced) == (1, 3)
+
+        # A source that is marked while it is building is built again after.
+        started = asyncio.Event()
+        release = asyncio.Event()
+
+        async def slow_build_rss_file(source: Any, db: Any) -> Path:
+            started.set()
+            await release.wait()
+            return await feed.build_rss_file(source=source, db=db)
+
+        monkeypatch.setattr(feed_queue, "build_rss_file", slow_build_rss_file)
+        first = queue.mark_dirty(source_id="7hyhcvzT")
+        await started.wait()
+        second = queue.mark_dirty(source_id="7hyhcvzT")
+        assert second is not first
+        release.set()
+        await asyncio.gather(first, second)
+        assert queue.builds == 3
+    finally:
+        await queue.stop()
+    assert not queue.running
+
+
+async def test_feed_build_queue_bounded_concurrency(monkeypatch: MagicMock) -> None:
+    running = 0
+    max_running = 0
+
+    async def get_source(id: str, **kwargs: Any) -> SimpleNamespace:
+        return SimpleNamespace(id=id)
+
+    async def fake_build_rss_file(source: Any, db: Any) -> Path:
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        if source.id == "failing":
+            raise ValueError("Invalid feed")
+        return Path(f"{source.id}.rss")
+
+    monkeypatch.setattr(crud.source, "get", get_source)
+    monkeypatch.setattr(feed_queue, "build_rss_file", fake_build_rss_file)
+    queue = FeedBuildQueue(debounce_seconds=0, max_concurrency=2)
+    queue.start(bind=MagicMock())
+    try:
+        futures = [queue.mark_dirty(source_id=f"source{i}") for i in range(6)]
+        failing = queue.mark_dirty(source_id="failing")
+        assert await asyncio.gather(*futures) == [Path(f"source{i}.rss") for i in range(6)]
+        with pytest.raises(ValueError):
+            await failing
+        assert max_running == 2
+        assert (queue.builds, queue.failures) == (6, 1)
+
+        # The queue keeps running after a failed build.
+        assert await queue.mark_dirty(source_id="source0") == Path("source0.rss")
+    finally:
+        await queue.stop()
+
+
+async def test_feed_build_queue_builds_inline_when_stopped(
+    db_with_source_videos: Session, tmp_path: Path, monkeypatch: MagicMock
+) -> None:
+    db = db_with_source_videos
+    monkeypatch.setattr(feed, "get_rss_file_path", lambda source_id: tmp_path / f"{source_id}.rss")
+    queue = FeedBuildQueue(debounce_seconds=60, max_concurrency=2)
+
+    source = await crud.source.get(id="7hyhcvzT", db=db)
+    await queue.submit(source=source, db=db)
+    assert (tmp_path / "7hyhcvzT.rss").exists()
+    assert queue.pending == {}
+
+
+async def test_feed_build_queue_builds_new_feeds_right_away(
+    db_with_source_videos: Session, tmp_path: Path, monkeypatch: MagicMock
+) -> None:
+    db = db_with_source_videos
+
+    def get_rss_file_path(source_id: str) -> Path:
+        return tmp_path / f"{source_id}.rss"
+
+    monkeypatch.setattr(feed, "get_rss_file_path", get_rss_file_path)
+    monkeypatch.setattr(feed_queue, "get_rss_file_path", get_rss_file_path)
+    queue = FeedBuildQueue(debounce_seconds=60, max_concurrency=2)
+    queue.start(bind=db.get_bind())
+    try:
+        # The source has no feed yet, so it is built without waiting for the debounce.
+        source = await crud.source.get(id="7hyhcvzT", db=db)
+        await asyncio.wait_for(queue.submit(source=source, db=db), timeout=5)
+        assert (tmp_path / "7hyhcvzT.rss").exists()
+        assert queue.builds == 1
+
+        # Rebuilds are debounced.
+        await queue.submit(source=source, db=db)
+        assert list(queue.pending) == ["7hyhcvzT"]
+        assert queue.builds == 1
+    finally:
+        await queue.stop()
@@ -0,0 +1,186 @@
+import datetime
+from unittest.mock import MagicMock
+
+from sqlmodel import Session, col
+
+from youtube_rss import crud, settings
+from youtube_rss.models.job import JobCreate, JobKind
+from youtube_rss.models.video import Video, VideoCreate
+from youtube_rss.services import scheduler
+
+SOURCE = JobKind.REFRESH_SOURCE
+
+
+def make_job(
+    entity_id: str,
+    due_at: datetime.datetime,
+    priority: int = 10,
+    kind: JobKind = JobKind.REFRESH_VIDEO,
+) -> JobCreate:
+    return JobCreate(kind=kind.value, entity_id=entity_id, due_at=due_at, priority=priority)
+
+
+async def test_schedule_deduplicates_jobs(db: Session) -> None:
+    now = datetime.datetime.utcnow()
+    await crud.job.schedule_many(db=db, jobs=[make_job(entity_id="v1", due_at=now)])
+    await crud.job.schedule_many(
+        db=db,
+        jobs=[
+            make_job(entity_id="v1", due_at=now + datetime.timedelta(hours=1), priority=20),
+            make_job(entity_id="v2", due_at=now),
+        ],
+    )
+
+    jobs = await crud.job.get_all(db=db) or []
+    assert sorted(job.id for job in jobs) == ["refresh_video:v1", "refresh_video:v2"]
+
+    # Keeps the earliest due_at and the highest priority
+    job = await crud.job.get(id="refresh_video:v1", db=db)
+    assert job.due_at == now
+    assert job.priority == 20
+
+
+async def test_run_due_jobs_only_runs_due_jobs(db: Session, monkeypatch: MagicMock) -> None:
+    now = datetime.datetime.utcnow()
+    await crud.job.schedule_many(
+        db=db,
+        jobs=[
+            make_job(entity_id=f"s{i}", due_at=now + datetime.timedelta(hours=1), kind=SOURCE)
+            for i in range(100)
+        ]
+        + [
+            make_job(entity_id="overdue", due_at=now - datetime.timedelta(hours=1), kind=SOURCE),
+            make_job(entity_id="due", due_at=now, kind=SOURCE),
+            make_job(entity_id="urgent", due_at=now, priority=20, kind=SOURCE),
+        ],
+    )
+    ran: list[str] = []
+
+    async def mock_runner(entity_id: str, db: Session) -> datetime.datetime:
+        ran.append(entity_id)
+        return now + datetime.timedelta(hours=2)
+
+    monkeypatch.setitem(scheduler.JOB_RUNNERS, SOURCE.value, mock_runner)
+    monkeypatch.setattr(settings, "scheduler_max_concurrency", 1)
+
+    jobs = await scheduler.run_due_jobs(bind=db.get_bind())
+    assert [job.entity_id for job in jobs] == ["urgent", "overdue", "due"]
+    assert ran == ["urgent", "overdue", "due"]
+
+    # Rescheduled, so nothing is due anymore
+    assert await scheduler.run_due_jobs(bind=db.get_bind()) == []
+    db.expire_all()
+    job = await crud.job.get(id="refresh_source:due", db=db)
+    assert job.due_at == now + datetime.timedelta(hours=2)
+    assert job.started_at is None
+
+
+async def test_run_due_jobs_backoff(db: Session, monkeypatch: MagicMock) -> None:
+    await crud.job.schedule_many(
+        db=db, jobs=[make_job(entity_id="s1", due_at=datetime.datetime.utcnow(), kind=SOURCE)]
+    )
+
+    async def failing_runner(entity_id: str, db: Session) -> datetime.datetime:
+        raise ValueError("yt-dlp error")
+
+    monkeypatch.setitem(scheduler.JOB_RUNNERS, SOURCE.value, failing_runner)
+    monkeypatch.setattr(settings, "scheduler_backoff_base_seconds", 60)
+    monkeypatch.setattr(settings, "scheduler_backoff_max_seconds", 150)
+
+    delays = []
+    for _ in range(3):
+        start = datetime.datetime.utcnow()
+        await scheduler.run_due_jobs(bind=db.get_bind(), limit=10)
+        db.expire_all()
+        job = await crud.job.get(id="refresh_source:s1", db=db)
+        delays.append(round((job.due_at - start).total_seconds()))
+
+        # Make the job due again
+        job.due_at = datetime.datetime.utcnow()
+        db.commit()
+
+    assert delays == [60, 120, 150]
+    assert job.attempts == 3
+    assert job.last_error == "yt-dlp error"
+
+
+async def test_run_due_jobs_deletes_jobs_for_deleted_entities(db: Session) -> None:
+    await crud.job.schedule_many(
+        db=db, jobs=[make_job(entity_id="deleted", due_at=datetime.datetime.utcnow())]
+    )
+    await scheduler.run_due_jobs(bind=db.get_bind())
+    assert await crud.job.get_or_none(id="refresh_video:deleted", db=db) is None
+
+
+async def test_complete_keeps_earlier_due_at(db: Session) -> None:
+    now = datetime.datetime.utcnow()
+    await crud.job.schedule_many(db=db, jobs=[make_job(entity_id="v1", due_at=now)])
+    jobs = await crud.job.get_due(db=db, now=now, limit=10)
+    await crud.job.start(db=db, jobs=jobs, now=now)
+
+    # Scheduled again while it runs, ie. by a source refresh.
+    rescheduled_at = now + datetime.timedelta(minutes=5)
+    await crud.job.schedule_many(db=db, jobs=[make_job(entity_id="v1", due_at=rescheduled_at)])
+    job = await crud.job.complete(
+        db=db, job_id="refresh_video:v1", next_due_at=now + datetime.timedelta(hours=1)
+    )
+    assert job.due_at == rescheduled_at
+
+    # Not scheduled while it runs, so it is due at the next due_at.
+    await crud.job.start(db=db, jobs=[job], now=now)
+    job = await crud.job.complete(
+        db=db, job_id="refresh_video:v1", next_due_at=now + datetime.timedelta(hours=1)
+    )
+    assert job.due_at == now + datetime.timedelta(hours=1)
+
+
+async def test_run_due_jobs_batches_video_jobs_per_source(
+    db_with_source_videos: Session, monkeypatch: MagicMock
+) -> None:
+    db = db_with_source_videos
+    db_videos = await crud.video.get_many(db, source_id="7hyhcvzT")
+    other_video = await crud.video.create(
+        in_obj=VideoCreate(url="https://rumble.com/v9-other.html", source_id="other"), db=db
+    )
+    now = datetime.datetime.utcnow()
+    await crud.job.schedule_many(
+        db=db,
+        jobs=[
+            make_job(entity_id=video_id, due_at=now)
+            for video_id in [*[db_video.id for db_video in db_videos], other_video.id, "deleted"]
+        ],
+    )
+    batches: list[list[str]] = []
+
+    async def fetch_videos_with_errors(
+        video_ids: list[str], db: Session
+    ) -> tuple[list[Video], dict[str, Exception]]:
+        batches.append(video_ids)
+        videos = await crud.video.get_many(db, col(Video.id).in_(video_ids))
+        for video in videos:
+            video.media_url = "https://sp.rmbl.ws/v.mp4"
+            video.media_url_expires_at = now + datetime.timedelta(hours=6)
+        return [video for video in videos if video.id != db_videos[0].id], {
+            db_videos[0].id: ValueError("yt-dlp error")
+        }
+
+    monkeypatch.setattr(crud.video, "fetch_videos_with_errors", fetch_videos_with_errors)
+
+    jobs = await scheduler.run_due_jobs(bind=db.get_bind())
+    assert len(jobs) == 5
+    assert sorted(sorted(batch) for batch in batches) == sorted(
+        [sorted(db_video.id for db_video in db_videos), [other_video.id]]
+    )
+
+    db.expire_all()
+    failed = await crud.job.get(id=f"refresh_video:{db_videos[0].id}", db=db)
+    assert failed.attempts == 1
+    assert failed.last_error == "yt-dlp error"
+    for db_video in db_videos[1:]:
+        job = await crud.job.get(id=f"refresh_video:{db_video.id}", db=db)
+        assert job.attempts == 0
+        assert job.started_at is None
+        assert job.due_at == now + datetime.timedelta(hours=6) - datetime.timedelta(
+            minutes=settings.media_url_refresh_margin_minutes
+        )
+    assert await crud.job.get_or_none(id="refresh_video:deleted", db=db) is None
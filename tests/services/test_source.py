@@ -0,0 +1,74 @@
+from typing import Any
+
+import asyncio
+import time
+from collections import Counter
+from unittest.mock import MagicMock
+
+from sqlmodel import Session
+
+from youtube_rss import crud, settings
+from youtube_rss.handlers import get_domain_from_url
+from youtube_rss.models.source import Source
+from youtube_rss.services.source import get_source_videos_from_source_info_dict, refresh_sources
+
+
+def make_source(url: str) -> Source:
+    return Source(url=url, name=url, created_by="ZbFPeSXW")
+
+
+async def test_refresh_sources_per_domain_concurrency(db: Session, monkeypatch: MagicMock) -> None:
+    sources = [make_source(url=f"https://www.youtube.com/c/channel{i}") for i in range(4)]
+    sources += [make_source(url=f"https://rumble.com/c/channel{i}") for i in range(2)]
+    sources_by_id = {source.id: source for source in sources}
+
+    running: Counter[str] = Counter()
+    max_running: Counter[str] = Counter()
+
+    async def mock_fetch_source(source_id: str, db: Session, **kwargs: Any) -> Source:
+        domain = get_domain_from_url(url=sources_by_id[source_id].url)
+        running[domain] += 1
+        max_running[domain] = max(max_running[domain], running[domain])
+        await asyncio.sleep(0.1)
+        running[domain] -= 1
+        return sources_by_id[source_id]
+
+    monkeypatch.setattr(crud.source, "fetch_source", mock_fetch_source)
+    monkeypatch.setattr(settings, "refresh_sources_max_concurrency", 8)
+    monkeypatch.setattr(settings, "refresh_sources_max_concurrency_per_domain", 2)
+
+    start = time.perf_counter()
+    refreshed = await refresh_sources(sources=sources, db=db)
+    elapsed = time.perf_counter() - start
+
+    assert sorted(source.id for source in refreshed) == sorted(sources_by_id)
+    assert max_running["youtube.com"] == 2
+    assert max_running["rumble.com"] == 2
+
+    # Bound by the slowest domain (2 rounds of youtube.com), not the sum of all sources.
+    assert elapsed < 0.35
+
+
+async def test_refresh_sources_skips_failed_sources(db: Session, monkeypatch: MagicMock) -> None:
+    sources = [make_source(url=f"https://rumble.com/c/channel{i}") for i in range(3)]
+    sources_by_id = {source.id: source for source in sources}
+    failing_id = sources[1].id
+
+    async def mock_fetch_source(source_id: str, db: Session, **kwargs: Any) -> Source:
+        if source_id == failing_id:
+            raise ValueError("yt-dlp error")
+        return sources_by_id[source_id]
+
+    monkeypatch.setattr(crud.source, "fetch_source", mock_fetch_source)
+
+    refreshed = await refresh_sources(sources=sources, db=db)
+    assert sorted(source.id for source in refreshed) == sorted([sources[0].id, sources[2].id])
+
+
+async def test_get_source_videos_from_source_info_dict_without_new_entries() -> None:
+    source_info_dict = {
+        "metadata": {"url": "https://rumble.com/c/channel"},
+        "source_id": "source_id",
+        "entries": [],
+    }
+    assert await get_source_videos_from_source_info_dict(source_info_dict=source_info_dict) == []
@@ -0,0 +1,65 @@
+from typing import Any
+
+import datetime
+from unittest.mock import MagicMock
+
+from sqlmodel import Session
+
+from youtube_rss.handlers.rumble import RumbleHandler
+from youtube_rss.handlers.youtube import YoutubeHandler
+from youtube_rss.models.video import Video
+from youtube_rss.services import videos as videos_service
+
+
+def test_get_media_url_expires_at() -> None:
+    expires_at = YoutubeHandler().get_media_url_expires_at(
+        media_url="https://rr1---sn-a5mekn7z.googlevideo.com/videoplayback?expire=1700000000&ei=x"
+    )
+    assert expires_at == datetime.datetime(2023, 11, 14, 22, 13, 20)
+
+    expires_at = YoutubeHandler().get_media_url_expires_at(
+        media_url="https://manifest.googlevideo.com/api/manifest/hls_playlist/expire/1700000000/ei/x"
+    )
+    assert expires_at == datetime.datetime(2023, 11, 14, 22, 13, 20)
+
+    # Fallback to the handler's MEDIA_URL_EXPIRY_INTERVAL
+    expires_at = RumbleHandler().get_media_url_expires_at(
+        media_url="https://sp.rmbl.ws/s8/2/a/b/c/d/abcd.caa.mp4"
+    )
+    expected = datetime.datetime.utcnow() + datetime.timedelta(
+        seconds=RumbleHandler.MEDIA_URL_EXPIRY_INTERVAL
+    )
+    assert abs(expires_at - expected) < datetime.timedelta(minutes=1)
+
+
+def make_video(i: int, media_url_expires_at: datetime.datetime | None) -> Video:
+    return Video(
+        url=f"https://rumble.com/v{i}.html",
+        source_id="source_id",
+        released_at=datetime.datetime.utcnow(),
+        media_url=f"https://sp.rmbl.ws/v{i}.mp4",
+        media_url_expires_at=media_url_expires_at,
+    )
+
+
+async def test_refresh_videos_before_media_url_expires(db: Session, monkeypatch: MagicMock) -> None:
+    now = datetime.datetime.utcnow()
+    expiring = make_video(i=1, media_url_expires_at=now + datetime.timedelta(minutes=10))
+    expired = make_video(i=2, media_url_expires_at=now - datetime.timedelta(minutes=10))
+    unknown = make_video(i=3, media_url_expires_at=None)
+    valid = make_video(i=4, media_url_expires_at=now + datetime.timedelta(days=365))
+    aware = make_video(
+        i=5,
+        media_url_expires_at=datetime.datetime.now(tz=datetime.timezone.utc)
+        + datetime.timedelta(hours=5),
+    )
+
+    async def mock_fetch_videos(videos: list[Video], **kwargs: Any) -> list[Video]:
+        return videos
+
+    monkeypatch.setattr(videos_service, "fetch_videos", mock_fetch_videos)
+
+    refreshed = await videos_service.refresh_videos(
+        videos=[valid, expiring, unknown, aware, expired], db=db, refresh_margin_minutes=60
+    )
+    assert refreshed == [unknown, expired, expiring]
@@ -0,0 +1,463 @@
+from typing import Any, Iterator
+
+import asyncio
+import json
+import os
+import pickle
+import re
+import threading
+import time
+import tracemalloc
+from unittest.mock import MagicMock
+
+import httpx
+import pytest
+from yt_dlp import YoutubeDL
+from yt_dlp.extractor.common import InfoExtractor
+from yt_dlp.utils import DateRange
+
+from youtube_rss import settings
+from youtube_rss.core.app import app
+from youtube_rss.core.logger import logger
+from youtube_rss.services import ytdlp
+
+
+def blocking_extract_info(url: str, *args: Any, **kwargs: Any) -> dict[str, Any]:
+    time.sleep(0.3)
+    return {"webpage_url": url}
+
+
+async def test_get_info_dict_runs_off_event_loop(monkeypatch: MagicMock) -> None:
+    monkeypatch.setattr(ytdlp, "extract_info", blocking_extract_info)
+
+    info_dict = await ytdlp.get_info_dict(url="https://www.youtube.com/watch?v=1", ydl_opts={})
+    assert info_dict["webpage_url"] == "https://www.youtube.com/watch?v=1"
+    assert info_dict["metadata"]["url"] == "https://www.youtube.com/watch?v=1"
+
+
+async def test_get_info_dict_concurrency_cap(monkeypatch: MagicMock) -> None:
+    running = 0
+    max_running = 0
+
+    def counting_extract_info(url: str, *args: Any, **kwargs: Any) -> dict[str, Any]:
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        time.sleep(0.05)
+        running -= 1
+        return {}
+
+    monkeypatch.setattr(ytdlp, "extract_info", counting_extract_info)
+
+    await asyncio.gather(
+        *[
+            ytdlp.get_info_dict(
+                url=f"https://rumble.com/v{i}",
+                ydl_opts={},
+                concurrency_key="test",
+                max_concurrency=2,
+            )
+            for i in range(8)
+        ]
+    )
+    assert max_running == 2
+
+
+async def test_feed_latency_during_extractions(monkeypatch: MagicMock) -> None:
+    release = threading.Event()
+
+    def held_extract_info(url: str, *args: Any, **kwargs: Any) -> dict[str, Any]:
+        release.wait(timeout=10)
+        return {"webpage_url": url}
+
+    monkeypatch.setattr(ytdlp, "extract_info", held_extract_info)
+
+    extractions = [
+        asyncio.create_task(
+            ytdlp.get_info_dict(url=f"https://www.youtube.com/watch?v={i}", ydl_opts={})
+        )
+        for i in range(20)
+    ]
+    await asyncio.sleep(0)
+
+    try:
+        async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+            for _ in range(5):
+                response = await client.get("/feed/non_existent_source")
+                assert response.status_code == 404
+
+        # Every feed request was served while all extractions were still held in the executor.
+        assert not any(extraction.done() for extraction in extractions)
+    finally:
+        release.set()
+    await asyncio.gather(*extractions)
+
+
+class FakeIE(InfoExtractor):
+    IE_NAME = "Fake"
+    _VALID_URL = r"fake://(?P<id>.+)"
+
+    def _real_extract(self, url: str) -> dict[str, Any]:
+        video_id = self._match_id(url)
+        return {
+            "id": video_id,
+            "title": f"Video {video_id}",
+            "url": f"https://example.com/{video_id}.mp4",
+            "ext": "mp4",
+        }
+
+
+YDL_OPTS: dict[str, Any] = {"quiet": True, "skip_download": True, "simulate": True}
+
+
+def test_ydl_pool_reuses_instances() -> None:
+    pool = ytdlp.YoutubeDLPool(max_idle_per_key=2, max_lifetime=60)
+
+    with pool.ydl(ydl_opts=YDL_OPTS, custom_extractors=[FakeIE]) as ydl:
+        first = ydl
+    with pool.ydl(ydl_opts=YDL_OPTS, custom_extractors=[FakeIE]) as ydl:
+        assert ydl is first
+    with pool.ydl(ydl_opts={**YDL_OPTS, "format": "worst"}, custom_extractors=[FakeIE]) as ydl:
+        assert ydl is not first
+
+
+def test_ydl_pool_discards_unhealthy_and_expired(monkeypatch: MagicMock) -> None:
+    pool = ytdlp.YoutubeDLPool(max_idle_per_key=2, max_lifetime=60)
+
+    with pytest.raises(ValueError):
+        with pool.ydl(ydl_opts=YDL_OPTS) as ydl:
+            failed = ydl
+            raise ValueError("extraction failed")
+    with pool.ydl(ydl_opts=YDL_OPTS) as ydl:
+        assert ydl is not failed
+        healthy = ydl
+
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 120)
+    with pool.ydl(ydl_opts=YDL_OPTS) as ydl:
+        assert ydl is not healthy
+
+
+def test_ydl_pool_benchmark() -> None:
+    iterations = 10
+
+    start = time.perf_counter()
+    for i in range(iterations):
+        with YoutubeDL(YDL_OPTS) as ydl:
+            ydl.add_info_extractor(FakeIE())
+            ydl.extract_info(f"fake://{i}", download=False, ie_key="Fake")
+    per_call_elapsed = time.perf_counter() - start
+
+    pool = ytdlp.YoutubeDLPool(max_idle_per_key=1, max_lifetime=60)
+    start = time.perf_counter()
+    for i in range(iterations):
+        with pool.ydl(ydl_opts=YDL_OPTS, custom_extractors=[FakeIE]) as ydl:
+            ydl.extract_info(f"fake://{i}", download=False, ie_key="Fake")
+    pooled_elapsed = time.perf_counter() - start
+
+    assert pooled_elapsed < per_call_elapsed
+
+
+SYNTHETIC_WEBPAGE = "".join(
+    f'<li class="video"><a href="/v{i}.html">Video {i}</a>'
+    f'<script>{json.dumps({"id": f"v{i}", "duration": i, "formats": list(range(20))})}</script>'
+    "</li>"
+    for i in range(1000)
+)
+
+
+class SyntheticIE(InfoExtractor):
+    IE_NAME = "Synthetic"
+    _VALID_URL = r"synthetic://(?P<id>.+)"
+
+    def _real_extract(self, url: str) -> dict[str, Any]:
+        video_id = self._match_id(url)
+        blobs = [
+            json.loads(blob) for blob in re.findall(r"<script>(.+?)</script>", SYNTHETIC_WEBPAGE)
+        ]
+        return {
+            "id": video_id,
+            "title": f"Video {video_id}",
+            "url": f"https://example.com/{video_id}.mp4",
+            "ext": "mp4",
+            "duration": sum(blob["duration"] for blob in blobs),
+            "worker": (os.getpid(), threading.get_ident()),
+            "_private": object(),
+        }
+
+
+async def extract_synthetic(count: int) -> list[dict[str, Any]]:
+    info_dicts: list[dict[str, Any]] = await asyncio.gather(
+        *[
+            ytdlp.get_info_dict(
+                url=f"synthetic://{i}",
+                ydl_opts={**YDL_OPTS, "logger": logger},
+                ie_key="Synthetic",
+                custom_extractors=[SyntheticIE],
+            )
+            for i in range(count)
+        ]
+    )
+    return info_dicts
+
+
+@pytest.mark.benchmark
+async def test_process_executor(monkeypatch: MagicMock) -> None:
+    count = 16
+    monkeypatch.setattr(settings, "ytdlp_max_workers", 4)
+
+    ytdlp.shutdown_executor()
+    monkeypatch.setattr(settings, "ytdlp_executor", "thread")
+    thread_info_dicts = await extract_synthetic(count=count)
+
+    ytdlp.shutdown_executor()
+    monkeypatch.setattr(settings, "ytdlp_executor", "process")
+    try:
+        process_info_dicts = await extract_synthetic(count=count)
+    finally:
+        ytdlp.shutdown_executor()
+
+    # Extractions run off the event loop, on at most `ytdlp_max_workers` workers.
+    thread_workers = {info_dict["worker"] for info_dict in thread_info_dicts}
+    assert 1 <= len(thread_workers) <= 4
+    assert (os.getpid(), threading.get_ident()) not in thread_workers
+    process_ids = {info_dict["worker"][0] for info_dict in process_info_dicts}
+    assert 1 <= len(process_ids) <= 4
+    assert os.getpid() not in process_ids
+
+    assert [info_dict["duration"] for info_dict in process_info_dicts] == [
+        info_dict["duration"] for info_dict in thread_info_dicts
+    ]
+
+    # Process results are trimmed and picklable
+    assert "_private" not in process_info_dicts[0]
+    assert "logger" not in process_info_dicts[0]["metadata"]["ydl_opts"]
+    assert process_info_dicts[0]["metadata"]["custom_extractors"] == ["SyntheticIE"]
+    pickle.dumps(process_info_dicts[0])
+
+
+def test_get_max_workers(monkeypatch: MagicMock) -> None:
+    monkeypatch.setattr(os, "cpu_count", lambda: 4)
+    monkeypatch.setattr(settings, "ytdlp_max_workers", 0)
+
+    monkeypatch.setattr(settings, "ytdlp_executor", "process")
+    assert ytdlp.get_max_workers() == 4
+    monkeypatch.setattr(settings, "ytdlp_executor", "thread")
+    assert ytdlp.get_max_workers() == 16
+
+    monkeypatch.setattr(settings, "ytdlp_max_workers", 3)
+    assert ytdlp.get_max_workers() == 3
+
+
+class FakePlaylistIE(InfoExtractor):
+    IE_NAME = "FakePlaylist"
+    _VALID_URL = r"fakeplaylist://(?P<id>.+)"
+    pages_requested = 0
+
+    def _entries(self) -> Iterator[dict[str, Any]]:
+        for page in range(10):
+            FakePlaylistIE.pages_requested += 1
+            for i in range(page * 5, page * 5 + 5):
+                yield self.url_result(f"https://example.com/v{i}", ie="Fake", video_id=f"v{i}")
+
+    def _real_extract(self, url: str) -> dict[str, Any]:
+        playlist: dict[str, Any] = self.playlist_result(
+            self._entries(), playlist_id=self._match_id(url)
+        )
+        return playlist
+
+
+def test_extract_info_stops_at_first_known_entry() -> None:
+    FakePlaylistIE.pages_requested = 0
+    ydl_opts = {**YDL_OPTS, "extract_flat": True, "playlistreverse": True, "playlistend": 20}
+
+    info_dict = ytdlp.extract_info(
+        url="fakeplaylist://channel",
+        ydl_opts=ydl_opts,
+        ie_key="FakePlaylist",
+        custom_extractors=[FakePlaylistIE],
+        known_video_ids={"v3", "v4", "v5"},
+        get_entry_video_id=lambda entry: str(entry["id"]),
+    )
+
+    assert [entry["id"] for entry in info_dict["entries"]] == ["v2", "v1", "v0"]
+    assert FakePlaylistIE.pages_requested == 1
+
+    # Without new entries
+    info_dict = ytdlp.extract_info(
+        url="fakeplaylist://channel",
+        ydl_opts=ydl_opts,
+        ie_key="FakePlaylist",
+        custom_extractors=[FakePlaylistIE],
+        known_video_ids={"v0"},
+        get_entry_video_id=lambda entry: str(entry["id"]),
+    )
+    assert info_dict["entries"] == []
+
+
+class FakeChannelIE(InfoExtractor):
+    IE_NAME = "FakeChannel"
+    _VALID_URL = r"fakechannel://(?P<id>.+)"
+
+    def _real_extract(self, url: str) -> dict[str, Any]:
+        # A channel url that redirects to its videos tab.
+        result: dict[str, Any] = self.url_result(
+            f"fakevideos://{self._match_id(url)}", ie="FakeVideos", url_transparent=True
+        )
+        result["title"] = "Channel title"
+        return result
+
+
+class FakeVideosIE(InfoExtractor):
+    IE_NAME = "FakeVideos"
+    _VALID_URL = r"fakevideos://(?P<id>.+)"
+
+    def _real_extract(self, url: str) -> dict[str, Any]:
+        entries = [
+            self.url_result(
+                f"https://example.com/v{i}",
+                ie="Fake",
+                video_id=f"v{i}",
+                upload_date=f"2023010{9 - i}",
+            )
+            for i in range(6)
+        ]
+        playlist: dict[str, Any] = self.playlist_result(
+            entries, playlist_id=self._match_id(url), playlist_title="Videos tab"
+        )
+        playlist["thumbnails"] = [
+            {"url": "https://example.com/large.jpg", "preference": 2},
+            {"url": "https://example.com/small.jpg", "preference": 0},
+            {"url": "https://example.com/medium.jpg", "preference": 1},
+        ]
+        return playlist
+
+
+def test_extract_info_incremental_matches_full_extraction() -> None:
+    ydl_opts = {**YDL_OPTS, "extract_flat": True, "daterange": DateRange(start="20230106")}
+    kwargs: dict[str, Any] = {
+        "url": "fakechannel://channel",
+        "ydl_opts": ydl_opts,
+        "ie_key": "FakeChannel",
+        "custom_extractors": [FakeChannelIE, FakeVideosIE],
+    }
+
+    full_info_dict = ytdlp.extract_info(**kwargs)
+    info_dict = ytdlp.extract_info(
+        **kwargs,
+        known_video_ids={"v5"},
+        get_entry_video_id=lambda entry: str(entry["id"]),
+    )
+
+    # The redirect is followed, keeping the fields of the channel page.
+    assert info_dict["_type"] == "playlist"
+    assert info_dict["title"] == full_info_dict["title"] == "Channel title"
+    # Thumbnails are sorted and sanitized as in a full extraction.
+    assert info_dict["thumbnails"] == full_info_dict["thumbnails"]
+    assert [thumbnail["url"] for thumbnail in info_dict["thumbnails"]][-1] == (
+        "https://example.com/large.jpg"
+    )
+    # Entries outside of the date range are filtered out.
+    assert [entry["id"] for entry in full_info_dict["entries"]] == ["v0", "v1", "v2", "v3"]
+    assert [entry["id"] for entry in info_dict["entries"]] == ["v0", "v1", "v2", "v3"]
+
+
+class FakeHeavyIE(InfoExtractor):
+    IE_NAME = "FakeHeavy"
+    _VALID_URL = r"fakeheavy://(?P<id>.+)"
+
+    def _real_extract(self, url: str) -> dict[str, Any]:
+        video_id = self._match_id(url)
+        return {
+            "id": video_id,
+            "title": f"Video {video_id}",
+            "description": "description " * 100,
+            "formats": [
+                {
+                    "format_id": str(i),
+                    "url": f"https://example.com/{video_id}/{i}.mp4?{'signature' * 50}",
+                    "ext": "mp4",
+                    "height": i,
+                    "filesize": i * 1024,
+                }
+                for i in range(1, 101)
+            ],
+            "thumbnails": [{"url": f"https://example.com/{video_id}/{i}.jpg"} for i in range(50)],
+            "automatic_captions": {
+                f"lang{i}": [{"url": f"https://example.com/{video_id}/{i}.vtt", "ext": "vtt"}]
+                for i in range(100)
+            },
+        }
+
+
+HEAVY_FIELDS = ["id", "title", "format_id", "formats"]
+
+
+def test_project_info_dict() -> None:
+    info_dict = ytdlp.extract_info(
+        url="fakeheavy://1",
+        ydl_opts={**YDL_OPTS, "format": "worst"},
+        ie_key="FakeHeavy",
+        custom_extractors=[FakeHeavyIE],
+        fields=HEAVY_FIELDS,
+    )
+    assert sorted(info_dict) == sorted(HEAVY_FIELDS)
+    assert info_dict["formats"] == [
+        {
+            "format_id": "1",
+            "url": f"https://example.com/1/1.mp4?{'signature' * 50}",
+            "ext": "mp4",
+            "filesize": 1024,
+        }
+    ]
+
+    # Playlist entries and nested playlists
+    playlist_info_dict = {
+        "title": "Channel",
+        "view_count": 1,
+        "entries": [
+            {"title": "Videos", "view_count": 1, "entries": [{"url": "v1", "view_count": 1}]},
+            {"url": "v2", "view_count": 1},
+        ],
+    }
+    assert ytdlp.project_info_dict(
+        info_dict=playlist_info_dict, fields=["title"], entry_fields=["url"]
+    ) == {
+        "title": "Channel",
+        "entries": [{"title": "Videos", "entries": [{"url": "v1"}]}, {"url": "v2"}],
+    }
+
+
+def get_retained_bytes(**kwargs: Any) -> tuple[int, int]:
+    ydl_opts = {**YDL_OPTS, "format": "worst"}
+    ytdlp.extract_info(
+        url="fakeheavy://warmup",
+        ydl_opts=ydl_opts,
+        ie_key="FakeHeavy",
+        custom_extractors=[FakeHeavyIE],
+    )
+
+    tracemalloc.start()
+    info_dicts = [
+        ytdlp.extract_info(
+            url=f"fakeheavy://{i}",
+            ydl_opts=ydl_opts,
+            ie_key="FakeHeavy",
+            custom_extractors=[FakeHeavyIE],
+            **kwargs,
+        )
+        for i in range(5)
+    ]
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert len(info_dicts) == 5
+    return current, peak
+
+
+@pytest.mark.benchmark
+def test_project_info_dict_memory() -> None:
+    full_current, full_peak = get_retained_bytes()
+    projected_current, projected_peak = get_retained_bytes(fields=HEAVY_FIELDS)
+
+    assert projected_current < full_current / 3
+    assert projected_peak < full_peak / 2
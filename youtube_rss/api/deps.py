@@ -1,10 +1,7 @@
-from collections.abc import Callable, Generator
-
-from sqlalchemy.orm import sessionmaker
-from sqlmodel import Session
+from collections.abc import AsyncGenerator, Callable
 
 from youtube_rss.core.auth import AuthHandler
-from youtube_rss.core.database import engine
+from youtube_rss.core.database import DBSession, get_engine, open_session
 
 
 def get_active_user_id() -> Callable[..., str]:
@@ -31,10 +28,13 @@ def authenticated_user() -> Callable[..., str]:
     return get_active_user_id()
 
 
-def get_db() -> Generator[Session, None, None]:
-    _session = sessionmaker(bind=engine, class_=Session, expire_on_commit=False)
-    session = _session()
-    try:
+async def get_db() -> AsyncGenerator[DBSession, None]:
+    """
+    Yields a database session for a request. The session is async (aiosqlite) if
+    `settings.database_async` is enabled, so queries do not block the event loop.
+
+    Yields:
+        DBSession: The database session.
+    """
+    async with open_session(bind=get_engine()) as session:
         yield session
-    finally:
-        session.close()
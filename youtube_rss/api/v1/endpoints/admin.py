@@ -0,0 +1,25 @@
+from typing import Any
+
+from fastapi import APIRouter, Depends, status
+
+from youtube_rss.api.deps import authenticated_user
+from youtube_rss.core.query_stats import get_query_stats_summary, reset_query_stats
+
+router = APIRouter()
+
+
+@router.get("/queries", status_code=status.HTTP_200_OK)
+async def get_query_stats(_: Any = Depends(authenticated_user())) -> dict[str, Any]:
+    """
+    Get the SQL statement counts and durations by request route and job kind, and
+    for the most recent requests and jobs, with their slowest statements.
+    """
+    return get_query_stats_summary()
+
+
+@router.delete("/queries", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_query_stats(_: Any = Depends(authenticated_user())) -> None:
+    """
+    Forget all recorded SQL statement stats.
+    """
+    reset_query_stats()
@@ -1,11 +1,11 @@
 from typing import Any
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session
 
 from youtube_rss import crud
 from youtube_rss.api.deps import get_active_user_id, get_db
 from youtube_rss.core.auth import AuthHandler
+from youtube_rss.core.database import DBSession
 from youtube_rss.models.user import UserCreate, UserDB, UserLogin, UserRead
 
 router = APIRouter()
@@ -19,13 +19,13 @@ auth_handler = AuthHandler()
     response_model=UserRead,
     summary="Create new user",
 )
-async def register(user_create: UserCreate, db: Session = Depends(get_db)) -> UserDB:
+async def register(user_create: UserCreate, db: DBSession = Depends(get_db)) -> UserDB:
     """
     Register a new user.
 
     Args:
         user_create (UserCreate): the user information for registration
-        db (Session): The database session.
+        db (DBSession): The database session.
 
     Returns:
         UserDB: an UserDB object
@@ -51,13 +51,13 @@ async def register(user_create: UserCreate, db: Session = Depends(get_db)) -> Us
 
 
 @router.post("/login", summary="Create access and refresh tokens for user")
-async def login(user_login: UserLogin, db: Session = Depends(get_db)) -> dict[str, str]:
+async def login(user_login: UserLogin, db: DBSession = Depends(get_db)) -> dict[str, str]:
     """
     Log in an existing user.
 
     Args:
         user_login (UserLogin): the user information for login
-        db (Session): The database session.
+        db (DBSession): The database session.
 
     Returns:
         dict: A dictionary containing the authentication token
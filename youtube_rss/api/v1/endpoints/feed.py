@@ -1,37 +1,40 @@
 from typing import Any
 
-from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from fastapi.responses import HTMLResponse
-from sqlmodel import Session
 
 from youtube_rss import crud
 from youtube_rss.api.deps import authenticated_user, get_db
-from youtube_rss.services.feed import build_rss_file, delete_rss_file, get_rss_file
+from youtube_rss.core.database import DBSession
+from youtube_rss.core.feed_response import get_feed_response
+from youtube_rss.services.feed import delete_rss_file, get_rss_feed
+from youtube_rss.services.feed_queue import feed_build_queue
 
 router = APIRouter()
 
 
 @router.get("/{source_id}", response_class=HTMLResponse)
-async def get_rss(source_id: str) -> Response:
+async def get_rss(source_id: str, request: Request) -> Response:
     """
-    Gets a rss file for source_id and returns it as a Response
+    Gets a rss file for source_id and returns it as a Response, or a 304 response if
+    the client's copy is current.
     """
     try:
-        rss_file = await get_rss_file(source_id=source_id)
+        feed = await get_rss_feed(source_id=source_id)
     except FileNotFoundError as exc:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=exc.args) from exc
 
     # Serve RSS File as a Response
-    content = rss_file.read_text()
-    return Response(content)
+    return get_feed_response(feed=feed, request_headers=request.headers)
 
 
 @router.put("/{source_id}", response_class=HTMLResponse)
 async def build_rss(
-    source_id: str, db: Session = Depends(get_db), _: Any = Depends(authenticated_user())
+    source_id: str, db: DBSession = Depends(get_db), _: Any = Depends(authenticated_user())
 ) -> Response:
     """
-    Builds a new rss file for source_id and returns it as a Response.
+    Builds a new rss file for source_id and returns it as a Response. The build is
+    not debounced, but is coalesced with any that is already queued for the source.
     """
     try:
         source = await crud.source.get(id=source_id, db=db)
@@ -39,7 +42,7 @@ async def build_rss(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=exc.args) from exc
 
     try:
-        rss_file = await build_rss_file(source=source)
+        rss_file = await feed_build_queue.build(source=source, db=db, debounce=False)
     except FileNotFoundError as exc:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=exc.args) from exc
 
@@ -50,7 +53,7 @@ async def build_rss(
 
 @router.delete("/{source_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_rss(
-    source_id: str, db: Session = Depends(get_db), _: Any = Depends(authenticated_user())
+    source_id: str, db: DBSession = Depends(get_db), _: Any = Depends(authenticated_user())
 ) -> None:
     """
     Deletes the .rss file for a feed.
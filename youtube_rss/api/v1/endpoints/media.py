@@ -1,39 +1,63 @@
+import asyncio
+
 from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.responses import RedirectResponse, Response
-from sqlmodel import Session
+from yt_dlp.utils import DownloadError, ExtractorError
 
-from youtube_rss import crud
+from youtube_rss import crud, settings
 from youtube_rss.api.deps import get_db
+from youtube_rss.core.database import DBSession
 from youtube_rss.core.logger import logger
 from youtube_rss.core.proxy import reverse_proxy
 from youtube_rss.handlers import get_handler_from_string
+from youtube_rss.services.videos import get_media_url_from_video_id
 
 router = APIRouter()
 
 
 @router.get("/{video_id}")
 @router.head("/{video_id}")
-async def handle_media(video_id: str, request: Request, db: Session = Depends(get_db)) -> Response:
+async def handle_media(
+    video_id: str, request: Request, db: DBSession = Depends(get_db)
+) -> Response:
     """
     Handles the repose for a media request by video_id.
-    Uses a reverse proxy if required by the handler.
+    Uses a reverse proxy if required by the handler. Archived videos are moved back
+    to the video table, and the video is marked as accessed, so it is not archived
+    while it is in use.
+
+    If the video has no media_url yet, waits up to `media_url_fetch_timeout_seconds`
+    for it to be fetched. Concurrent requests for the same video share one fetch.
     """
     try:
-        video = await crud.video.get(id=video_id, db=db)
+        video = await crud.video.get_or_none(id=video_id, db=db)
+        if video is None:
+            video = await crud.video_archive.promote(video_id=video_id, db=db)
+        await crud.video.mark_accessed(db=db, db_video=video)
+        media_url = await get_media_url_from_video_id(
+            video_id=video_id, db=db, timeout=settings.media_url_fetch_timeout_seconds
+        )
     except crud.RecordNotFoundError as e:
         logger.error(e)
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"The video_id '{video_id}' was not found.",
         ) from e
-
-    if video.media_url is None:
-        logger.error("The server has not yet retrieved a media_url from yt-dlp.")
+    except asyncio.TimeoutError as e:
+        logger.warning(f"Timed out fetching the media_url for video_id '{video_id}'.")
         raise HTTPException(
-            status_code=status.HTTP_202_ACCEPTED,
-            detail="The server has not yet retrieved a media_url from yt-dlp.",
-        )
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="The server is still retrieving the media_url from yt-dlp.",
+            headers={"Retry-After": str(settings.media_url_fetch_timeout_seconds)},
+        ) from e
+    except (ValueError, DownloadError, ExtractorError) as e:
+        logger.error(e)
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="The server was unable to retrieve a media_url from yt-dlp.",
+        ) from e
+
     handler = get_handler_from_string(handler_string=video.handler)
     if handler.USE_PROXY:
-        return await reverse_proxy(url=video.media_url, request=request)
-    return RedirectResponse(url=video.media_url)
+        return await reverse_proxy(url=media_url, request=request)
+    return RedirectResponse(url=media_url)
@@ -1,11 +1,11 @@
 from typing import Any
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 
-from youtube_rss import crud
+from youtube_rss import crud, settings
 from youtube_rss.api.deps import authenticated_user, get_active_user_id, get_db
-from youtube_rss.models.source import Source, SourceCreate, SourceRead
+from youtube_rss.core.database import DBSession
+from youtube_rss.models.source import Source, SourceCreate, SourcePage, SourceRead
 
 ModelClass = Source
 ModelReadClass = SourceRead
@@ -17,7 +17,7 @@ router = APIRouter()
 @router.post("/", response_model=ModelReadClass, status_code=status.HTTP_201_CREATED)
 async def create(
     in_obj: ModelCreateClass,
-    db: Session = Depends(get_db),
+    db: DBSession = Depends(get_db),
     user_id: str = Depends(get_active_user_id()),
 ) -> ModelClass:
     """
@@ -31,7 +31,7 @@ async def create(
 
 @router.get("/{id}", response_model=ModelReadClass)
 async def get(
-    id: str, db: Session = Depends(get_db), _: Any = Depends(authenticated_user())
+    id: str, db: DBSession = Depends(get_db), _: Any = Depends(authenticated_user())
 ) -> ModelClass | None:
     """
     Get an item.
@@ -44,21 +44,33 @@ async def get(
         ) from exc
 
 
-@router.get("/", response_model=list[ModelReadClass], status_code=status.HTTP_200_OK)
+@router.get("/", response_model=SourcePage, status_code=status.HTTP_200_OK)
 async def get_all(
-    db: Session = Depends(get_db), _: Any = Depends(authenticated_user())
-) -> list[ModelClass] | None:
+    handler: str | None = None,
+    limit: int = Query(default=settings.api_page_size, ge=1, le=settings.api_page_size_max),
+    cursor: str | None = None,
+    db: DBSession = Depends(get_db),
+    _: Any = Depends(authenticated_user()),
+) -> SourcePage:
     """
-    Get all items.
+    Get a page of items, ordered by `updated_at`. Pass the `next_cursor` of a page as
+    the `cursor` to get the next page.
     """
-    return await crud.source.get_all(db=db)
+    filter_by = {"handler": handler} if handler is not None else {}
+    try:
+        sources, next_cursor = await crud.source.get_page(
+            db=db, limit=limit, cursor=cursor, **filter_by
+        )
+    except crud.InvalidCursorError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=exc.args) from exc
+    return SourcePage(items=sources, next_cursor=next_cursor)
 
 
 @router.patch("/{id}", response_model=ModelReadClass)
 async def update(
     id: str,
     in_obj: ModelCreateClass,
-    db: Session = Depends(get_db),
+    db: DBSession = Depends(get_db),
     _: Any = Depends(authenticated_user()),
 ) -> ModelClass:
     """
@@ -74,7 +86,7 @@ async def update(
 
 @router.delete("/{id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete(
-    id: str, db: Session = Depends(get_db), _: Any = Depends(authenticated_user())
+    id: str, db: DBSession = Depends(get_db), _: Any = Depends(authenticated_user())
 ) -> None:
     """
     Delete an item.
@@ -89,14 +101,14 @@ async def delete(
 
 @router.put("/{source_id}/fetch", response_model=SourceRead)
 async def fetch_source(
-    source_id: str, db: Session = Depends(get_db), _: Any = Depends(authenticated_user())
+    source_id: str, db: DBSession = Depends(get_db), _: Any = Depends(authenticated_user())
 ) -> Source:
     """
     Fetches new data from yt-dlp and updates a source on the server.
 
     Args:
         source_id: The ID of the source to update.
-        db(Session): The database session
+        db(DBSession): The database session
 
     Returns:
         The updated source.
@@ -105,7 +117,7 @@ async def fetch_source(
         HTTPException: If the source was not found.
     """
     try:
-        return await crud.source.fetch_source(source_id=source_id, db=db)
+        return await crud.source.fetch_source(source_id=source_id, db=db, use_cache=False)
     except crud.RecordNotFoundError as exc:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Source Not Found"
@@ -114,7 +126,7 @@ async def fetch_source(
 
 @router.put("/fetch", response_model=list[ModelReadClass], status_code=status.HTTP_200_OK)
 async def fetch_all(
-    db: Session = Depends(get_db), _: Any = Depends(authenticated_user())
+    db: DBSession = Depends(get_db), _: Any = Depends(authenticated_user())
 ) -> list[ModelClass] | None:
     """
     Fetch all sources.
@@ -1,11 +1,16 @@
 from typing import Any
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session
+import datetime
 
-from youtube_rss import crud
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.sql.elements import ColumnElement
+from sqlmodel import col
+
+from youtube_rss import crud, settings
 from youtube_rss.api.deps import authenticated_user, get_db
-from youtube_rss.models.video import Video, VideoCreate, VideoRead
+from youtube_rss.core.database import DBSession
+from youtube_rss.models.video import Video, VideoCreate, VideoPage, VideoRead
+from youtube_rss.services.feed_queue import feed_build_queue
 
 ModelClass = Video
 ModelReadClass = VideoRead
@@ -17,7 +22,7 @@ router = APIRouter()
 @router.post("/", response_model=ModelReadClass, status_code=status.HTTP_201_CREATED)
 async def create(
     in_obj: ModelCreateClass,
-    db: Session = Depends(get_db),
+    db: DBSession = Depends(get_db),
     _: Any = Depends(authenticated_user()),
 ) -> ModelClass:
     """
@@ -33,7 +38,7 @@ async def create(
 
 @router.get("/{id}", response_model=ModelReadClass)
 async def get(
-    id: str, db: Session = Depends(get_db), _: Any = Depends(authenticated_user())
+    id: str, db: DBSession = Depends(get_db), _: Any = Depends(authenticated_user())
 ) -> ModelClass | None:
     """
     Get an item.
@@ -46,21 +51,49 @@ async def get(
         ) from exc
 
 
-@router.get("/", response_model=list[ModelReadClass], status_code=status.HTTP_200_OK)
+@router.get("/", response_model=VideoPage, status_code=status.HTTP_200_OK)
 async def get_all(
-    db: Session = Depends(get_db), _: Any = Depends(authenticated_user())
-) -> list[ModelClass] | None:
+    source_id: str | None = None,
+    handler: str | None = None,
+    released_after: datetime.datetime | None = None,
+    released_before: datetime.datetime | None = None,
+    missing_media_url: bool | None = None,
+    limit: int = Query(default=settings.api_page_size, ge=1, le=settings.api_page_size_max),
+    cursor: str | None = None,
+    db: DBSession = Depends(get_db),
+    _: Any = Depends(authenticated_user()),
+) -> VideoPage:
     """
-    Get all items.
+    Get a page of items, ordered by `updated_at`. Pass the `next_cursor` of a page as
+    the `cursor` to get the next page.
     """
-    return await crud.video.get_all(db=db)
+    filters: list[ColumnElement[Any]] = []
+    if released_after is not None:
+        filters.append(col(Video.released_at) >= released_after)
+    if released_before is not None:
+        filters.append(col(Video.released_at) < released_before)
+    if missing_media_url is not None:
+        media_url = col(Video.media_url)
+        filters.append(media_url.is_(None) if missing_media_url else media_url.is_not(None))
+    filter_by = {
+        key: value
+        for key, value in {"source_id": source_id, "handler": handler}.items()
+        if value is not None
+    }
+    try:
+        videos, next_cursor = await crud.video.get_page(
+            *filters, db=db, limit=limit, cursor=cursor, **filter_by
+        )
+    except crud.InvalidCursorError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=exc.args) from exc
+    return VideoPage(items=videos, next_cursor=next_cursor)
 
 
 @router.patch("/{id}", response_model=ModelReadClass)
 async def update(
     id: str,
     in_obj: ModelCreateClass,
-    db: Session = Depends(get_db),
+    db: DBSession = Depends(get_db),
     _: Any = Depends(authenticated_user()),
 ) -> ModelClass:
     """
@@ -76,7 +109,7 @@ async def update(
 
 @router.delete("/{id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete(
-    id: str, db: Session = Depends(get_db), _: Any = Depends(authenticated_user())
+    id: str, db: DBSession = Depends(get_db), _: Any = Depends(authenticated_user())
 ) -> None:
     """
     Delete an item.
@@ -91,14 +124,15 @@ async def delete(
 
 @router.put("/{id}/fetch", response_model=VideoRead)
 async def fetch_video(
-    id: str, db: Session = Depends(get_db), _: Any = Depends(authenticated_user())
+    id: str, db: DBSession = Depends(get_db), _: Any = Depends(authenticated_user())
 ) -> Video:
     """
-    Fetches new data from yt-dlp and updates a video on the server.
+    Fetches new data from yt-dlp and updates a video on the server, then queues a
+    rebuild of its source's feed.
 
     Args:
         id: The ID of the video to update.
-        db (Session): The database session.
+        db (DBSession): The database session.
 
     Returns:
         The updated video.
@@ -107,16 +141,19 @@ async def fetch_video(
         HTTPException: If the video was not found.
     """
     try:
-        return await crud.video.fetch_video(video_id=id, db=db)
+        video = await crud.video.fetch_video(video_id=id, db=db, use_cache=False)
     except crud.RecordNotFoundError as exc:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Video Not Found"
         ) from exc
+    if feed_build_queue.running:
+        feed_build_queue.mark_dirty(source_id=video.source_id)
+    return video
 
 
 @router.put("/fetch", response_model=list[ModelReadClass], status_code=status.HTTP_200_OK)
 async def fetch_all(
-    db: Session = Depends(get_db), _: Any = Depends(authenticated_user())
+    db: DBSession = Depends(get_db), _: Any = Depends(authenticated_user())
 ) -> list[ModelClass] | None:
     """
     Fetch all Videos.
@@ -1,18 +1,17 @@
-from fastapi import Depends, FastAPI
-from fastapi.staticfiles import StaticFiles
-from fastapi_utils.tasks import repeat_every
-from sqlmodel import Session
+from fastapi import FastAPI
 
 from youtube_rss import settings, version
-from youtube_rss.api.deps import get_db
 from youtube_rss.api.v1.router import api_router
-from youtube_rss.core.database import create_db_and_tables
+from youtube_rss.core.database import create_db_and_tables, get_engine
+from youtube_rss.core.feed_response import FeedStaticFiles
 from youtube_rss.core.logger import logger
 from youtube_rss.core.notify import notify
+from youtube_rss.core.query_stats import QueryStatsMiddleware
 from youtube_rss.models.server import HealthCheck
 from youtube_rss.paths import DATABASE_FILE, FEEDS_PATH
-from youtube_rss.services.source import refresh_all_sources
-from youtube_rss.services.videos import refresh_all_videos
+from youtube_rss.services.feed_queue import feed_build_queue
+from youtube_rss.services.scheduler import start_scheduler, stop_scheduler
+from youtube_rss.services.ytdlp import shutdown_executor
 from youtube_rss.views.router import views_router
 
 # Initialize FastAPI App
@@ -24,9 +23,10 @@ app = FastAPI(
 )
 app.include_router(api_router)
 app.include_router(views_router)
+app.add_middleware(QueryStatsMiddleware)
 
 FEEDS_PATH.mkdir(parents=True, exist_ok=True)
-app.mount("/feed", StaticFiles(directory=FEEDS_PATH), name="feed")
+app.mount("/feed", FeedStaticFiles(directory=FEEDS_PATH), name="feed")
 
 
 @app.on_event("startup")  # type: ignore
@@ -34,6 +34,8 @@ async def on_startup() -> None:
     """
     On Startup:
         - create database and tables.
+        - start the refresh scheduler.
+        - start the feed build queue.
     """
     logger.info("--- Start FastAPI ---")
     logger.debug("Starting FastAPI App...")
@@ -43,27 +45,25 @@ async def on_startup() -> None:
     if not DATABASE_FILE.exists():
         await create_db_and_tables()
 
+    if settings.scheduler_enabled:
+        start_scheduler(bind=get_engine())
 
-@app.on_event("startup")  # type: ignore
-@repeat_every(seconds=settings.refresh_sources_interval_minutes * 60, wait_first=True)
-async def repeating_refresh_sources(db: Session = Depends(get_db)) -> None:
-    """
-    Fetches new data from yt-dlp for all Videos that meet criteria.
-    """
-    logger.debug("Refreshing Sources...")
-    refreshed_videos = await refresh_all_sources(db=db)
-    logger.success(f"Completed refreshing {len(refreshed_videos)} Sources from yt-dlp.")
+    if settings.feed_build_queue_enabled:
+        feed_build_queue.start(bind=get_engine())
 
 
-@app.on_event("startup")  # type: ignore
-@repeat_every(seconds=settings.refresh_videos_interval_minutes * 60, wait_first=True)
-async def repeating_refresh_videos(db: Session = Depends(get_db)) -> None:
+@app.on_event("shutdown")  # type: ignore
+async def on_shutdown() -> None:
     """
-    Fetches new data from yt-dlp for all Videos that meet criteria.
+    On Shutdown:
+        - stop the refresh scheduler.
+        - stop the feed build queue.
+        - shut down the yt-dlp extraction executor.
     """
-    logger.debug("Refreshing Videos...")
-    refreshed_videos = await refresh_all_videos(older_than_hours=8, db=db)
-    logger.success(f"Completed refreshing {len(refreshed_videos)} Videos from yt-dlp.")
+    logger.debug("Shutting down FastAPI App...")
+    await stop_scheduler()
+    await feed_build_queue.stop()
+    shutdown_executor()
 
 
 @app.get("/", response_model=HealthCheck, tags=["status"])
@@ -1,16 +1,473 @@
-from sqlmodel import SQLModel, create_engine
+from typing import Any, AsyncIterator, TypeVar, cast
+
+import asyncio
+from contextlib import asynccontextmanager
+from functools import partial
+from pathlib import Path
+from weakref import WeakKeyDictionary
+
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, Engine, Result
+from sqlalchemy.exc import TimeoutError as SQLAlchemyTimeoutError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, create_async_engine
+from sqlalchemy.orm import ORMExecuteState, SessionTransaction
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.sql import Executable, Select
+from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.engine.result import ScalarResult
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from youtube_rss import settings
 from youtube_rss.core.logger import logger
 from youtube_rss.paths import DATABASE_FILE
 
-engine = create_engine(
-    f"sqlite:///{DATABASE_FILE}",
-    echo=settings.database_echo,
-    connect_args={"check_same_thread": False},
+_T = TypeVar("_T")
+
+# A database session or engine. Async sessions are used if `settings.database_async`.
+DBSession = Session | AsyncSession
+DBBind = Engine | Connection | AsyncEngine | AsyncConnection
+
+
+def get_sqlite_pragmas() -> dict[str, Any]:
+    """
+    Get the pragmas to set on every SQLite connection.
+    """
+    return {
+        "busy_timeout": settings.database_busy_timeout_ms,
+        "synchronous": "NORMAL",  # Safe with WAL journaling
+        "mmap_size": settings.database_mmap_size_mb * 1024 * 1024,
+        "cache_size": -settings.database_cache_size_mb * 1024,  # Negative is KiB
+        "foreign_keys": "ON",  # Off by default. Needed for `ON DELETE CASCADE`
+    }
+
+
+def set_sqlite_pragmas(dbapi_connection: Any, _: Any, pragmas: dict[str, Any]) -> None:
+    """
+    Set pragmas on a new SQLite connection. Used as an engine "connect" event listener.
+    """
+    cursor = dbapi_connection.cursor()
+    for name, value in pragmas.items():
+        cursor.execute(f"PRAGMA {name} = {value}")
+    cursor.close()
+
+
+def create_write_engine(database_file: Path, **kwargs: Any) -> Engine:
+    """
+    Create the engine that all writes go through. It has a single connection, so
+    writers queue for it rather than fail with `database is locked`. The database
+    uses WAL journaling, so the writer does not block readers.
+
+    Waiting for the connection blocks the thread. Sessions opened with `open_session`
+    first wait for the write lock of their event loop (see `ReadWriteRouter`), so only
+    writers on other threads ever wait for the connection itself.
+
+    Args:
+        database_file: The SQLite database file.
+        kwargs: Extra arguments for `create_engine`.
+
+    Returns:
+        The engine.
+    """
+    write_engine = create_engine(
+        f"sqlite:///{database_file}",
+        connect_args={"check_same_thread": False},
+        poolclass=QueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=settings.database_busy_timeout_ms / 1000,
+        **kwargs,
+    )
+    event.listen(
+        write_engine,
+        "connect",
+        partial(set_sqlite_pragmas, pragmas={"journal_mode": "WAL", **get_sqlite_pragmas()}),
+    )
+    return write_engine
+
+
+def create_read_engine(database_file: Path, **kwargs: Any) -> Engine:
+    """
+    Create the engine for reads, with a pool of `database_read_pool_size` read-only
+    connections.
+
+    Args:
+        database_file: The SQLite database file.
+        kwargs: Extra arguments for `create_engine`.
+
+    Returns:
+        The engine.
+    """
+    read_engine = create_engine(
+        f"sqlite:///{database_file}",
+        connect_args={"check_same_thread": False},
+        poolclass=QueuePool,
+        pool_size=settings.database_read_pool_size,
+        max_overflow=-1,
+        **kwargs,
+    )
+    event.listen(
+        read_engine,
+        "connect",
+        partial(set_sqlite_pragmas, pragmas={"query_only": "ON", **get_sqlite_pragmas()}),
+    )
+    return read_engine
+
+
+def create_async_write_engine(database_file: Path, **kwargs: Any) -> AsyncEngine:
+    """
+    Create the async (aiosqlite) engine that all async writes go through. Write
+    transactions are serialized with the write lock of the event loop (see
+    `ReadWriteRouter`), so they queue rather than fail with `database is locked`.
+
+    Args:
+        database_file: The SQLite database file.
+        kwargs: Extra arguments for `create_async_engine`.
+
+    Returns:
+        The engine.
+    """
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{database_file}", **kwargs)
+    event.listen(
+        async_engine.sync_engine,
+        "connect",
+        partial(set_sqlite_pragmas, pragmas={"journal_mode": "WAL", **get_sqlite_pragmas()}),
+    )
+    return async_engine
+
+
+def create_async_read_engine(database_file: Path, **kwargs: Any) -> AsyncEngine:
+    """
+    Create the async (aiosqlite) engine for reads, with read-only connections.
+
+    Args:
+        database_file: The SQLite database file.
+        kwargs: Extra arguments for `create_async_engine`.
+
+    Returns:
+        The engine.
+    """
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{database_file}", **kwargs)
+    event.listen(
+        async_engine.sync_engine,
+        "connect",
+        partial(set_sqlite_pragmas, pragmas={"query_only": "ON", **get_sqlite_pragmas()}),
+    )
+    return async_engine
+
+
+engine = create_write_engine(database_file=DATABASE_FILE, echo=settings.database_echo)
+read_engine = create_read_engine(database_file=DATABASE_FILE, echo=settings.database_echo)
+
+_async_engine: AsyncEngine | None = None
+_async_read_engine: AsyncEngine | None = None
+
+# The write lock of each event loop, by writer engine.
+_write_locks: "WeakKeyDictionary[asyncio.AbstractEventLoop, dict[Engine, asyncio.Lock]]" = (
+    WeakKeyDictionary()
 )
 
 
+def get_write_lock(write_bind: Engine) -> asyncio.Lock:
+    """
+    Get the lock that serializes the write transactions on `write_bind` of the running
+    event loop.
+    """
+    locks = _write_locks.setdefault(asyncio.get_running_loop(), {})
+    if write_bind not in locks:
+        locks[write_bind] = asyncio.Lock()
+    return locks[write_bind]
+
+
+class ReadWriteRouter:
+    """
+    Routes the statements of a session: ORM `SELECT`s run on a read-only connection,
+    and everything else on the session's bind, the writer. Once a transaction has
+    written, it also reads from the writer until it ends, so it sees its own changes.
+
+    Write transactions are serialized with the write lock of the event loop, which the
+    `db_*` helpers wait for before anything that may write. It is held until the
+    transaction ends, so a session that awaits while it holds the writer makes the
+    other writers wait, without blocking the event loop.
+    """
+
+    def __init__(self, session: Session, read_bind: Engine) -> None:
+        """
+        Initialize the ReadWriteRouter object, and route the statements of `session`.
+
+        Args:
+            session: The session, or the `sync_session` of an async session.
+            read_bind: The engine for reads.
+        """
+        self.read_bind = read_bind
+        self.writing = False
+        self._write_lock: asyncio.Lock | None = None
+        session.info["router"] = self
+        event.listen(session, "do_orm_execute", self._route_reads)
+        event.listen(session, "after_begin", self._after_begin)
+        event.listen(session, "after_transaction_end", self._after_transaction_end)
+
+    async def acquire_writer(self, write_bind: Engine) -> None:
+        """
+        Wait for the write lock, at most `database_busy_timeout_ms`.
+
+        Raises:
+            sqlalchemy.exc.TimeoutError: If the lock was not acquired in time.
+        """
+        if self._write_lock is not None:
+            return
+        lock = get_write_lock(write_bind=write_bind)
+        try:
+            await asyncio.wait_for(lock.acquire(), timeout=settings.database_busy_timeout_ms / 1000)
+        except asyncio.TimeoutError as e:
+            raise SQLAlchemyTimeoutError("Timed out waiting for the database writer.") from e
+        self._write_lock = lock
+
+    def release_writer(self) -> None:
+        """
+        Release the write lock, if held.
+        """
+        if self._write_lock is not None:
+            self._write_lock.release()
+            self._write_lock = None
+
+    def _route_reads(self, orm_execute_state: ORMExecuteState) -> None:
+        if orm_execute_state.is_select and not self.writing:
+            # The same dict is passed to `get_bind`, which returns an explicit `bind`.
+            cast(dict[str, Any], orm_execute_state.bind_arguments)["bind"] = self.read_bind
+
+    def _after_begin(self, _: Session, __: SessionTransaction, connection: Connection) -> None:
+        if connection.engine is not self.read_bind:
+            self.writing = True
+
+    def _after_transaction_end(self, _: Session, transaction: SessionTransaction) -> None:
+        # Savepoints and subtransactions have a parent, the transaction they are part of.
+        if cast(SessionTransaction | None, transaction.parent) is None:
+            self.writing = False
+            self.release_writer()
+
+
+class RoutingSession(Session):
+    """
+    A session that reads from `read_bind`, and writes to its bind. See
+    `ReadWriteRouter`.
+    """
+
+    def __init__(self, read_bind: Engine, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.router = ReadWriteRouter(session=self, read_bind=read_bind)
+
+    @property
+    def read_bind(self) -> Engine:
+        return self.router.read_bind
+
+    def close(self) -> None:
+        try:
+            super().close()
+        finally:
+            self.router.release_writer()
+
+
+def get_async_engine() -> AsyncEngine:
+    """
+    Get the async (aiosqlite) engine. It is only created when first used, as
+    aiosqlite is only required if `settings.database_async` is enabled.
+    """
+    global _async_engine  # pylint: disable=global-statement
+    if _async_engine is None:
+        _async_engine = create_async_write_engine(
+            database_file=DATABASE_FILE, echo=settings.database_echo
+        )
+    return _async_engine
+
+
+def get_async_read_engine() -> AsyncEngine:
+    """
+    Get the async (aiosqlite) engine for reads. It is only created when first used.
+    """
+    global _async_read_engine  # pylint: disable=global-statement
+    if _async_read_engine is None:
+        _async_read_engine = create_async_read_engine(
+            database_file=DATABASE_FILE, echo=settings.database_echo
+        )
+    return _async_read_engine
+
+
+def get_engine() -> Engine | AsyncEngine:
+    """
+    Get the engine to use for new sessions: async if `settings.database_async`.
+    """
+    return get_async_engine() if settings.database_async else engine
+
+
+def get_bind(db: DBSession) -> DBBind:
+    """
+    Get the engine or connection a session is bound to, to open new sessions on it.
+    """
+    if isinstance(db, (AsyncSession, RoutingSession)):
+        bind: DBBind | None = db.bind
+        if bind is None:
+            raise ValueError("The session is not bound to an engine or connection.")
+        return bind
+    return db.get_bind()
+
+
+@asynccontextmanager
+async def open_session(bind: DBBind) -> AsyncIterator[DBSession]:
+    """
+    Open a new session on an engine or connection. The session is async if the
+    bind is async. Sessions on the default engines read from the read engines, see
+    `ReadWriteRouter`. Objects are not expired on commit.
+
+    Args:
+        bind: The engine or connection.
+
+    Yields:
+        The session.
+    """
+    if isinstance(bind, (AsyncEngine, AsyncConnection)):
+        async with AsyncSession(bind=bind, expire_on_commit=False) as async_session:
+            if bind is _async_engine:
+                router = ReadWriteRouter(
+                    session=async_session.sync_session,
+                    read_bind=get_async_read_engine().sync_engine,
+                )
+            try:
+                yield async_session
+            finally:
+                if bind is _async_engine:
+                    router.release_writer()
+    elif bind is engine:
+        with RoutingSession(
+            read_bind=read_engine, bind=bind, expire_on_commit=False
+        ) as routing_session:
+            yield routing_session
+    else:
+        with Session(bind=bind, expire_on_commit=False) as session:
+            yield session
+
+
+@asynccontextmanager
+async def hold_writer_if_writing(db: DBSession, statement: Any = None) -> AsyncIterator[None]:
+    """
+    Wait for the write lock of a routed session before running something that may
+    write: a statement that is not a `SELECT`, or a flush of pending changes. The lock
+    is released right after, unless the transaction wrote, in which case it is held
+    until the transaction ends.
+
+    Args:
+        db (DBSession): The database session.
+        statement: The statement to run, if any.
+    """
+    sync_session = db.sync_session if isinstance(db, AsyncSession) else db
+    router: ReadWriteRouter | None = sync_session.info.get("router")
+    if router is not None and (
+        router.writing
+        or (statement is not None and not isinstance(statement, Select))
+        or sync_session.new
+        or sync_session.dirty
+        or sync_session.deleted
+    ):
+        write_bind = sync_session.bind
+        assert isinstance(write_bind, Engine)
+        await router.acquire_writer(write_bind=write_bind)
+    try:
+        yield
+    finally:
+        if router is not None and not router.writing:
+            router.release_writer()
+
+
+async def db_exec(db: DBSession, statement: Any) -> ScalarResult[Any]:
+    """
+    Execute a SQLModel `select` statement, without blocking the event loop if the
+    session is async.
+    """
+    result: ScalarResult[Any]
+    async with hold_writer_if_writing(db, statement=statement):
+        if isinstance(db, AsyncSession):
+            result = await db.exec(statement)
+        else:
+            result = db.exec(statement)
+    return result
+
+
+async def db_execute(db: DBSession, statement: Executable, params: Any = None) -> Result:
+    """
+    Execute a SQLAlchemy core statement, without blocking the event loop if the
+    session is async.
+    """
+    async with hold_writer_if_writing(db, statement=statement):
+        if isinstance(db, AsyncSession):
+            return await db.execute(statement, params)
+        return db.execute(statement, params)
+
+
+async def db_commit(db: DBSession) -> None:
+    """
+    Commit the session's transaction.
+    """
+    async with hold_writer_if_writing(db):
+        if isinstance(db, AsyncSession):
+            await db.commit()
+        else:
+            db.commit()
+
+
+async def db_rollback(db: DBSession) -> None:
+    """
+    Roll back the session's transaction.
+    """
+    if isinstance(db, AsyncSession):
+        await db.rollback()
+    else:
+        db.rollback()
+
+
+async def db_refresh(db: DBSession, obj: Any, attribute_names: list[str] | None = None) -> None:
+    """
+    Reload an object's attributes from the database.
+    """
+    async with hold_writer_if_writing(db):
+        if isinstance(db, AsyncSession):
+            await db.refresh(obj, attribute_names=attribute_names)
+        else:
+            db.refresh(obj, attribute_names=attribute_names)
+
+
+async def db_delete(db: DBSession, obj: Any) -> None:
+    """
+    Mark an object as deleted.
+    """
+    async with hold_writer_if_writing(db):
+        if isinstance(db, AsyncSession):
+            await db.delete(obj)
+        else:
+            db.delete(obj)
+
+
+async def load_relationships(db: DBSession, obj: _T, attribute_names: list[str]) -> _T:
+    """
+    Make sure an object's relationships are loaded before they are accessed.
+
+    Sync sessions load relationships lazily when accessed. Async sessions can not,
+    so the relationships are loaded here in the session's greenlet, unless already loaded.
+
+    Args:
+        db: The database session.
+        obj: The object.
+        attribute_names: The names of the relationships to load.
+
+    Returns:
+        The object.
+    """
+    if isinstance(db, AsyncSession):
+        unloaded = [name for name in attribute_names if name not in obj.__dict__]
+        if unloaded:
+            async with hold_writer_if_writing(db):
+                await db.run_sync(lambda _: [getattr(obj, name) for name in unloaded])
+    return obj
+
+
 async def create_db_and_tables() -> None:
     """Creates all SQLModel databases if not already created."""
     logger.debug("Initializing database...")
@@ -1,5 +1,6 @@
 from typing import Any, Callable
 
+import asyncio
 import functools
 import time
 
@@ -38,7 +39,7 @@ def log_function_enter_exit(  # type: ignore
 
 # type: ignore
 def timeit(func: Callable[..., Any]) -> Callable[..., Any]:
-    """Decorator for logging the execution time of a function.
+    """Decorator for logging the execution time of a function or coroutine function.
 
     Args:
         func: The function to be decorated.
@@ -47,6 +48,18 @@ def timeit(func: Callable[..., Any]) -> Callable[..., Any]:
         The decorated function.
     """
 
+    if asyncio.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def async_wrapped(*args: Any, **kwargs: Any) -> Any:
+            start = time.time()
+            result = await func(*args, **kwargs)
+            end = time.time()
+            logger.debug("Function '{}' executed in {:f} s", func.__name__, end - start)
+            return result
+
+        return async_wrapped
+
     @functools.wraps(func)
     def wrapped(*args: Any, **kwargs: Any) -> Any:
         start = time.time()
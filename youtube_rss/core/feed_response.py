@@ -0,0 +1,114 @@
+import os
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.types import Scope
+
+from youtube_rss.services.cache import CachedFeed, feed_cache
+
+
+def get_accepted_encodings(accept_encoding: str) -> dict[str, float]:
+    """
+    Parses an `Accept-Encoding` header into the quality of each content-coding.
+    """
+    accepted_encodings = {}
+    for item in accept_encoding.split(","):
+        encoding, *params = [part.strip() for part in item.split(";")]
+        if not encoding:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted_encodings[encoding.lower()] = quality
+    return accepted_encodings
+
+
+def select_encoding(feed: CachedFeed, request_headers: Headers) -> str | None:
+    """
+    Returns the content-coding of the precompressed variant of a feed to serve, or None
+    to serve it uncompressed.
+    """
+    accepted_encodings = get_accepted_encodings(request_headers.get("accept-encoding", ""))
+    wildcard_quality = accepted_encodings.get("*", 0.0)
+    best_encoding, best_quality = None, 0.0
+    # In order of preference, so the first of equal quality is picked.
+    for encoding in feed.encoded_content:
+        quality = accepted_encodings.get(encoding, wildcard_quality)
+        if quality > best_quality:
+            best_encoding, best_quality = encoding, quality
+    return best_encoding
+
+
+def is_not_modified(feed: CachedFeed, request_headers: Headers, encoding: str | None) -> bool:
+    """
+    Returns True if the client's copy of a feed is current, per its `If-None-Match`
+    or, if that is not sent, its `If-Modified-Since` header.
+    """
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        etags = {etag.strip().removeprefix("W/") for etag in if_none_match.split(",")}
+        return "*" in etags or feed.get_etag(encoding=encoding) in etags
+
+    if_modified_since = request_headers.get("if-modified-since")
+    if if_modified_since is not None:
+        try:
+            modified_since = parsedate_to_datetime(if_modified_since)
+            last_modified = parsedate_to_datetime(feed.last_modified)
+        except (TypeError, ValueError):
+            return False
+        if modified_since.tzinfo is None:
+            return False
+        return last_modified <= modified_since
+    return False
+
+
+def get_feed_response(
+    feed: CachedFeed, request_headers: Headers, media_type: str | None = None
+) -> Response:
+    """
+    Returns a feed with its `ETag` and `Last-Modified` validators, or a bodiless 304
+    response if the client's copy is current. The feed is sent as the precompressed
+    variant the client accepts, if there is one.
+    """
+    encoding = select_encoding(feed=feed, request_headers=request_headers)
+    headers = {
+        "etag": feed.get_etag(encoding=encoding),
+        "last-modified": feed.last_modified,
+        "vary": "Accept-Encoding",
+    }
+    if is_not_modified(feed=feed, request_headers=request_headers, encoding=encoding):
+        return Response(status_code=304, headers=headers)
+    if encoding is None:
+        return Response(feed.content, headers=headers, media_type=media_type)
+    headers["content-encoding"] = encoding
+    return Response(feed.encoded_content[encoding], headers=headers, media_type=media_type)
+
+
+class FeedStaticFiles(StaticFiles):
+    """
+    Serves the feeds folder, with the .rss files from the in-memory feed cache.
+    """
+
+    def file_response(
+        self,
+        full_path: str | os.PathLike[str],
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        path = Path(full_path)
+        if path.suffix != ".rss" or status_code != 200:
+            return super().file_response(full_path, stat_result, scope, status_code)
+
+        feed = feed_cache.get(path=path, stat_result=stat_result)
+        return get_feed_response(
+            feed=feed, request_headers=Headers(scope=scope), media_type="application/rss+xml"
+        )
@@ -0,0 +1,174 @@
+from typing import Any, Iterator
+
+import heapq
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.routing import Match
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from youtube_rss import settings
+
+
+@dataclass
+class QueryStats:
+    """
+    The SQL statements run by one HTTP request or background job.
+    """
+
+    name: str
+    statement_count: int = 0
+    total_seconds: float = 0.0
+    started_at: float = field(default_factory=time.time)
+    # (seconds, statement) of the slowest statements, as a min-heap.
+    slowest: list[tuple[float, str]] = field(default_factory=list)
+
+    def record(self, statement: str, seconds: float) -> None:
+        """
+        Record a statement and how long it took.
+        """
+        self.statement_count += 1
+        self.total_seconds += seconds
+        entry = (seconds, statement[: settings.query_stats_statement_max_length])
+        if len(self.slowest) < settings.query_stats_slowest_count:
+            heapq.heappush(self.slowest, entry)
+        else:
+            heapq.heappushpop(self.slowest, entry)
+
+    def dict(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "statement_count": self.statement_count,
+            "total_ms": round(self.total_seconds * 1000, 3),
+            "started_at": self.started_at,
+            "slowest": [
+                {"ms": round(seconds * 1000, 3), "statement": statement}
+                for seconds, statement in sorted(self.slowest, reverse=True)
+            ],
+        }
+
+
+@dataclass
+class QueryStatsTotals:
+    """
+    The SQL statements run by all requests to a route, or all jobs of a kind.
+    """
+
+    count: int = 0
+    statement_count: int = 0
+    total_seconds: float = 0.0
+    max_statement_count: int = 0
+
+    def add(self, stats: QueryStats) -> None:
+        self.count += 1
+        self.statement_count += stats.statement_count
+        self.total_seconds += stats.total_seconds
+        self.max_statement_count = max(self.max_statement_count, stats.statement_count)
+
+    def dict(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "statement_count": self.statement_count,
+            "avg_statement_count": round(self.statement_count / self.count, 2),
+            "max_statement_count": self.max_statement_count,
+            "total_ms": round(self.total_seconds * 1000, 3),
+            "avg_ms": round(self.total_seconds * 1000 / self.count, 3),
+        }
+
+
+# The stats of the request or job the current task runs for. Tasks created while
+# tracking inherit it, so their statements are attributed to the same request or job.
+_current_query_stats: ContextVar[QueryStats | None] = ContextVar(
+    "current_query_stats", default=None
+)
+recent_query_stats: deque[QueryStats] = deque(maxlen=settings.query_stats_history_size)
+query_stats_totals: dict[str, QueryStatsTotals] = {}
+
+
+@contextmanager
+def track_queries(name: str, record: bool = True) -> Iterator[QueryStats]:
+    """
+    Track the SQL statements run in this context, including in tasks it creates.
+
+    Args:
+        name: The name of the request or job, eg. "GET /api/v1/video/".
+        record: Whether to add the stats to `recent_query_stats` and
+            `query_stats_totals` when done.
+
+    Yields:
+        The stats, which are updated as statements run.
+    """
+    stats = QueryStats(name=name)
+    token = _current_query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_query_stats.reset(token)
+        if record:
+            recent_query_stats.append(stats)
+            query_stats_totals.setdefault(stats.name, QueryStatsTotals()).add(stats)
+
+
+def get_query_stats_summary() -> dict[str, Any]:
+    """
+    Get the totals by request route or job kind, and the most recent stats.
+    """
+    return {
+        "totals": {name: totals.dict() for name, totals in sorted(query_stats_totals.items())},
+        "recent": [stats.dict() for stats in reversed(recent_query_stats)],
+    }
+
+
+def reset_query_stats() -> None:
+    """
+    Forget all recorded stats.
+    """
+    recent_query_stats.clear()
+    query_stats_totals.clear()
+
+
+class QueryStatsMiddleware:
+    """
+    Records the SQL statements run by each HTTP request, by route.
+
+    A plain ASGI middleware rather than `BaseHTTPMiddleware`, which runs the app
+    in another task and buffers the response through a stream.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.query_stats_enabled:
+            await self.app(scope, receive, send)
+            return
+
+        route_path = scope["path"]
+        for route in scope["app"].routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                route_path = route.path
+                break
+        with track_queries(name=f"{scope['method']} {route_path}"):
+            await self.app(scope, receive, send)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(*args: Any) -> None:
+    context = args[4]
+    if context is not None and _current_query_stats.get() is not None:
+        context.query_stats_started_at = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(*args: Any) -> None:
+    statement, context = args[2], args[4]
+    stats = _current_query_stats.get()
+    started_at = getattr(context, "query_stats_started_at", None)
+    if stats is not None and started_at is not None:
+        stats.record(statement=statement, seconds=time.perf_counter() - started_at)
@@ -13,19 +13,25 @@
 
 from .exceptions import (
     DeleteError,
+    InvalidCursorError,
     InvalidRecordError,
     RecordAlreadyExistsError,
     RecordNotFoundError,
 )
+from .job import job
 from .source import source
 from .user import user
 from .video import video
+from .video_archive import video_archive
 
 __all__ = [
+    "job",
     "source",
     "user",
     "video",
+    "video_archive",
     "DeleteError",
+    "InvalidCursorError",
     "InvalidRecordError",
     "RecordAlreadyExistsError",
     "RecordNotFoundError",
@@ -1,16 +1,59 @@
 from typing import Any, Generic, Type, TypeVar
 
-from sqlalchemy.sql.elements import BinaryExpression
-from sqlmodel import Session, SQLModel, select
-
-from youtube_rss.crud import DeleteError, RecordNotFoundError
+import base64
+import datetime
+import json
+
+from sqlalchemy import bindparam, func, insert, literal, tuple_, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.sql.elements import BinaryExpression, ColumnElement
+from sqlmodel import SQLModel, select
+
+from youtube_rss.core.database import (
+    DBSession,
+    db_commit,
+    db_delete,
+    db_exec,
+    db_execute,
+    db_refresh,
+)
+from youtube_rss.crud import DeleteError, InvalidCursorError, RecordNotFoundError
 
 ModelClass = TypeVar("ModelClass", bound=SQLModel)
 SchemaCreateClass = TypeVar("SchemaCreateClass", bound=SQLModel)
 SchemaUpdateClass = TypeVar("SchemaUpdateClass", bound=SQLModel)
 
+# The maximum number of bound parameters in one statement, on older SQLite versions.
+SQLITE_MAX_VARIABLES = 999
+
+
+def encode_cursor(updated_at: datetime.datetime, id: str) -> str:
+    """
+    Encode the position of a record in `get_page` order as an opaque cursor.
+    """
+    return base64.urlsafe_b64encode(json.dumps([updated_at.isoformat(), id]).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime.datetime, str]:
+    """
+    Decode a cursor from `encode_cursor`.
+
+    Raises:
+        InvalidCursorError: If the cursor can not be decoded.
+    """
+    try:
+        updated_at, id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.datetime.fromisoformat(updated_at), str(id)
+    except (ValueError, TypeError) as exc:
+        raise InvalidCursorError(f"Invalid cursor {cursor!r}") from exc
+
 
 class BaseCRUD(Generic[ModelClass, SchemaCreateClass, SchemaUpdateClass]):
+    # Named eager loading strategies, eg. {"videos": [selectinload(Source.videos)]}.
+    # Callers choose one with `load=` to load relationships in the same round trip,
+    # rather than with one lazy query per record.
+    LOAD_OPTIONS: dict[str, list[Any]] = {}
+
     def __init__(self, model: Type[ModelClass]) -> None:
         """
         Initialize the CRUD object.
@@ -20,27 +63,55 @@ class BaseCRUD(Generic[ModelClass, SchemaCreateClass, SchemaUpdateClass]):
         """
         self.model = model
 
-    async def get_all(self, db: Session) -> list[ModelClass] | None:
+    def get_load_options(self, load: str | None) -> list[Any]:
+        """
+        Get the loader options of a named eager loading strategy.
+
+        Args:
+            load: The name of the strategy in `LOAD_OPTIONS`, or None to load lazily.
+
+        Returns:
+            The loader options.
+
+        Raises:
+            ValueError: If the strategy does not exist.
+        """
+        if load is None:
+            return []
+        try:
+            return self.LOAD_OPTIONS[load]
+        except KeyError as exc:
+            raise ValueError(f"Unknown load strategy '{load}' for {self.model.__name__}") from exc
+
+    async def get_all(self, db: DBSession, load: str | None = None) -> list[ModelClass] | None:
         """
         Get all records for the model.
 
         Args:
-            db (Session): The database session.
+            db (DBSession): The database session.
+            load: The name of an eager loading strategy in `LOAD_OPTIONS`.
 
         Returns:
             A list of all records, or None if there are none.
         """
-        statement = select(self.model)
-        return db.exec(statement).all()
+        statement = select(self.model).options(*self.get_load_options(load))
+        return (await db_exec(db, statement)).all()
 
-    async def get(self, *args: BinaryExpression[Any], db: Session, **kwargs: Any) -> ModelClass:
+    async def get(
+        self,
+        *args: BinaryExpression[Any],
+        db: DBSession,
+        load: str | None = None,
+        **kwargs: Any,
+    ) -> ModelClass:
         """
         Get a record by its primary key(s).
 
         Args:
             args: Binary expressions to filter by.
             kwargs: Keyword arguments to filter by.
-            db (Session): The database session.
+            db (DBSession): The database session.
+            load: The name of an eager loading strategy in `LOAD_OPTIONS`.
 
         Returns:
             The matching record.
@@ -48,9 +119,14 @@ class BaseCRUD(Generic[ModelClass, SchemaCreateClass, SchemaUpdateClass]):
         Raises:
             RecordNotFoundError: If no matching record is found.
         """
-        statement = select(self.model).filter(*args).filter_by(**kwargs)
-
-        result = db.exec(statement).first()
+        statement = (
+            select(self.model)
+            .filter(*args)
+            .filter_by(**kwargs)
+            .options(*self.get_load_options(load))
+        )
+
+        result: ModelClass | None = (await db_exec(db, statement)).first()
         if result is None:
             raise RecordNotFoundError(
                 f"{self.model.__name__}({args=} {kwargs=}) not found in database"
@@ -58,7 +134,11 @@ class BaseCRUD(Generic[ModelClass, SchemaCreateClass, SchemaUpdateClass]):
         return result
 
     async def get_or_none(
-        self, db: Session, *args: BinaryExpression[Any], **kwargs: Any
+        self,
+        db: DBSession,
+        *args: BinaryExpression[Any],
+        load: str | None = None,
+        **kwargs: Any,
     ) -> ModelClass | None:
         """
         Get a record by its primary key(s), or return None if no matching record is found.
@@ -66,19 +146,24 @@ class BaseCRUD(Generic[ModelClass, SchemaCreateClass, SchemaUpdateClass]):
         Args:
             args: Binary expressions to filter by.
             kwargs: Keyword arguments to filter by.
-            db (Session): The database session.
+            db (DBSession): The database session.
+            load: The name of an eager loading strategy in `LOAD_OPTIONS`.
 
         Returns:
             The matching record, or None.
         """
         try:
-            result = await self.get(*args, db=db, **kwargs)
+            result = await self.get(*args, db=db, load=load, **kwargs)
         except RecordNotFoundError:
             return None
         return result
 
     async def get_many(
-        self, db: Session, *args: BinaryExpression[Any], **kwargs: Any
+        self,
+        db: DBSession,
+        *args: ColumnElement[Any],
+        load: str | None = None,
+        **kwargs: Any,
     ) -> list[ModelClass]:
         """
         Retrieve multiple rows from the database that match the given criteria.
@@ -86,22 +171,84 @@ class BaseCRUD(Generic[ModelClass, SchemaCreateClass, SchemaUpdateClass]):
         Args:
             args: Binary expressions used to filter the rows to be retrieved.
             kwargs: Keyword arguments used to filter the rows to be retrieved.
-            db (Session): The database session.
+            db (DBSession): The database session.
+            load: The name of an eager loading strategy in `LOAD_OPTIONS`.
 
         Returns:
             A list of records that match the given criteria.
         """
 
-        statement = select(self.model).filter(*args).filter_by(**kwargs)
-        return db.exec(statement).fetchmany()
+        statement = (
+            select(self.model)
+            .filter(*args)
+            .filter_by(**kwargs)
+            .options(*self.get_load_options(load))
+        )
+        return (await db_exec(db, statement)).all()
+
+    async def get_page(
+        self,
+        *args: ColumnElement[Any],
+        db: DBSession,
+        limit: int,
+        cursor: str | None = None,
+        **kwargs: Any,
+    ) -> tuple[list[ModelClass], str | None]:
+        """
+        Get a page of records that match the given criteria, ordered by `updated_at`
+        then `id`. Pages are selected by keyset (the position after the last record
+        of the previous page), so each page costs the same however deep it is.
+
+        `updated_at` changes when a record is updated, which moves the record to the end
+        of the order. A record that is updated while the pages are read is returned
+        again on a later page if it was already returned, and a record whose
+        `updated_at` is set back (eg. by a clock change) can be skipped. Callers that
+        need each record exactly once should dedupe by id.
+
+        Args:
+            args: Binary expressions to filter by.
+            kwargs: Keyword arguments to filter by.
+            limit: The maximum number of records in the page.
+            cursor: The `next_cursor` of the previous page, or None for the first page.
+            db (DBSession): The database session.
+
+        Returns:
+            The records in the page, and the cursor of the next page, or None if this
+            is the last page.
+
+        Raises:
+            InvalidCursorError: If the cursor can not be decoded.
+        """
+        table = self.model.__table__  # type: ignore
+        (primary_key,) = table.primary_key.columns
+        order_by = (table.c.updated_at, primary_key)
 
-    async def create(self, db: Session, in_obj: SchemaCreateClass) -> ModelClass:
+        statement = select(self.model).filter(*args).filter_by(**kwargs)
+        if cursor is not None:
+            updated_at, id = decode_cursor(cursor)
+            position: ColumnElement[Any] = tuple_(
+                literal(updated_at, type_=table.c.updated_at.type),
+                literal(id, type_=primary_key.type),
+            )
+            statement = statement.where(tuple_(*order_by) > position)
+        statement = statement.order_by(*order_by).limit(limit + 1)
+
+        records = (await db_exec(db, statement)).all()
+        if len(records) <= limit:
+            return records, None
+        records = records[:limit]
+        last_record = records[-1]
+        return records, encode_cursor(
+            updated_at=last_record.updated_at, id=getattr(last_record, primary_key.name)
+        )
+
+    async def create(self, db: DBSession, in_obj: SchemaCreateClass) -> ModelClass:
         """
         Create a new record.
 
         Args:
             in_obj: The object to create.
-            db (Session): The database session.
+            db (DBSession): The database session.
 
         Returns:
             The created object.
@@ -109,15 +256,219 @@ class BaseCRUD(Generic[ModelClass, SchemaCreateClass, SchemaUpdateClass]):
         out_obj = self.model(**in_obj.dict())
 
         db.add(out_obj)
-        db.commit()
-        db.refresh(out_obj)
+        await db_commit(db)
+        await db_refresh(db, out_obj)
         return out_obj
 
+    async def create_many(
+        self, db: DBSession, in_objs: list[SchemaCreateClass]
+    ) -> list[ModelClass]:
+        """
+        Create many new records in one transaction, with a single executemany insert.
+        Records whose primary key already exists in the database are skipped.
+
+        Args:
+            in_objs: The objects to create.
+            db (DBSession): The database session.
+
+        Returns:
+            The created objects. Objects that were skipped are not returned.
+        """
+        table = self.model.__table__  # type: ignore
+        (primary_key,) = table.primary_key.columns
+        out_objs = {
+            getattr(out_obj, primary_key.name): out_obj
+            for out_obj in [self.model(**in_obj.dict()) for in_obj in in_objs]
+        }
+        if not out_objs:
+            return []
+
+        ids = list(out_objs)
+        for i in range(0, len(ids), SQLITE_MAX_VARIABLES):
+            statement = select(primary_key).where(
+                primary_key.in_(ids[i : i + SQLITE_MAX_VARIABLES])
+            )
+            for existing_id in (await db_exec(db, statement)).all():
+                out_objs.pop(existing_id, None)
+
+        if out_objs:
+            await db_execute(
+                db,
+                insert(table).prefix_with("OR IGNORE"),
+                [
+                    {column.name: getattr(out_obj, column.name) for column in table.columns}
+                    for out_obj in out_objs.values()
+                ],
+            )
+        await db_commit(db)
+        return list(out_objs.values())
+
+    async def upsert_many(
+        self,
+        db: DBSession,
+        in_objs: list[SchemaCreateClass] | list[SchemaUpdateClass],
+        update_fields: list[str] | None = None,
+        returning: bool = False,
+    ) -> list[ModelClass]:
+        """
+        Create or update many records with a single `INSERT ... ON CONFLICT DO UPDATE`
+        statement, in one transaction.
+
+        Like `update`, a None value never overwrites an existing value.
+
+        Args:
+            in_objs: The objects to create or update.
+            update_fields: The fields to update on existing records. Defaults to the
+                fields that are set, and not None, on any of the `in_objs`.
+            returning: Whether to return the created and updated records.
+            db (DBSession): The database session.
+
+        Returns:
+            The created and updated records if `returning`, otherwise an empty list.
+        """
+        table = self.model.__table__  # type: ignore
+        (primary_key,) = table.primary_key.columns
+        out_objs = {
+            getattr(out_obj, primary_key.name): out_obj
+            for out_obj in [self.model(**in_obj.dict()) for in_obj in in_objs]
+        }
+        if not out_objs:
+            return []
+
+        if update_fields is None:
+            update_fields = self.get_update_fields(in_objs=in_objs)
+        statement = sqlite_insert(table)
+        statement = statement.on_conflict_do_update(
+            index_elements=[primary_key],
+            set_={
+                field: func.coalesce(statement.excluded[field], table.c[field])
+                for field in update_fields
+                if field != primary_key.name and field in table.c
+            },
+        )
+        await db_execute(
+            db,
+            statement,
+            [
+                {column.name: getattr(out_obj, column.name) for column in table.columns}
+                for out_obj in out_objs.values()
+            ],
+        )
+        await db_commit(db)
+
+        if not returning:
+            return []
+        return await self.get_many_by_ids(db=db, ids=list(out_objs))
+
+    async def update_many(
+        self,
+        db: DBSession,
+        in_objs: list[SchemaCreateClass] | list[SchemaUpdateClass],
+        update_fields: list[str] | None = None,
+        returning: bool = False,
+    ) -> list[ModelClass]:
+        """
+        Update many existing records with a single executemany `UPDATE` statement, in
+        one transaction. Objects whose record no longer exists are skipped, not created
+        again.
+
+        Like `update`, a None value never overwrites an existing value.
+
+        Args:
+            in_objs: The objects to update.
+            update_fields: The fields to update. Defaults to the fields that are set,
+                and not None, on any of the `in_objs`.
+            returning: Whether to return the updated records.
+            db (DBSession): The database session.
+
+        Returns:
+            The updated records if `returning`, otherwise an empty list.
+        """
+        table = self.model.__table__  # type: ignore
+        (primary_key,) = table.primary_key.columns
+        out_objs = {
+            getattr(out_obj, primary_key.name): out_obj
+            for out_obj in [self.model(**in_obj.dict()) for in_obj in in_objs]
+        }
+        if not out_objs:
+            return []
+
+        if update_fields is None:
+            update_fields = self.get_update_fields(in_objs=in_objs)
+        fields = [
+            field for field in update_fields if field != primary_key.name and field in table.c
+        ]
+        if fields:
+            # Bound parameters may not share a column's name in the SET clause.
+            statement = (
+                update(table)
+                .where(primary_key == bindparam(f"_{primary_key.name}"))
+                .values(
+                    {
+                        field: func.coalesce(bindparam(f"_{field}"), table.c[field])
+                        for field in fields
+                    }
+                )
+            )
+            await db_execute(
+                db,
+                statement,
+                [
+                    {f"_{field}": getattr(out_obj, field) for field in [primary_key.name, *fields]}
+                    for out_obj in out_objs.values()
+                ],
+            )
+            await db_commit(db)
+
+        if not returning:
+            return []
+        return await self.get_many_by_ids(db=db, ids=list(out_objs))
+
+    def get_update_fields(
+        self, in_objs: list[SchemaCreateClass] | list[SchemaUpdateClass]
+    ) -> list[str]:
+        """
+        Get the fields that are set, and not None, on any of the `in_objs`.
+        """
+        return sorted(
+            {
+                key
+                for in_obj in in_objs
+                for key in in_obj.dict(exclude_unset=True, exclude_none=True)
+            }
+        )
+
+    async def get_many_by_ids(self, db: DBSession, ids: list[Any]) -> list[ModelClass]:
+        """
+        Get the records with the given primary keys, reloaded from the database, in the
+        order of `ids`. Ids that do not exist are skipped.
+
+        Args:
+            db (DBSession): The database session.
+            ids: The primary keys.
+
+        Returns:
+            The records.
+        """
+        table = self.model.__table__  # type: ignore
+        (primary_key,) = table.primary_key.columns
+        # SQLite RETURNING is not supported by this SQLAlchemy version, so select the rows.
+        db_objs = {}
+        for i in range(0, len(ids), SQLITE_MAX_VARIABLES):
+            select_statement = (
+                select(self.model)
+                .where(primary_key.in_(ids[i : i + SQLITE_MAX_VARIABLES]))
+                .execution_options(populate_existing=True)
+            )
+            for db_obj in (await db_exec(db, select_statement)).all():
+                db_objs[getattr(db_obj, primary_key.name)] = db_obj
+        return [db_objs[_id] for _id in ids if _id in db_objs]
+
     async def update(
         self,
         in_obj: SchemaCreateClass | SchemaUpdateClass,
         *args: BinaryExpression[Any],
-        db: Session,
+        db: DBSession,
         **kwargs: Any,
     ) -> ModelClass:
         """
@@ -126,7 +477,7 @@ class BaseCRUD(Generic[ModelClass, SchemaCreateClass, SchemaUpdateClass]):
         Args:
             in_obj: The updated object.
             args: Binary expressions to filter by.
-            db (Session): The database session.
+            db (DBSession): The database session.
             kwargs: Keyword arguments to filter by.
 
         Returns:
@@ -142,25 +493,25 @@ class BaseCRUD(Generic[ModelClass, SchemaCreateClass, SchemaUpdateClass]):
             if in_obj_value != db_obj_values[in_obj_key]:
                 setattr(db_obj, in_obj_key, in_obj_value)
 
-        db.commit()
-        db.refresh(db_obj)
+        await db_commit(db)
+        await db_refresh(db, db_obj)
         return db_obj
 
-    async def delete(self, *args: BinaryExpression[Any], db: Session, **kwargs: Any) -> None:
+    async def delete(self, *args: BinaryExpression[Any], db: DBSession, **kwargs: Any) -> None:
         """
         Delete a record.
 
         Args:
             args: Binary expressions to filter by.
             kwargs: Keyword arguments to filter by.
-            db (Session): The database session.
+            db (DBSession): The database session.
 
         Raises:
             DeleteError: If an error occurs while deleting the record.
         """
         db_obj = await self.get(*args, db=db, **kwargs)
         try:
-            db.delete(db_obj)
-            db.commit()
+            await db_delete(db, db_obj)
+            await db_commit(db)
         except Exception as exc:
             raise DeleteError("Error while deleting") from exc
@@ -17,6 +17,12 @@ class InvalidRecordError(Exception):
     """
 
 
+class InvalidCursorError(Exception):
+    """
+    Exception raised when a pagination cursor can not be decoded.
+    """
+
+
 class DeleteError(Exception):
     """
     Exception raised when there is an error deleting a record from the database
@@ -0,0 +1,146 @@
+import datetime
+
+from sqlmodel import col, select
+
+from youtube_rss.core.database import DBSession, db_commit, db_exec
+from youtube_rss.models.job import Job, JobCreate, JobUpdate
+
+from .base import BaseCRUD
+
+# The `due_at` of a running job. Scheduling the job moves it earlier, so the job runs
+# again as soon as it completes.
+RUNNING_DUE_AT = datetime.datetime.max
+
+
+class JobCRUD(BaseCRUD[Job, JobCreate, JobUpdate]):
+    async def schedule_many(self, db: DBSession, jobs: list[JobCreate]) -> None:
+        """
+        Schedule jobs, in one transaction.
+
+        There is at most one job per kind and entity. If a job is already scheduled
+        for an entity, it keeps the earliest `due_at` and the highest `priority`. A job
+        that is running keeps the `due_at` for its next run, see `complete`.
+
+        Args:
+            db (DBSession): The database session.
+            jobs: The jobs to schedule.
+        """
+        new_jobs = {new_job.id: new_job for new_job in [Job(**job.dict()) for job in jobs]}
+        if not new_jobs:
+            return
+
+        statement = select(Job).where(col(Job.id).in_(new_jobs))
+        for db_job in (await db_exec(db, statement)).all():
+            new_job = new_jobs.pop(db_job.id)
+            if new_job.due_at < db_job.due_at:
+                db_job.due_at = new_job.due_at
+            if new_job.priority > db_job.priority:
+                db_job.priority = new_job.priority
+
+        db.add_all(new_jobs.values())
+        await db_commit(db)
+
+    async def get_due(self, db: DBSession, now: datetime.datetime, limit: int) -> list[Job]:
+        """
+        Get the jobs that are due and not running, highest priority first, then
+        most overdue first.
+
+        Args:
+            db (DBSession): The database session.
+            now: The current time (UTC).
+            limit: The maximum number of jobs to return.
+
+        Returns:
+            The due jobs.
+        """
+        statement = (
+            select(Job)
+            .where(Job.due_at <= now, col(Job.started_at).is_(None))
+            .order_by(col(Job.priority).desc(), col(Job.due_at))
+            .limit(limit)
+        )
+        return (await db_exec(db, statement)).all()
+
+    async def get_next_due_at(self, db: DBSession) -> datetime.datetime | None:
+        """
+        Get the `due_at` of the next job that is not running, if any.
+        """
+        statement = (
+            select(Job.due_at)
+            .where(col(Job.started_at).is_(None))
+            .order_by(col(Job.due_at))
+            .limit(1)
+        )
+        next_due_at: datetime.datetime | None = (await db_exec(db, statement)).first()
+        return next_due_at
+
+    async def start(self, db: DBSession, jobs: list[Job], now: datetime.datetime) -> None:
+        """
+        Mark jobs as running, so they are not picked up again.
+        """
+        for db_job in jobs:
+            db_job.started_at = now
+            db_job.due_at = RUNNING_DUE_AT
+        await db_commit(db)
+
+    async def complete(self, db: DBSession, job_id: str, next_due_at: datetime.datetime) -> Job:
+        """
+        Mark a job as successfully run and schedule its next run. If the job was
+        scheduled while it ran, the earlier `due_at` is kept.
+
+        Args:
+            db (DBSession): The database session.
+            job_id: The id of the job.
+            next_due_at: When the job is due again (UTC).
+
+        Returns:
+            The updated job.
+        """
+        db_job = await self.get(id=job_id, db=db)
+        db_job.due_at = min(db_job.due_at, next_due_at)
+        db_job.attempts = 0
+        db_job.last_error = None
+        db_job.started_at = None
+        db_job.updated_at = datetime.datetime.utcnow()
+        await db_commit(db)
+        return db_job
+
+    async def fail(
+        self, db: DBSession, job_id: str, error: str, next_due_at: datetime.datetime
+    ) -> Job:
+        """
+        Mark a job as failed and schedule its retry. If the job was scheduled while it
+        ran, the earlier `due_at` is kept.
+
+        Args:
+            db (DBSession): The database session.
+            job_id: The id of the job.
+            error: The error the job failed with.
+            next_due_at: When the job is retried (UTC).
+
+        Returns:
+            The updated job.
+        """
+        db_job = await self.get(id=job_id, db=db)
+        db_job.due_at = min(db_job.due_at, next_due_at)
+        db_job.attempts += 1
+        db_job.last_error = error
+        db_job.started_at = None
+        db_job.updated_at = datetime.datetime.utcnow()
+        await db_commit(db)
+        return db_job
+
+    async def reset_started(self, db: DBSession) -> None:
+        """
+        Mark all jobs as not running, and due now. Used on startup, as jobs that were
+        running when the server stopped will never complete.
+        """
+        now = datetime.datetime.utcnow()
+        statement = select(Job).where(col(Job.started_at).is_not(None))
+        for db_job in (await db_exec(db, statement)).all():
+            db_job.started_at = None
+            db_job.due_at = min(db_job.due_at, now)
+        await db_commit(db)
+
+
+job = JobCRUD(Job)
@@ -1,10 +1,13 @@
 from typing import Any
 
+import datetime
+
 # from fastapi import Depends
+from sqlalchemy.orm import selectinload
 from sqlalchemy.sql.elements import BinaryExpression
-from sqlmodel import Session
 
-from youtube_rss import crud
+from youtube_rss import crud, settings
+from youtube_rss.core.database import DBSession, load_relationships
 from youtube_rss.core.logger import logger
 from youtube_rss.crud.exceptions import RecordAlreadyExistsError
 from youtube_rss.models.source import (
@@ -13,13 +16,16 @@ from youtube_rss.models.source import (
     SourceUpdate,
     generate_source_id_from_url,
 )
-from youtube_rss.models.video import Video
-from youtube_rss.services.feed import build_rss_file, delete_rss_file
+from youtube_rss.services.feed import delete_rss_file
+from youtube_rss.services.feed_queue import feed_build_queue
+from youtube_rss.services.scheduler import schedule_source_jobs, schedule_video_jobs
 from youtube_rss.services.source import (
     add_new_source_videos_from_fetched_videos,
+    archive_source_videos,
     get_source_from_source_info_dict,
     get_source_info_dict,
     get_source_videos_from_source_info_dict,
+    refresh_sources,
 )
 from youtube_rss.services.videos import refresh_videos
 
@@ -27,7 +33,9 @@ from .base import BaseCRUD
 
 
 class SourceCRUD(BaseCRUD[Source, SourceCreate, SourceUpdate]):
-    async def delete(self, *args: BinaryExpression[Any], db: Session, **kwargs: Any) -> None:
+    LOAD_OPTIONS = {"videos": [selectinload(Source.videos)]}
+
+    async def delete(self, *args: BinaryExpression[Any], db: DBSession, **kwargs: Any) -> None:
         source_id = kwargs.get("id")
         if source_id:
             try:
@@ -36,13 +44,13 @@ class SourceCRUD(BaseCRUD[Source, SourceCreate, SourceUpdate]):
                 logger.warning(e)
         return await super().delete(*args, db=db, **kwargs)
 
-    async def create_source_from_url(self, db: Session, url: str, user_id: str) -> Source:
+    async def create_source_from_url(self, db: DBSession, url: str, user_id: str) -> Source:
         """Create a new source from a URL.
 
         Args:
             url: The URL to create the source from.
             user_id(str): The user id
-            db (Session): The database session.
+            db (DBSession): The database session.
 
         Returns:
             The created source.
@@ -71,27 +79,49 @@ class SourceCRUD(BaseCRUD[Source, SourceCreate, SourceUpdate]):
         db_source = await self.create(in_obj=_source, db=db)
 
         # Fetch video information from yt-dlp for new videos
-        return await self.fetch_source(source_id=source_id, db=db)
+        db_source = await self.fetch_source(source_id=source_id, db=db)
+        await load_relationships(db, db_source, ["videos"])
+
+        # Schedule the next refreshes of the source and its videos
+        await schedule_source_jobs(
+            db=db,
+            sources=[db_source],
+            due_at=datetime.datetime.utcnow()
+            + datetime.timedelta(minutes=settings.refresh_sources_interval_minutes),
+        )
+        await schedule_video_jobs(db=db, videos=db_source.videos)
+        return db_source
 
-    async def fetch_source(self, db: Session, source_id: str) -> Source:
+    async def fetch_source(self, db: DBSession, source_id: str, use_cache: bool = True) -> Source:
         """Fetch new data from yt-dlp for the source and update the source in the database.
 
-        This function will also delete any videos that are no longer associated with the source.
+        This function will also archive the source's videos that are old or outside its
+        feed window.
 
         Args:
             source_id: The id of the source to fetch and update.
-            db (Session): The database session.
+            db (DBSession): The database session.
+            use_cache: Whether to use a cached source info_dict, if available.
 
         Returns:
             The updated source.
         """
-        db_source = await self.get(id=source_id, db=db)
+        db_source = await self.get(id=source_id, db=db, load="videos")
+
+        # Only extract videos newer than the newest known video
+        known_video_ids = (
+            {video.id for video in db_source.videos}
+            if settings.refresh_sources_incremental and db_source.videos
+            else None
+        )
 
         # Fetch source information from yt-dlp and create the source object
         source_info_dict = await get_source_info_dict(
             source_id=source_id,
             url=db_source.url,
             extract_flat=True,
+            use_cache=use_cache,
+            known_video_ids=known_video_ids,
         )
         _source = await get_source_from_source_info_dict(
             source_info_dict=source_info_dict, user_id=db_source.created_by
@@ -108,58 +138,53 @@ class SourceCRUD(BaseCRUD[Source, SourceCreate, SourceUpdate]):
             fetched_videos=fetched_videos, db_source=db_source, db=db
         )
 
-        # NOTE: Enable if db grows too large. Otherwise best not to delete any videos
-        # from database as podcast app will still reference the video's feed_media_url
-        # deleted_videos = await delete_orphaned_source_videos(
-        #     fetched_videos=fetched_videos, db_source=db_source
-        # )
-        deleted_videos: list[Video] = []
+        # Videos are archived rather than deleted, as podcast apps still reference
+        # their feed_media_url
+        archived_video_ids = await archive_source_videos(db_source=db_source, db=db)
+
+        await load_relationships(db, db_source, ["videos"])
 
         refreshed_videos = await refresh_videos(videos=db_source.videos, db=db)
 
-        # Build RSS File
-        await build_rss_file(source=db_source)
+        # Build RSS File, coalesced with other changes to the source
+        await feed_build_queue.submit(source=db_source, db=db)
 
         logger.success(
             f"Completed fetching Source(id='{db_source.id}'). "
-            f"[{len(added_videos)}/{len(deleted_videos)}/{len(refreshed_videos)}] "
+            f"[{len(added_videos)}/{len(archived_video_ids)}/{len(refreshed_videos)}] "
             f"Added {len(added_videos)} new videos. "
-            f"Deleted {len(deleted_videos)} orphaned videos. "
+            f"Archived {len(archived_video_ids)} old videos. "
             f"Refreshed {len(refreshed_videos)} videos."
         )
 
         return await self.get(id=source_id, db=db)
 
-    async def fetch_all_sources(self, db: Session) -> list[Source]:
+    async def fetch_all_sources(self, db: DBSession) -> list[Source]:
         """
         Fetch all sources.
 
         Args:
-            db (Session): The database session.
+            db (DBSession): The database session.
 
         Returns:
             List[Source]: List of fetched sources
         """
         logger.warning("Fetching ALL Sources...")
         sources = await self.get_all(db=db) or []
-        fetched = []
-        for _source in sources:
-            fetched.append(await self.fetch_source(source_id=_source.id, db=db))
-
-        return fetched
+        return await refresh_sources(sources=sources, db=db)
 
-    async def fetch_source_videos(self, source_id: str, db: Session) -> Source:
+    async def fetch_source_videos(self, source_id: str, db: DBSession) -> Source:
         """Fetch new data from yt-dlp for each video in the source.
 
         Args:
             source_id: The ID of the source to fetch videos for.
-            db (Session): The database session.
+            db (DBSession): The database session.
 
         Returns:
             The source with the updated videos.
         """
         # Get the source from the database
-        _source = await self.get(id=source_id, db=db)
+        _source = await self.get(id=source_id, db=db, load="videos")
 
         # Fetch new data for each video in the source
         for video in _source.videos:
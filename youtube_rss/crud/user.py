@@ -1,10 +1,12 @@
+from sqlalchemy.orm import selectinload
+
 from youtube_rss.models.user import UserCreate, UserDB, UserUpdate
 
 from .base import BaseCRUD
 
 
 class UserCRUD(BaseCRUD[UserDB, UserCreate, UserUpdate]):
-    pass
+    LOAD_OPTIONS = {"sources": [selectinload(UserDB.sources)]}
 
 
 user = UserCRUD(UserDB)
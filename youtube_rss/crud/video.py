@@ -1,21 +1,28 @@
-from sqlmodel import Session
+import asyncio
+import datetime
+
+from sqlmodel import col, select
 
 from youtube_rss import crud
+from youtube_rss.core.database import DBSession, db_commit, db_execute
 from youtube_rss.core.logger import logger
 from youtube_rss.models.video import Video, VideoCreate, VideoUpdate, generate_video_id_from_url
 from youtube_rss.services.videos import get_video_from_video_info_dict, get_video_info_dict
 
 from .base import BaseCRUD
 
+# How stale a video's `accessed_at` may get, so a media request does not write every time.
+ACCESSED_AT_RESOLUTION = datetime.timedelta(hours=1)
+
 
 class VideoCRUD(BaseCRUD[Video, VideoCreate, VideoUpdate]):
-    async def create_video_from_url(self, url: str, source_id: str, db: Session) -> Video:
+    async def create_video_from_url(self, url: str, source_id: str, db: DBSession) -> Video:
         """Create a new video from a URL.
 
         Args:
             url: The URL to create the video from.
             source_id: The id of the Source the video belongs to.
-            db (Session): The database session.
+            db (DBSession): The database session.
 
         Returns:
             The created video.
@@ -39,12 +46,13 @@ class VideoCRUD(BaseCRUD[Video, VideoCreate, VideoUpdate]):
         # Save the video to the database
         return await self.create(in_obj=_video, db=db)
 
-    async def fetch_video(self, video_id: str, db: Session) -> Video:
+    async def fetch_video(self, video_id: str, db: DBSession, use_cache: bool = True) -> Video:
         """Fetches new data from yt-dlp for the video.
 
         Args:
             video_id: The ID of the video to fetch data for.
-            db (Session): The database session.
+            db (DBSession): The database session.
+            use_cache: Whether to use a cached info_dict, if available.
 
         Returns:
             The updated video.
@@ -54,7 +62,7 @@ class VideoCRUD(BaseCRUD[Video, VideoCreate, VideoUpdate]):
         source_id = db_video.source_id
 
         # Fetch video information from yt-dlp and create the video object
-        video_info_dict = await get_video_info_dict(url=db_video.url)
+        video_info_dict = await get_video_info_dict(url=db_video.url, use_cache=use_cache)
         _video = await get_video_from_video_info_dict(
             video_info_dict=video_info_dict, source_id=source_id
         )
@@ -62,12 +70,111 @@ class VideoCRUD(BaseCRUD[Video, VideoCreate, VideoUpdate]):
         # Update the video in the database and return it
         return await self.update(VideoCreate(**_video.dict()), id=_video.id, db=db)
 
-    async def fetch_all_videos(self, db: Session) -> list[Video]:
+    async def fetch_videos(
+        self, video_ids: list[str], db: DBSession, use_cache: bool = True
+    ) -> list[Video]:
+        """Fetches new data from yt-dlp for many videos.
+
+        The videos are extracted concurrently, then all results are written with one
+        batched update. Videos that were deleted or archived during the extraction are
+        not created again. If any extraction failed, the other results are still
+        written, then the first error is raised.
+
+        Args:
+            video_ids: The IDs of the videos to fetch data for.
+            db (DBSession): The database session.
+            use_cache: Whether to use cached info_dicts, if available.
+
+        Returns:
+            The updated videos. Videos that no longer exist are skipped.
+        """
+        updated_videos, errors = await self.fetch_videos_with_errors(
+            video_ids=video_ids, db=db, use_cache=use_cache
+        )
+        if errors:
+            raise next(iter(errors.values()))
+        return updated_videos
+
+    async def fetch_videos_with_errors(
+        self, video_ids: list[str], db: DBSession, use_cache: bool = True
+    ) -> tuple[list[Video], dict[str, Exception]]:
+        """Fetches new data from yt-dlp for many videos, like `fetch_videos`, but
+        returns the extraction errors instead of raising the first.
+
+        Args:
+            video_ids: The IDs of the videos to fetch data for.
+            db (DBSession): The database session.
+            use_cache: Whether to use cached info_dicts, if available.
+
+        Returns:
+            The updated videos, and the errors of the videos that failed, by video id.
+        """
+        positions = {video_id: position for position, video_id in enumerate(video_ids)}
+        db_videos = sorted(
+            await self.get_many(db, col(Video.id).in_(video_ids)),
+            key=lambda db_video: positions[db_video.id],
+        )
+        video_info_dicts = await asyncio.gather(
+            *[get_video_info_dict(url=db_video.url, use_cache=use_cache) for db_video in db_videos],
+            return_exceptions=True,
+        )
+
+        fetched_videos = []
+        errors: dict[str, Exception] = {}
+        for db_video, video_info_dict in zip(db_videos, video_info_dicts):
+            try:
+                if isinstance(video_info_dict, BaseException):
+                    raise video_info_dict
+                _video = await get_video_from_video_info_dict(
+                    video_info_dict=video_info_dict, source_id=db_video.source_id
+                )
+            except Exception as e:  # pylint: disable=broad-except
+                logger.error(f"Failed to fetch Video(id='{db_video.id}'). {e}")
+                errors[db_video.id] = e
+                continue
+            fetched_videos.append(VideoCreate(**_video.dict()))
+
+        updated_videos = await self.update_many(in_objs=fetched_videos, returning=True, db=db)
+        return updated_videos, errors
+
+    async def get_source_ids(self, db: DBSession, video_ids: list[str]) -> dict[str, str]:
+        """
+        Get the source ids of videos, without loading the videos.
+
+        Args:
+            db (DBSession): The database session.
+            video_ids: The IDs of the videos.
+
+        Returns:
+            The source id of each video, by video id. Videos that do not exist are
+            skipped.
+        """
+        statement = select(Video.id, Video.source_id).where(col(Video.id).in_(video_ids))
+        rows = (await db_execute(db, statement)).all()
+        return {video_id: source_id for video_id, source_id in rows}
+
+    async def mark_accessed(self, db: DBSession, db_video: Video) -> None:
+        """
+        Set the `accessed_at` of a video to now, so it is not archived while it is in
+        use. It is written at most once per `ACCESSED_AT_RESOLUTION`.
+
+        Args:
+            db (DBSession): The database session.
+            db_video: The video in the database.
+        """
+        now = datetime.datetime.utcnow()
+        if db_video.accessed_at is not None and db_video.accessed_at > now - ACCESSED_AT_RESOLUTION:
+            return
+        db_video.accessed_at = now
+        db.add(db_video)
+        await db_commit(db)
+
+    async def fetch_all_videos(self, db: DBSession) -> list[Video]:
         """
         Fetch videos from all sources.
 
         Args:
-            db (Session): The database session.
+            db (DBSession): The database session.
 
         Returns:
             List[Video]: List of fetched videos
@@ -0,0 +1,130 @@
+import datetime
+
+from sqlalchemy import delete, func, insert, literal, or_
+from sqlalchemy import select as sa_select
+from sqlmodel import col, select
+
+from youtube_rss import crud
+from youtube_rss.core.database import DBSession, db_commit, db_delete, db_exec, db_execute
+from youtube_rss.models.job import Job, JobKind
+from youtube_rss.models.video import Video, VideoArchive
+
+from .base import SQLITE_MAX_VARIABLES, BaseCRUD
+
+# The columns that are kept when a video is archived.
+ARCHIVED_COLUMNS = [
+    column.name
+    for column in VideoArchive.__table__.columns  # type: ignore
+    if column.name != "archived_at"
+]
+
+
+class VideoArchiveCRUD(BaseCRUD[VideoArchive, VideoArchive, VideoArchive]):
+    async def archive_source_videos(
+        self,
+        db: DBSession,
+        source_id: str,
+        published_before: datetime.datetime,
+        keep: int,
+        accessed_before: datetime.datetime | None = None,
+    ) -> list[str]:
+        """
+        Move a source's videos that are published before `published_before`, or that are
+        not among its `keep` newest videos, from the `video` table to the archive, in one
+        transaction. Their refresh jobs are deleted.
+
+        Args:
+            db (DBSession): The database session.
+            source_id: The id of the source.
+            published_before: Videos published before this time (UTC) are archived.
+            keep: The number of newest videos of the source that stay in the `video` table.
+            accessed_before: Videos accessed at or after this time (UTC) are in use, and
+                stay in the `video` table. If None, any video may be archived.
+
+        Returns:
+            The ids of the archived videos.
+        """
+        published_at = func.coalesce(Video.released_at, Video.added_at)
+        newest_video_ids = (
+            select(Video.id)
+            .where(Video.source_id == source_id)
+            .order_by(published_at.desc())
+            .limit(keep)
+        )
+        statement = select(Video.id).where(
+            Video.source_id == source_id,
+            or_(published_at < published_before, col(Video.id).not_in(newest_video_ids)),
+        )
+        if accessed_before is not None:
+            accessed_at = col(Video.accessed_at)
+            statement = statement.where(or_(accessed_at.is_(None), accessed_at < accessed_before))
+        video_ids = (await db_exec(db, statement)).all()
+
+        now = datetime.datetime.utcnow()
+        video_table = Video.__table__  # type: ignore
+        for i in range(0, len(video_ids), SQLITE_MAX_VARIABLES):
+            chunk = video_ids[i : i + SQLITE_MAX_VARIABLES]
+            await db_execute(
+                db,
+                insert(VideoArchive.__table__)  # type: ignore
+                .prefix_with("OR REPLACE")
+                .from_select(
+                    [*ARCHIVED_COLUMNS, "archived_at"],
+                    sa_select(
+                        [*[video_table.c[name] for name in ARCHIVED_COLUMNS], literal(now)]
+                    ).where(video_table.c.id.in_(chunk)),
+                ),
+            )
+            await db_execute(
+                db,
+                delete(Job).where(
+                    Job.kind == JobKind.REFRESH_VIDEO.value, col(Job.entity_id).in_(chunk)
+                ),
+            )
+            await db_execute(db, delete(Video).where(col(Video.id).in_(chunk)))
+        await db_commit(db)
+        return video_ids
+
+    async def get_archived_ids(self, db: DBSession, video_ids: list[str]) -> set[str]:
+        """
+        Get which of the given videos are archived.
+        """
+        archived_ids = set()
+        for i in range(0, len(video_ids), SQLITE_MAX_VARIABLES):
+            statement = select(VideoArchive.id).where(
+                col(VideoArchive.id).in_(video_ids[i : i + SQLITE_MAX_VARIABLES])
+            )
+            archived_ids.update((await db_exec(db, statement)).all())
+        return archived_ids
+
+    async def promote(self, db: DBSession, video_id: str) -> Video:
+        """
+        Move an archived video back to the `video` table. It is marked as accessed, so
+        it is not archived again while it is in use.
+
+        Args:
+            db (DBSession): The database session.
+            video_id: The id of the video.
+
+        Returns:
+            The video.
+
+        Raises:
+            RecordNotFoundError: If the video is not archived.
+        """
+        db_archived_video = await self.get(id=video_id, db=db)
+        video = Video(**db_archived_video.dict(exclude={"archived_at"}))
+        video.accessed_at = datetime.datetime.utcnow()
+        video_table = Video.__table__  # type: ignore
+        # A concurrent request may have promoted the video already.
+        await db_execute(
+            db,
+            insert(video_table).prefix_with("OR IGNORE"),
+            [{column.name: getattr(video, column.name) for column in video_table.columns}],
+        )
+        await db_delete(db, db_archived_video)
+        await db_commit(db)
+        return await crud.video.get(id=video_id, db=db)
+
+
+video_archive = VideoArchiveCRUD(VideoArchive)
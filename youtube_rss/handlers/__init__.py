@@ -9,9 +9,14 @@ from .youtube import YoutubeHandler
 registered_handlers = [YoutubeHandler(), RumbleHandler()]
 
 
+def get_domain_from_url(url: str | ParseResult) -> str:
+    url = url if isinstance(url, ParseResult) else urlparse(url=url)
+    return ".".join(url.netloc.split(".")[-2:])
+
+
 def get_handler_from_url(url: str | ParseResult) -> ServiceHandler:
     url = url if isinstance(url, ParseResult) else urlparse(url=url)
-    domain_name = ".".join(url.netloc.split(".")[-2:])
+    domain_name = get_domain_from_url(url=url)
 
     if domain_name in YoutubeHandler.DOMAINS:
         return YoutubeHandler()
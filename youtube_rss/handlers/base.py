@@ -1,20 +1,31 @@
 from typing import Any, Type
 
+import datetime
+import re
 from abc import abstractmethod
 from urllib.parse import urlparse
 
 from yt_dlp.extractor.common import InfoExtractor
 
+from youtube_rss.services.uuid import generate_uuid_from_url
 from youtube_rss.services.ytdlp import YDL_OPTS_BASE
 
 
 class ServiceHandler:
     USE_PROXY = False
     MEDIA_URL_EXPIRY_INTERVAL = 60 * 60 * 24 * 365  # 1 Year
+    MAX_CONCURRENT_EXTRACTIONS = 4
+    SOURCE_INFO_CACHE_TTL = 60 * 10  # 10 Minutes
+    VIDEO_INFO_CACHE_TTL = 60 * 60  # 1 Hour
     DOMAINS: list[str] = []
     YTDLP_CUSTOM_EXTRACTORS: list[Type[InfoExtractor]] = []
     YDL_OPT_ALLOWED_EXTRACTORS: list[str] = []
 
+    # Fields kept from yt-dlp info_dicts right after extraction. None keeps all fields.
+    SOURCE_INFO_DICT_FIELDS: list[str] | None = None
+    SOURCE_ENTRY_INFO_DICT_FIELDS: list[str] | None = None
+    VIDEO_INFO_DICT_FIELDS: list[str] | None = None
+
     @property
     def name(self) -> str:
         return self.__class__.__name__
@@ -56,6 +67,40 @@ class ServiceHandler:
         """
         return self.sanitize_url(url=url)
 
+    def get_video_id_from_entry_info_dict(self, entry_info_dict: dict[str, Any]) -> str:
+        """
+        Generates the Video id for a 'entry_info_dict' from a 'source_info_dict'.
+
+        Args:
+            entry_info_dict: A dictionary containing information about the video.
+
+        Returns:
+            The Video id.
+        """
+        url = entry_info_dict.get("webpage_url", entry_info_dict["url"])
+        return generate_uuid_from_url(url=self.sanitize_video_url(url=url))
+
+    def get_media_url_expires_at(self, media_url: str) -> datetime.datetime:
+        """
+        Get the time (UTC) at which a media url expires.
+
+        Signed media urls (ie. googlevideo.com) carry their expiry timestamp in an
+        'expire' parameter. Otherwise the url is expected to expire
+        `MEDIA_URL_EXPIRY_INTERVAL` seconds from now.
+
+        Args:
+            media_url: The media url.
+
+        Returns:
+            The expiry time, as a naive UTC datetime.
+        """
+        match = re.search(r"[?&/]expire[=/](\d+)", media_url)
+        if match:
+            return datetime.datetime.utcfromtimestamp(int(match.group(1)))
+        return datetime.datetime.utcnow() + datetime.timedelta(
+            seconds=self.MEDIA_URL_EXPIRY_INTERVAL
+        )
+
     def get_source_ydl_opts(self, extract_flat: bool) -> dict[str, Any]:
         """
         Get the yt-dlp options for a source.
@@ -17,10 +17,44 @@ from .base import ServiceHandler
 
 class RumbleHandler(ServiceHandler):
     USE_PROXY = False
-    MEDIA_URL_REFRESH_INTERVAL = 60 * 60 * 8  # 8 Hours
+    MAX_CONCURRENT_EXTRACTIONS = 2
+    SOURCE_INFO_CACHE_TTL = 60 * 10  # 10 Minutes
+    VIDEO_INFO_CACHE_TTL = 60 * 60 * 4  # 4 Hours
     DOMAINS = ["rumble.com"]
     YTDLP_CUSTOM_EXTRACTORS = [CustomRumbleIE, CustomRumbleChannelIE, CustomRumbleEmbedIE]
     YDL_OPT_ALLOWED_EXTRACTORS = ["CustomRumbleIE", "CustomRumbleEmbed", "CustomRumbleChannel"]
+    SOURCE_INFO_DICT_FIELDS = [
+        "id",
+        "url",
+        "title",
+        "uploader",
+        "thumbnail",
+        "description",
+        "extractor_key",
+    ]
+    SOURCE_ENTRY_INFO_DICT_FIELDS = [
+        "id",
+        "url",
+        "webpage_url",
+        "title",
+        "duration",
+        "thumbnail",
+        "timestamp",
+    ]
+    VIDEO_INFO_DICT_FIELDS = [
+        "id",
+        "webpage_url",
+        "original_url",
+        "title",
+        "uploader",
+        "channel",
+        "description",
+        "duration",
+        "thumbnail",
+        "timestamp",
+        "format_id",
+        "formats",
+    ]
 
     # def sanitize_video_url(self, url: str) -> str:
     #     """
@@ -13,10 +13,42 @@ from .base import ServiceHandler
 
 class YoutubeHandler(ServiceHandler):
     USE_PROXY = True
-    MEDIA_URL_REFRESH_INTERVAL = 60 * 60 * 8  # 8 Hours
+    MEDIA_URL_EXPIRY_INTERVAL = 60 * 60 * 6  # 6 Hours, if the url has no 'expire' parameter
+    MAX_CONCURRENT_EXTRACTIONS = 4
+    SOURCE_INFO_CACHE_TTL = 60 * 10  # 10 Minutes
+    VIDEO_INFO_CACHE_TTL = 60 * 60  # 1 Hour
     DOMAINS = ["youtube.com"]
     YTDLP_CUSTOM_EXTRACTORS: list[Type[InfoExtractor]] = []
     YDL_OPT_ALLOWED_EXTRACTORS: list[str] = []
+    SOURCE_INFO_DICT_FIELDS = [
+        "id",
+        "title",
+        "uploader",
+        "thumbnails",
+        "description",
+        "extractor_key",
+    ]
+    SOURCE_ENTRY_INFO_DICT_FIELDS = [
+        "id",
+        "url",
+        "webpage_url",
+        "title",
+        "description",
+        "upload_date",
+    ]
+    VIDEO_INFO_DICT_FIELDS = [
+        "id",
+        "webpage_url",
+        "title",
+        "uploader",
+        "uploader_id",
+        "description",
+        "duration",
+        "thumbnail",
+        "upload_date",
+        "format_id",
+        "formats",
+    ]
 
     def sanitize_video_url(self, url: str) -> str:
         """
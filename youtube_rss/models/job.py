@@ -0,0 +1,58 @@
+from typing import Any
+
+import datetime
+from enum import Enum
+
+from pydantic import root_validator
+from sqlmodel import Field, SQLModel
+
+
+class JobKind(Enum):
+    REFRESH_SOURCE = "refresh_source"
+    REFRESH_VIDEO = "refresh_video"
+
+
+class JobPriority(int, Enum):
+    LOW = 0
+    NORMAL = 10
+    HIGH = 20
+
+
+class JobBase(SQLModel):
+    id: str = Field(default=None, primary_key=True, nullable=False)
+    kind: str = Field(default=None, nullable=False)
+    entity_id: str = Field(default=None, nullable=False)
+    priority: int = Field(default=JobPriority.NORMAL.value, nullable=False)
+    due_at: datetime.datetime = Field(default=None, index=True, nullable=False)
+    attempts: int = Field(default=0, nullable=False)
+    last_error: str | None = Field(default=None)
+    started_at: datetime.datetime | None = Field(default=None)
+    updated_at: datetime.datetime = Field(default=None)
+
+
+class Job(JobBase, table=True):
+    @root_validator(pre=True)
+    def set_pre_validation_defaults(cls, values: dict[str, Any]) -> dict[str, Any]:
+        return {
+            **values,
+            "id": generate_job_id(kind=values["kind"], entity_id=values["entity_id"]),
+            "updated_at": datetime.datetime.utcnow(),
+        }
+
+
+class JobCreate(JobBase):
+    @root_validator
+    def create_updated_at(cls, values: dict[str, Any | None]) -> dict[str, Any]:
+        values["updated_at"] = datetime.datetime.utcnow()
+        return values
+
+
+class JobUpdate(JobCreate):
+    pass
+
+
+def generate_job_id(kind: str, entity_id: str) -> str:
+    """
+    Generates the id of a Job. There is at most one Job per kind and entity.
+    """
+    return f"{kind}:{entity_id}"
@@ -11,6 +11,15 @@ class Settings(BaseSettings):
 
     # Database
     database_echo: bool = False
+    database_async: bool = False
+    database_busy_timeout_ms: int = 5000
+    database_mmap_size_mb: int = 256
+    database_cache_size_mb: int = 64
+    database_read_pool_size: int = 8
+    query_stats_enabled: bool = True
+    query_stats_history_size: int = 100
+    query_stats_slowest_count: int = 5
+    query_stats_statement_max_length: int = 500
 
     # Server
     server_host: str = "0.0.0.0"
@@ -27,6 +36,8 @@ class Settings(BaseSettings):
     jwt_refresh_secret_key: str = "jwt_refresh_secret_key"
     access_token_expire_minutes: int = 30
     refresh_token_expire_minutes: int = 10080
+    api_page_size: int = 100
+    api_page_size_max: int = 1000
     algorithm: str = "HS256"
 
     # Notify
@@ -41,8 +52,38 @@ class Settings(BaseSettings):
     # Refresh Feeds
     refresh_sources_interval_minutes: int = 15
     refresh_videos_interval_minutes: int = 30
-    max_video_age_hours: int = 8
+    refresh_sources_max_concurrency: int = 8
+    refresh_sources_max_concurrency_per_domain: int = 2
+    refresh_sources_incremental: bool = True
+    media_url_refresh_margin_minutes: int = 60
+    media_url_fetch_timeout_seconds: int = 10
+
+    # Scheduler
+    scheduler_enabled: bool = True
+    scheduler_poll_interval_seconds: int = 60
+    scheduler_batch_size: int = 50
+    scheduler_max_concurrency: int = 8
+    scheduler_backoff_base_seconds: int = 60
+    scheduler_backoff_max_seconds: int = 60 * 60 * 6
+
+    # yt-dlp
+    ytdlp_executor: str = "thread"
+    ytdlp_max_workers: int = 0  # 0 = tuned to the number of CPUs
+    ytdlp_pool_max_idle: int = 4
+    ytdlp_pool_max_lifetime_seconds: int = 60 * 60
+    info_dict_cache_max_size_mb: int = 256
+
+    # Video Archive
+    archive_videos_enabled: bool = True
+    archive_videos_after_days: int = 365
+    archive_videos_keep_per_source: int = 500
+    archive_videos_skip_accessed_days: int = 30
 
     # Build Feeds
     build_feed_recent_videos: int = 10
     build_feed_dateafter: str = "now-2month"
+    feed_cache_max_size_mb: int = 64
+    feed_brotli_quality: int = 9  # 0-11. 11 is many times slower, for a slightly smaller feed
+    feed_build_queue_enabled: bool = True
+    feed_build_debounce_seconds: float = 5.0
+    feed_build_max_concurrency: int = 2
@@ -4,7 +4,8 @@ import datetime
 from enum import Enum
 
 from pydantic import root_validator
-from sqlmodel import Field, Relationship, SQLModel
+from sqlalchemy import Column, ForeignKey, Index
+from sqlmodel import AutoString, Field, Relationship, SQLModel
 
 from youtube_rss.handlers import get_handler_from_url
 from youtube_rss.services.uuid import generate_uuid_from_url
@@ -36,10 +37,23 @@ class SourceBase(SQLModel):
 
 
 class Source(SourceBase, table=True):
+    __table_args__ = (
+        # Keyset pagination order
+        Index("ix_source_updated_at_id", "updated_at", "id"),
+    )
+
+    # Sources are deleted by the database when their user is deleted
+    created_by: str = Field(
+        default=None,
+        sa_column=Column(AutoString, ForeignKey("userdb.id", ondelete="CASCADE"), nullable=False),
+    )
+    # The fingerprint of the content of the last built feed.
+    feed_fingerprint: str | None = Field(default=None)
     videos: list["Video"] = Relationship(
         back_populates="source",
         sa_relationship_kwargs={
             "cascade": "all, delete",  # Instruct the ORM how to track changes to local objects
+            "passive_deletes": True,  # Leave deleting unloaded videos to the database
         },
     )
     created_user: "UserDB" = Relationship(back_populates="sources")
@@ -80,6 +94,11 @@ class SourceRead(SourceBase):
     pass
 
 
+class SourcePage(SQLModel):
+    items: list[SourceRead]
+    next_cursor: str | None = None
+
+
 async def generate_source_id_from_url(url: str) -> str:
     handler = get_handler_from_url(url=url)
     sanitized_source_url = handler.sanitize_source_url(url=url)
@@ -21,6 +21,7 @@ class UserDB(UserBase, table=True):
         back_populates="created_user",
         sa_relationship_kwargs={
             "cascade": "all, delete",  # Instruct the ORM how to track changes to local objects
+            "passive_deletes": True,  # Leave deleting unloaded sources to the database
         },
     )
 
@@ -3,7 +3,8 @@ from typing import TYPE_CHECKING, Any
 import datetime
 
 from pydantic import root_validator
-from sqlmodel import Field, Relationship, SQLModel
+from sqlalchemy import Column, ForeignKey, Index, text
+from sqlmodel import AutoString, Field, Relationship, SQLModel
 
 from youtube_rss.handlers import get_handler_from_url
 from youtube_rss.services.uuid import generate_uuid_from_url
@@ -14,7 +15,7 @@ if TYPE_CHECKING:
 
 class VideoBase(SQLModel):
     id: str = Field(default=None, primary_key=True, nullable=False)
-    source_id: str = Field(default=None, foreign_key="source.id", nullable=False)
+    source_id: str = Field(default=None, foreign_key="source.id", index=True, nullable=False)
     handler: str = Field(default=None, nullable=False)
     uploader: str | None = Field(default=None)
     uploader_id: str | None = Field(default=None)
@@ -26,12 +27,29 @@ class VideoBase(SQLModel):
     media_url: str | None = Field(default=None)
     feed_media_url: str | None = Field(default=None)
     media_filesize: int | None = Field(default=None)
-    released_at: datetime.datetime | None = Field(default=None)
+    media_url_expires_at: datetime.datetime | None = Field(default=None, index=True)
+    released_at: datetime.datetime | None = Field(default=None, index=True)
     added_at: datetime.datetime = Field(default=None)
     updated_at: datetime.datetime = Field(default=None)
 
 
 class Video(VideoBase, table=True):
+    __table_args__ = (
+        # Videos without a media url are refresh candidates, and only a few at a time.
+        Index("ix_video_media_url_is_null", "id", sqlite_where=text("media_url IS NULL")),
+        # Keyset pagination order
+        Index("ix_video_updated_at_id", "updated_at", "id"),
+    )
+
+    # Videos are deleted by the database when their source is deleted
+    source_id: str = Field(
+        default=None,
+        sa_column=Column(
+            AutoString, ForeignKey("source.id", ondelete="CASCADE"), index=True, nullable=False
+        ),
+    )
+    # When the video's media was last requested. Videos in use are not archived.
+    accessed_at: datetime.datetime | None = Field(default=None)
     source: "Source" = Relationship(back_populates="videos")
 
     @root_validator(pre=True)
@@ -76,6 +94,38 @@ class VideoRead(VideoBase):
     source_id: str = Field(default=None, foreign_key="source.id")
 
 
+class VideoPage(SQLModel):
+    items: list[VideoRead]
+    next_cursor: str | None = None
+
+
+class VideoArchive(SQLModel, table=True):
+    """
+    A video moved out of the `video` table, as it is old or outside its source's feed
+    window. Only the fields needed to serve and restore it are kept. It is moved back
+    when its media is requested.
+    """
+
+    id: str = Field(default=None, primary_key=True, nullable=False)
+    source_id: str = Field(
+        default=None,
+        sa_column=Column(
+            AutoString, ForeignKey("source.id", ondelete="CASCADE"), index=True, nullable=False
+        ),
+    )
+    handler: str = Field(default=None, nullable=False)
+    uploader: str | None = Field(default=None)
+    title: str | None = Field(default=None)
+    duration: int | None = Field(default=None)
+    thumbnail: str | None = Field(default=None)
+    url: str = Field(default=None)
+    feed_media_url: str | None = Field(default=None)
+    media_filesize: int | None = Field(default=None)
+    released_at: datetime.datetime | None = Field(default=None)
+    added_at: datetime.datetime = Field(default=None)
+    archived_at: datetime.datetime = Field(default=None, nullable=False)
+
+
 async def generate_video_id_from_url(url: str) -> str:
     handler = get_handler_from_url(url=url)
     sanitized_video_url = handler.sanitize_video_url(url=url)
@@ -0,0 +1,365 @@
+from typing import Any
+
+import contextlib
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from email.utils import formatdate
+from pathlib import Path
+
+from youtube_rss import settings
+from youtube_rss.core.logger import logger
+from youtube_rss.paths import SOURCE_INFO_CACHE_PATH, VIDEO_INFO_CACHE_PATH
+
+CACHE_FILE_SUFFIX = ".json.gz"
+# Eviction frees the cache down to this fraction of `max_bytes`, so a full cache is not
+# scanned on every write.
+CACHE_EVICT_TO_RATIO = 0.9
+# The precompressed variants written next to a feed file, by content-coding, in order of
+# preference.
+FEED_ENCODING_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+
+def get_feed_encoding_path(path: Path, encoding: str) -> Path:
+    """
+    Returns the file path of a precompressed variant of a feed file.
+    """
+    return path.with_name(f"{path.name}{FEED_ENCODING_SUFFIXES[encoding]}")
+
+
+class InfoDictCache:
+    """
+    A size-bounded, on-disk cache of yt-dlp info_dicts.
+
+    Entries are stored as gzipped JSON, keyed by a hash of the url and the extraction
+    options. Entries expire after a ttl given on read, and the least recently used
+    entries are evicted once the cache grows over `max_bytes`.
+
+    The total size of the cache is kept as a running count, so the cache folder is only
+    scanned once, and when entries need to be evicted. The methods do blocking file
+    I/O, and are safe to call from several threads.
+    """
+
+    def __init__(self, path: Path, max_bytes: int) -> None:
+        """
+        Initialize the InfoDictCache object.
+
+        Args:
+            path: The folder to store cache files in.
+            max_bytes: The maximum total size of the cache files.
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._total_bytes: int | None = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_key(
+        url: str,
+        ydl_opts: dict[str, Any],
+        ie_key: str | None = None,
+        fields: list[str] | None = None,
+        entry_fields: list[str] | None = None,
+    ) -> str:
+        """
+        Generates a cache key from a sanitized url and the extraction options.
+
+        Args:
+            url: The sanitized url.
+            ydl_opts: The yt-dlp options used for the extraction.
+            ie_key: The name of the yt-dlp info extractor used for the extraction.
+            fields: The fields the info_dict was projected to.
+            entry_fields: The fields the playlist entries were projected to.
+
+        Returns:
+            str: The cache key.
+        """
+        opts = {key: value for key, value in ydl_opts.items() if key != "logger"}
+        key_data = json.dumps(
+            {
+                "url": url,
+                "ydl_opts": opts,
+                "ie_key": ie_key,
+                "fields": fields,
+                "entry_fields": entry_fields,
+            },
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(key_data.encode()).hexdigest()
+
+    def get_file_path(self, key: str) -> Path:
+        """
+        Returns the file path for a cache key.
+        """
+        return self.path / f"{key}{CACHE_FILE_SUFFIX}"
+
+    def get(self, key: str, ttl: int) -> dict[str, Any] | None:
+        """
+        Get a cached info_dict, if one exists that is younger than `ttl` seconds.
+
+        Args:
+            key: The cache key.
+            ttl: The maximum age of the cached info_dict, in seconds.
+
+        Returns:
+            The cached info_dict, or None.
+        """
+        cache_file = self.get_file_path(key=key)
+        try:
+            entry = json.loads(gzip.decompress(cache_file.read_bytes()))
+            created_at = float(entry["created_at"])
+            info_dict: dict[str, Any] = entry["info_dict"]
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            # Corrupt, or written in an older format.
+            logger.warning(f"Removing unreadable info_dict cache file '{cache_file}'. {e}")
+            self.remove(cache_file=cache_file)
+            self.misses += 1
+            return None
+
+        if time.time() - created_at > ttl:
+            self.remove(cache_file=cache_file)
+            self.misses += 1
+            return None
+
+        # Mark as recently used. It may have been evicted since it was read.
+        with contextlib.suppress(FileNotFoundError):
+            os.utime(cache_file)
+        self.hits += 1
+        return info_dict
+
+    def set(self, key: str, info_dict: dict[str, Any]) -> None:
+        """
+        Saves an info_dict to the cache, then evicts entries if the cache is too large.
+
+        Args:
+            key: The cache key.
+            info_dict: The info_dict to cache.
+        """
+        try:
+            data = json.dumps({"created_at": time.time(), "info_dict": info_dict})
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Unable to cache info_dict. {e}")
+            return
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        cache_file = self.get_file_path(key=key)
+        content = gzip.compress(data.encode())
+        tmp_file = cache_file.with_name(f"{cache_file.name}.{threading.get_ident()}.tmp")
+        tmp_file.write_bytes(content)
+        with self._lock:
+            total_bytes = self.get_total_bytes()
+            try:
+                total_bytes -= cache_file.stat().st_size
+            except FileNotFoundError:
+                pass
+            tmp_file.replace(cache_file)
+            self._total_bytes = total_bytes + len(content)
+            if self._total_bytes > self.max_bytes:
+                self.evict()
+
+    def get_total_bytes(self) -> int:
+        """
+        Returns the total size of the cache files, scanning the cache folder only the
+        first time.
+        """
+        if self._total_bytes is None:
+            self._total_bytes = sum(entry.stat().st_size for entry in self.scan())
+        return self._total_bytes
+
+    def scan(self) -> list[os.DirEntry[str]]:
+        """
+        Returns the cache files.
+        """
+        if not self.path.exists():
+            return []
+        return [
+            entry
+            for entry in os.scandir(self.path)
+            if entry.is_file() and entry.name.endswith(CACHE_FILE_SUFFIX)
+        ]
+
+    def remove(self, cache_file: Path) -> None:
+        """
+        Deletes a cache file.
+        """
+        with self._lock:
+            try:
+                size = cache_file.stat().st_size
+                cache_file.unlink()
+            except FileNotFoundError:
+                return
+            if self._total_bytes is not None:
+                self._total_bytes -= size
+
+    def evict(self) -> None:
+        """
+        Deletes the least recently used entries until the cache fits in
+        `CACHE_EVICT_TO_RATIO` of `max_bytes`. Called with the lock held.
+        """
+        entries = [(entry, entry.stat()) for entry in self.scan()]
+        total_bytes = sum(stat_result.st_size for _, stat_result in entries)
+        target_bytes = self.max_bytes * CACHE_EVICT_TO_RATIO
+        for entry, stat_result in sorted(entries, key=lambda item: item[1].st_mtime):
+            if total_bytes <= target_bytes:
+                break
+            Path(entry.path).unlink(missing_ok=True)
+            total_bytes -= stat_result.st_size
+            self.evictions += 1
+        self._total_bytes = total_bytes
+
+    def clear(self) -> None:
+        """
+        Deletes all entries from the cache.
+        """
+        with self._lock:
+            for entry in self.scan():
+                Path(entry.path).unlink(missing_ok=True)
+            self._total_bytes = 0
+
+
+@dataclass
+class CachedFeed:
+    """
+    The content of a feed file, its precompressed variants, and the validators to
+    serve them with.
+    """
+
+    content: bytes
+    etag: str
+    last_modified: str
+    # The (mtime_ns, size) of the file the content was read from.
+    stat_key: tuple[int, int]
+    encoded_content: dict[str, bytes] = field(default_factory=dict)
+
+    @property
+    def size(self) -> int:
+        return len(self.content) + sum(len(content) for content in self.encoded_content.values())
+
+    def get_etag(self, encoding: str | None = None) -> str:
+        """
+        Returns the strong ETag of the feed, or of one of its precompressed variants.
+        """
+        if encoding is None:
+            return self.etag
+        return f'{self.etag[:-1]}-{encoding}"'
+
+
+class FeedCache:
+    """
+    A size-bounded, in-memory LRU cache of feed files.
+
+    Entries are keyed by file path. Every read checks the file's mtime and size, so a
+    feed written by another process is never served stale; feeds written by this
+    process are invalidated as they are written. The precompressed variants of a feed
+    are only used if they have its mtime, which they are given when they are written
+    with it.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        """
+        Initialize the FeedCache object.
+
+        Args:
+            max_bytes: The maximum total size of the cached feeds.
+        """
+        self.max_bytes = max_bytes
+        self.entries: OrderedDict[Path, CachedFeed] = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, path: Path, stat_result: os.stat_result | None = None) -> CachedFeed:
+        """
+        Get a feed file, from the cache if it is unchanged on disk.
+
+        Args:
+            path: The feed file.
+            stat_result: The stat of the feed file, if it is already known.
+
+        Returns:
+            The cached feed.
+
+        Raises:
+            FileNotFoundError: If the feed file does not exist.
+        """
+        if stat_result is None:
+            stat_result = path.stat()
+        stat_key = (stat_result.st_mtime_ns, stat_result.st_size)
+
+        entry = self.entries.get(path)
+        if entry is not None and entry.stat_key == stat_key:
+            self.entries.move_to_end(path)
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        content = path.read_bytes()
+        entry = CachedFeed(
+            content=content,
+            etag=f'"{hashlib.sha256(content).hexdigest()}"',
+            last_modified=formatdate(stat_result.st_mtime, usegmt=True),
+            stat_key=stat_key,
+        )
+        for encoding in FEED_ENCODING_SUFFIXES:
+            encoded_path = get_feed_encoding_path(path=path, encoding=encoding)
+            try:
+                with encoded_path.open("rb") as file:
+                    # A variant of another build of the feed.
+                    if os.fstat(file.fileno()).st_mtime_ns != stat_result.st_mtime_ns:
+                        continue
+                    entry.encoded_content[encoding] = file.read()
+            except FileNotFoundError:
+                continue
+
+        self.invalidate(path=path)
+        if entry.size <= self.max_bytes:
+            self.entries[path] = entry
+            self.total_bytes += entry.size
+            self.evict()
+        return entry
+
+    def invalidate(self, path: Path) -> None:
+        """
+        Removes a feed file from the cache.
+        """
+        entry = self.entries.pop(path, None)
+        if entry is not None:
+            self.total_bytes -= entry.size
+
+    def evict(self) -> None:
+        """
+        Removes the least recently used entries until the cache fits in `max_bytes`.
+        """
+        while self.total_bytes > self.max_bytes:
+            _, entry = self.entries.popitem(last=False)
+            self.total_bytes -= entry.size
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """
+        Removes all entries from the cache.
+        """
+        self.entries.clear()
+        self.total_bytes = 0
+
+
+source_info_cache = InfoDictCache(
+    path=SOURCE_INFO_CACHE_PATH, max_bytes=settings.info_dict_cache_max_size_mb * 1024 * 1024
+)
+video_info_cache = InfoDictCache(
+    path=VIDEO_INFO_CACHE_PATH, max_bytes=settings.info_dict_cache_max_size_mb * 1024 * 1024
+)
+feed_cache = FeedCache(max_bytes=settings.feed_cache_max_size_mb * 1024 * 1024)
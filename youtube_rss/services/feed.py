@@ -1,15 +1,59 @@
+import asyncio
 import datetime
+import functools
+import gzip
+import hashlib
+import json
+import os
 from pathlib import Path
 
 from feedgen.feed import FeedGenerator
 
 from youtube_rss import settings
+from youtube_rss.core.database import DBSession, db_commit, load_relationships
 from youtube_rss.core.logger import logger
 from youtube_rss.models.source import Source
+from youtube_rss.models.video import Video
 from youtube_rss.paths import FEEDS_PATH
+from youtube_rss.services.cache import (
+    FEED_ENCODING_SUFFIXES,
+    CachedFeed,
+    feed_cache,
+    get_feed_encoding_path,
+)
+from youtube_rss.services.rss import get_feed_published_at, get_published_date, write_rss
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None  # type: ignore[assignment]
+
+# Bump when the feed format changes, so every feed is rebuilt once.
+FEED_FORMAT_VERSION = 2
+# The fields that the feed is generated from.
+FEED_SOURCE_FIELDS = ["id", "name", "author", "url", "logo", "description", "feed_url", "added_at"]
+FEED_VIDEO_FIELDS = [
+    "id",
+    "uploader",
+    "title",
+    "url",
+    "description",
+    "feed_media_url",
+    "media_filesize",
+    "duration",
+    "thumbnail",
+    "released_at",
+    "added_at",
+]
 
 
 class SourceFeedGenerator(FeedGenerator):
+    """
+    Generates a feed with feedgen, as a tree in memory. Feeds are written with the
+    streaming `write_rss` instead, which gives the same output; this is the reference
+    it is tested against.
+    """
+
     def __init__(self, source: Source):
         """
         Initialize the SourceFeedGenerator object.
@@ -38,7 +82,6 @@ class SourceFeedGenerator(FeedGenerator):
         self.logo(f"{source.logo}?=.jpg")
         self.subtitle("Generated by YoutubeRSS")
         self.description(source.description)
-        self.pubDate(datetime.datetime.now(tz=datetime.timezone.utc))
         self.podcast.itunes_author(  # type: ignore # pylint: disable=no-member
             itunes_author=source.author
         )
@@ -49,7 +92,7 @@ class SourceFeedGenerator(FeedGenerator):
         # Generate Feed Posts
         for video in source.videos:
 
-            published_at = self._get_published_date(
+            published_at = get_published_date(
                 added_at=video.added_at, released_at=video.released_at
             )
 
@@ -73,25 +116,10 @@ class SourceFeedGenerator(FeedGenerator):
                 itunes_image=f"{video.thumbnail}?=.jpg"
             )  # type: ignore # pylint: disable=no-member
 
-    def _get_published_date(
-        self, added_at: datetime.datetime, released_at: datetime.datetime | None
-    ) -> datetime.datetime:
-        """
-        Returns an estimated published date.
-
-        Args:
-            added_at: The date the video was added to the database.
-            released_at: The date the video was released on YouTube.
-
-        Returns:
-            The latest date between `released_at` and `added_at`.
-        """
-        if not released_at:
-            return added_at
-        if released_at.date() == added_at.date():
-            if released_at.time() == datetime.time(0, 0, 0):
-                return added_at
-        return released_at
+        feed_published_at = get_feed_published_at(source=source, videos=source.videos)
+        if feed_published_at:
+            self.pubDate(feed_published_at)
+            self.lastBuildDate(feed_published_at)
 
     async def save(self) -> Path:
         """
@@ -123,15 +151,116 @@ async def get_rss_file(source_id: str) -> Path:
     return rss_file
 
 
+async def get_rss_feed(source_id: str) -> CachedFeed:
+    """
+    Returns the content of a rss file, from the in-memory feed cache.
+    """
+    rss_file = get_rss_file_path(source_id=source_id)
+    try:
+        return feed_cache.get(path=rss_file)
+    except FileNotFoundError as exc:
+        err_msg = f"RSS file ({source_id}.rss) does not exist for ({source_id=})"
+        logger.warning(err_msg)
+        raise FileNotFoundError(err_msg) from exc
+
+
 async def delete_rss_file(source_id: str) -> None:
     rss_file = get_rss_file_path(source_id=source_id)
+    feed_cache.invalidate(path=rss_file)
+    for encoding in FEED_ENCODING_SUFFIXES:
+        get_feed_encoding_path(path=rss_file, encoding=encoding).unlink(missing_ok=True)
     rss_file.unlink()
 
 
-async def build_rss_file(source: Source) -> Path:
+def compress_feed(content: bytes) -> dict[str, bytes]:
     """
-    Builds a .rss file for source_id, saves it to disk.
+    Returns the precompressed variants of a feed, by content-coding. Brotli is only
+    used if the `brotli` package is installed, at `settings.feed_brotli_quality`.
     """
-    feed = SourceFeedGenerator(source=source)
-    rss_file = await feed.save()
+    encoded_content = {"gzip": gzip.compress(content, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        encoded_content["br"] = brotli.compress(content, quality=settings.feed_brotli_quality)
+    return encoded_content
+
+
+def write_rss_file(
+    rss_file: Path, source: Source, videos: list[Video], published_at: datetime.datetime | None
+) -> None:
+    """
+    Streams a feed to `rss_file`, and writes its precompressed variants next to it.
+    This writes files and compresses the feed, so it is run on an executor.
+    """
+    # Written next to the feed, then moved over it, so it is never served half written.
+    tmp_rss_file = rss_file.with_suffix(".rss.tmp")
+    with tmp_rss_file.open("wb") as file:
+        write_rss(file=file, source=source, videos=videos, published_at=published_at)
+    mtime_ns = tmp_rss_file.stat().st_mtime_ns
+
+    # The variants get the mtime of the feed, which is how they are matched to it, and
+    # are moved in place before it.
+    for encoding, content in compress_feed(content=tmp_rss_file.read_bytes()).items():
+        encoded_file = get_feed_encoding_path(path=rss_file, encoding=encoding)
+        tmp_encoded_file = encoded_file.with_name(f"{encoded_file.name}.tmp")
+        tmp_encoded_file.write_bytes(content)
+        os.utime(tmp_encoded_file, ns=(mtime_ns, mtime_ns))
+        tmp_encoded_file.replace(encoded_file)
+    tmp_rss_file.replace(rss_file)
+
+
+def get_feed_fingerprint(source: Source) -> str:
+    """
+    Returns a hash of everything the feed of a source is generated from.
+    """
+    fingerprint = hashlib.sha256()
+    fingerprint.update(
+        json.dumps(
+            [
+                FEED_FORMAT_VERSION,
+                settings.base_url,
+                *[getattr(source, field) for field in FEED_SOURCE_FIELDS],
+            ],
+            default=str,
+        ).encode()
+    )
+    for video in source.videos:
+        fingerprint.update(
+            json.dumps([getattr(video, field) for field in FEED_VIDEO_FIELDS], default=str).encode()
+        )
+    return fingerprint.hexdigest()
+
+
+async def build_rss_file(source: Source, db: DBSession) -> Path:
+    """
+    Builds a .rss file for source_id, and streams it to disk, next to its precompressed
+    variants.
+
+    The build is skipped if the source and its videos are unchanged since the last
+    build, per the fingerprint stored with the source.
+    """
+    await load_relationships(db, source, ["videos"])
+    fingerprint = get_feed_fingerprint(source=source)
+    rss_file = get_rss_file_path(source_id=source.id)
+    if fingerprint == source.feed_fingerprint and rss_file.exists():
+        logger.debug(f"RSS file for Source(id='{source.id}') is unchanged.")
+        return rss_file
+
+    # feedgen prepends its entries, so the feed lists the videos newest added first.
+    videos = list(reversed(source.videos))
+    published_at = get_feed_published_at(source=source, videos=videos)
+    # The fingerprint read every field the feed is written from, so the executor thread
+    # does not load anything from the session.
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(
+        None,
+        functools.partial(
+            write_rss_file,
+            rss_file=rss_file,
+            source=source,
+            videos=videos,
+            published_at=published_at,
+        ),
+    )
+    feed_cache.invalidate(path=rss_file)
+    source.feed_fingerprint = fingerprint
+    await db_commit(db)
     return rss_file
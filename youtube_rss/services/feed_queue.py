@@ -0,0 +1,227 @@
+import asyncio
+from dataclasses import dataclass
+from pathlib import Path
+
+from youtube_rss import crud, settings
+from youtube_rss.core.database import DBBind, DBSession, open_session
+from youtube_rss.core.logger import logger
+from youtube_rss.core.query_stats import track_queries
+from youtube_rss.models.source import Source
+from youtube_rss.services.feed import build_rss_file, get_rss_file_path
+
+
+@dataclass
+class PendingBuild:
+    """
+    A feed that is marked dirty, and the future of its build.
+    """
+
+    due_at: float
+    future: "asyncio.Future[Path]"
+
+
+def _retrieve_exception(future: "asyncio.Future[Path]") -> None:
+    # Callers do not have to wait for a build; its errors are logged by the worker.
+    if not future.cancelled():
+        future.exception()
+
+
+class FeedBuildQueue:
+    """
+    A queue of feeds to rebuild, run by a background worker.
+
+    Sources are marked dirty rather than rebuilt right away. All the marks of a source
+    within `debounce_seconds` of the first are coalesced into one build, and at most
+    `max_concurrency` feeds are built at a time. A source that is marked while its feed
+    is being built is built again after.
+    """
+
+    def __init__(self, debounce_seconds: float, max_concurrency: int) -> None:
+        """
+        Initialize the FeedBuildQueue object.
+
+        Args:
+            debounce_seconds: How long to wait for more changes to a source before
+                rebuilding its feed.
+            max_concurrency: The maximum number of feeds to build at a time.
+        """
+        self.debounce_seconds = debounce_seconds
+        self.max_concurrency = max_concurrency
+        self.pending: dict[str, PendingBuild] = {}
+        self.building: set[str] = set()
+        self.builds = 0
+        self.coalesced = 0
+        self.failures = 0
+        self._task: asyncio.Task[None] | None = None
+        self._build_tasks: set[asyncio.Task[None]] = set()
+        self._wakeup = asyncio.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def mark_dirty(self, source_id: str, debounce: bool = True) -> "asyncio.Future[Path]":
+        """
+        Marks the feed of a source as needing a rebuild.
+
+        Args:
+            source_id: The id of the source.
+            debounce: Whether to wait `debounce_seconds` for more changes. If False, the
+                build is due now, including a build that is already pending.
+
+        Returns:
+            A future of the rebuilt .rss file, shared by all the marks it coalesces.
+        """
+        loop = asyncio.get_running_loop()
+        due_at = loop.time() + (self.debounce_seconds if debounce else 0)
+        pending = self.pending.get(source_id)
+        if pending is not None:
+            self.coalesced += 1
+            if due_at < pending.due_at:
+                pending.due_at = due_at
+                self._wakeup.set()
+            return pending.future
+
+        future: asyncio.Future[Path] = loop.create_future()
+        future.add_done_callback(_retrieve_exception)
+        self.pending[source_id] = PendingBuild(due_at=due_at, future=future)
+        self._wakeup.set()
+        return future
+
+    async def submit(self, source: Source, db: DBSession) -> None:
+        """
+        Queues a rebuild of the feed of a source, without waiting for it. If the queue is
+        not running, the feed is built right away in `db`.
+
+        A source that has no feed yet, such as a new source, is built without the
+        debounce, and waited for, so its feed is not missing until the debounce ends.
+
+        Args:
+            source: The source.
+            db (DBSession): The database session, for a build that is not queued.
+        """
+        if not self.running:
+            await build_rss_file(source=source, db=db)
+        elif not get_rss_file_path(source_id=source.id).exists():
+            await self.build(source=source, db=db, debounce=False)
+        else:
+            self.mark_dirty(source_id=source.id)
+
+    async def build(self, source: Source, db: DBSession, debounce: bool = True) -> Path:
+        """
+        Queues a rebuild of the feed of a source, and waits for it to complete. If the
+        queue is not running, the feed is built right away in `db`.
+
+        Args:
+            source: The source.
+            db (DBSession): The database session, for a build that is not queued.
+            debounce: Whether to wait `debounce_seconds` for more changes.
+
+        Returns:
+            The .rss file.
+        """
+        if not self.running:
+            return await build_rss_file(source=source, db=db)
+        # Shielded, so a cancelled caller does not cancel the build for the others.
+        return await asyncio.shield(self.mark_dirty(source_id=source.id, debounce=debounce))
+
+    async def _build(
+        self,
+        source_id: str,
+        future: "asyncio.Future[Path]",
+        bind: DBBind,
+        semaphore: asyncio.Semaphore,
+    ) -> None:
+        """
+        Builds the feed of a source in its own database session. The rows are read on
+        the event loop, and the feed is written and compressed on an executor thread,
+        so up to `max_concurrency` builds run in parallel.
+        """
+        try:
+            async with semaphore:
+                with track_queries(name="job build_feed", record=settings.query_stats_enabled):
+                    async with open_session(bind=bind) as db:
+                        source = await crud.source.get(id=source_id, db=db, load="videos")
+                        rss_file = await build_rss_file(source=source, db=db)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:  # pylint: disable=broad-except
+            self.failures += 1
+            logger.error(f"Failed to build the feed of Source(id='{source_id}'). {e}")
+            future.set_exception(e)
+        else:
+            self.builds += 1
+            future.set_result(rss_file)
+        finally:
+            self.building.discard(source_id)
+            self._wakeup.set()
+
+    async def run(self, bind: DBBind) -> None:
+        """
+        The worker loop. Starts the builds that are due, then sleeps until the next one
+        is due or a source is marked dirty.
+
+        Args:
+            bind: The database engine or connection.
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        while True:
+            self._wakeup.clear()
+            now = loop.time()
+            for source_id, pending in list(self.pending.items()):
+                if pending.due_at > now or source_id in self.building:
+                    continue
+                del self.pending[source_id]
+                self.building.add(source_id)
+                task = asyncio.create_task(
+                    self._build(
+                        source_id=source_id, future=pending.future, bind=bind, semaphore=semaphore
+                    )
+                )
+                self._build_tasks.add(task)
+                task.add_done_callback(self._build_tasks.discard)
+
+            next_due_at = min(
+                (
+                    pending.due_at
+                    for source_id, pending in self.pending.items()
+                    if source_id not in self.building
+                ),
+                default=None,
+            )
+            timeout = None if next_due_at is None else max(next_due_at - loop.time(), 0)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self, bind: DBBind) -> None:
+        """
+        Starts the worker loop in the background.
+        """
+        if not self.running:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self.run(bind=bind))
+
+    async def stop(self) -> None:
+        """
+        Stops the worker loop and the running builds. Builds that are still pending are
+        cancelled.
+        """
+        tasks = [*self._build_tasks, *([self._task] if self._task is not None else [])]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+        for pending in self.pending.values():
+            pending.future.cancel()
+        self.pending.clear()
+
+
+feed_build_queue = FeedBuildQueue(
+    debounce_seconds=settings.feed_build_debounce_seconds,
+    max_concurrency=settings.feed_build_max_concurrency,
+)
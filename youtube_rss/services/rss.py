@@ -0,0 +1,191 @@
+from typing import BinaryIO, Iterable
+
+import datetime
+import re
+from xml.sax.saxutils import escape
+
+from feedgen.util import formatRFC2822
+
+from youtube_rss import settings
+from youtube_rss.models.source import Source
+from youtube_rss.models.video import Video
+
+# The same RSS 2.0 + iTunes output as feedgen's `FeedGenerator.rss_file(pretty=True)`
+# for a `SourceFeedGenerator`, written element by element rather than built as a tree.
+RSS_HEADER = (
+    "<?xml version='1.0' encoding='UTF-8'?>\n"
+    '<rss xmlns:itunes="http://www.itunes.com/dtds/podcast-1.0.dtd" '
+    'xmlns:atom="http://www.w3.org/2005/Atom" '
+    'xmlns:content="http://purl.org/rss/1.0/modules/content/" version="2.0">\n'
+    "  <channel>\n"
+)
+RSS_FOOTER = "  </channel>\n</rss>\n"
+RSS_DEFAULT_DESCRIPTION = "Generated by YoutubeRSS"
+
+# Characters that are not allowed in XML 1.0. lxml refuses them too.
+_INVALID_XML_CHARS = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ud800-\udfff\ufffe\uffff]")
+
+
+def _check_xml_chars(value: str) -> str:
+    if _INVALID_XML_CHARS.search(value):
+        raise ValueError(
+            "All strings must be XML compatible: Unicode or ASCII, no NULL bytes or "
+            "control characters"
+        )
+    return value
+
+
+def _text(value: str) -> str:
+    """
+    Escapes element text, like lxml.
+    """
+    return escape(_check_xml_chars(value), {"\r": "&#13;"})
+
+
+def _attribute(value: str) -> str:
+    """
+    Escapes an attribute value, like lxml.
+    """
+    return escape(
+        _check_xml_chars(value), {'"': "&quot;", "\n": "&#10;", "\r": "&#13;", "\t": "&#9;"}
+    )
+
+
+def get_published_date(
+    added_at: datetime.datetime, released_at: datetime.datetime | None
+) -> datetime.datetime:
+    """
+    Returns an estimated published date.
+
+    Args:
+        added_at: The date the video was added to the database.
+        released_at: The date the video was released on YouTube.
+
+    Returns:
+        The latest date between `released_at` and `added_at`.
+    """
+    if not released_at:
+        return added_at
+    if released_at.date() == added_at.date():
+        if released_at.time() == datetime.time(0, 0, 0):
+            return added_at
+    return released_at
+
+
+def get_feed_published_at(source: Source, videos: Iterable[Video]) -> datetime.datetime | None:
+    """
+    Returns the date of a feed: the published date of its newest video. The feed is
+    not dated by when it is built, so an unchanged feed stays identical.
+    """
+    published_dates = [source.added_at] if source.added_at else []
+    published_dates += [
+        get_published_date(added_at=video.added_at, released_at=video.released_at)
+        for video in videos
+    ]
+    if not published_dates:
+        return None
+    return max(
+        published_date.replace(tzinfo=datetime.timezone.utc) for published_date in published_dates
+    )
+
+
+def get_rss_channel(source: Source, published_at: datetime.datetime | None) -> str:
+    """
+    Returns the channel elements of a source's feed, before its items.
+
+    Raises:
+        ValueError: If the source has no name, url or description.
+    """
+    # The model defaults it to None, although it is annotated as `str`.
+    description: str | None = source.description
+    if description is None:
+        description = RSS_DEFAULT_DESCRIPTION
+    if not (source.name and source.url and description):
+        missing = [
+            name
+            for name, value in (
+                ("title", source.name),
+                ("link", source.url),
+                ("description", description),
+            )
+            if not value
+        ]
+        raise ValueError(f"Required fields not set ({', '.join(missing)})")
+
+    logo = f"{source.logo}?=.jpg"
+    feed_url = f"{settings.base_url}{source.feed_url}"
+    build_date = formatRFC2822(published_at or datetime.datetime.now(tz=datetime.timezone.utc))
+    lines = [
+        f"    <title>{_text(source.name)}</title>\n",
+        f"    <link>{_text(source.url)}</link>\n",
+        f"    <description>{_text(description)}</description>\n",
+        f'    <atom:link href="{_attribute(feed_url)}" rel="self"/>\n',
+        "    <docs>http://www.rssboard.org/rss-specification</docs>\n",
+        "    <generator>python-feedgen</generator>\n",
+        "    <image>\n",
+        f"      <url>{_text(logo)}</url>\n",
+        f"      <title>{_text(source.name)}</title>\n",
+        f"      <link>{_text(source.url)}</link>\n",
+        "    </image>\n",
+        f"    <lastBuildDate>{build_date}</lastBuildDate>\n",
+    ]
+    if published_at:
+        lines.append(f"    <pubDate>{formatRFC2822(published_at)}</pubDate>\n")
+    if source.author:
+        lines.append(f"    <itunes:author>{_text(source.author)}</itunes:author>\n")
+    lines.append(f'    <itunes:image href="{_attribute(logo)}"/>\n')
+    return "".join(lines)
+
+
+def get_rss_item(video: Video) -> str:
+    """
+    Returns the item element of a video.
+    """
+    published_at = get_published_date(added_at=video.added_at, released_at=video.released_at)
+    lines = ["    <item>\n"]
+    if video.title:
+        lines.append(f"      <title>{_text(video.title)}</title>\n")
+    if video.url:
+        lines.append(f"      <link>{_text(video.url)}</link>\n")
+    lines.append(f"      <description>{_text(video.description or ' ')}</description>\n")
+    if video.id:
+        lines.append(f'      <guid isPermaLink="false">{_text(video.id)}</guid>\n')
+    # TODO: Handle non-mp4 files as well
+    media_url = f"{settings.base_url}{video.feed_media_url}"
+    lines.append(
+        f'      <enclosure url="{_attribute(media_url)}" '
+        f'length="{_attribute(str(video.media_filesize))}" type="video/mp4"/>\n'
+    )
+    lines.append(
+        f"      <pubDate>"
+        f"{formatRFC2822(published_at.replace(tzinfo=datetime.timezone.utc))}"
+        f"</pubDate>\n"
+    )
+    lines.append(f'      <itunes:image href="{_attribute(f"{video.thumbnail}?=.jpg")}"/>\n')
+    if video.duration is not None:
+        lines.append(f"      <itunes:duration>{video.duration}</itunes:duration>\n")
+    lines.append("    </item>\n")
+    return "".join(lines)
+
+
+def write_rss(
+    file: BinaryIO,
+    source: Source,
+    videos: Iterable[Video],
+    published_at: datetime.datetime | None,
+) -> None:
+    """
+    Writes the feed of a source to a file, one item at a time, so the whole feed is
+    never held in memory.
+
+    Args:
+        file: The file to write to.
+        source: The source of the feed.
+        videos: The videos of the feed, in feed order.
+        published_at: The date of the feed, from `get_feed_published_at`.
+    """
+    file.write(RSS_HEADER.encode())
+    file.write(get_rss_channel(source=source, published_at=published_at).encode())
+    for video in videos:
+        file.write(get_rss_item(video=video).encode())
+    file.write(RSS_FOOTER.encode())
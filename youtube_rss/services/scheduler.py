@@ -0,0 +1,358 @@
+from typing import Awaitable, Callable
+
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlmodel import col, select
+
+from youtube_rss import crud, settings
+from youtube_rss.core.database import (
+    DBBind,
+    DBSession,
+    db_exec,
+    db_rollback,
+    load_relationships,
+    open_session,
+)
+from youtube_rss.core.logger import logger
+from youtube_rss.core.query_stats import track_queries
+from youtube_rss.models.job import Job, JobCreate, JobKind, JobPriority
+from youtube_rss.models.source import Source
+from youtube_rss.models.video import Video
+from youtube_rss.services.videos import get_naive_utc, get_videos_needing_refresh
+
+# The running scheduler worker loop, if started.
+_scheduler_task: asyncio.Task[None] | None = None
+
+
+def get_video_refresh_due_at(video: Video) -> datetime:
+    """
+    Get when a video's media url needs to be refreshed: just before it expires.
+
+    Args:
+        video: The video.
+
+    Returns:
+        The due time (UTC).
+    """
+    if video.media_url is None or video.media_url_expires_at is None:
+        return datetime.utcnow() + timedelta(minutes=settings.refresh_videos_interval_minutes)
+    return get_naive_utc(video.media_url_expires_at) - timedelta(
+        minutes=settings.media_url_refresh_margin_minutes
+    )
+
+
+def get_backoff_seconds(attempts: int) -> int:
+    """
+    Get the delay before retrying a job that failed `attempts` times in a row.
+    The delay doubles with each attempt, up to `scheduler_backoff_max_seconds`.
+    """
+    return int(
+        min(
+            settings.scheduler_backoff_base_seconds * 2 ** max(attempts - 1, 0),
+            settings.scheduler_backoff_max_seconds,
+        )
+    )
+
+
+async def schedule_source_jobs(
+    db: DBSession,
+    sources: list[Source],
+    due_at: datetime | None = None,
+    priority: JobPriority = JobPriority.NORMAL,
+) -> None:
+    """
+    Schedule a refresh job for each source.
+
+    Args:
+        db (DBSession): The database session.
+        sources: The sources to refresh.
+        due_at: When the sources are due for a refresh (UTC). Defaults to now.
+        priority: The priority of the jobs.
+    """
+    due_at = due_at or datetime.utcnow()
+    await crud.job.schedule_many(
+        db=db,
+        jobs=[
+            JobCreate(
+                kind=JobKind.REFRESH_SOURCE.value,
+                entity_id=source.id,
+                due_at=due_at,
+                priority=priority.value,
+            )
+            for source in sources
+        ],
+    )
+
+
+async def schedule_video_jobs(
+    db: DBSession, videos: list[Video], priority: JobPriority = JobPriority.NORMAL
+) -> None:
+    """
+    Schedule a refresh job for each video, due just before its media url expires.
+
+    Args:
+        db (DBSession): The database session.
+        videos: The videos to refresh.
+        priority: The priority of the jobs.
+    """
+    await crud.job.schedule_many(
+        db=db,
+        jobs=[
+            JobCreate(
+                kind=JobKind.REFRESH_VIDEO.value,
+                entity_id=video.id,
+                due_at=get_video_refresh_due_at(video=video),
+                priority=priority.value,
+            )
+            for video in videos
+        ],
+    )
+
+
+async def sync_jobs(db: DBSession) -> None:
+    """
+    Schedule jobs for the sources and videos that do not have one yet, ie. after
+    upgrading from a version without the scheduler.
+
+    Args:
+        db (DBSession): The database session.
+    """
+    scheduled_source_ids = select(Job.entity_id).where(Job.kind == JobKind.REFRESH_SOURCE.value)
+    sources = (
+        await db_exec(db, select(Source).where(col(Source.id).not_in(scheduled_source_ids)))
+    ).all()
+    if sources:
+        logger.info(f"Scheduling refresh jobs for {len(sources)} sources.")
+        await schedule_source_jobs(db=db, sources=sources)
+
+    scheduled_video_ids = select(Job.entity_id).where(Job.kind == JobKind.REFRESH_VIDEO.value)
+    videos = (
+        await db_exec(db, select(Video).where(col(Video.id).not_in(scheduled_video_ids)))
+    ).all()
+    if videos:
+        logger.info(f"Scheduling refresh jobs for {len(videos)} videos.")
+        await schedule_video_jobs(db=db, videos=videos)
+
+
+async def run_refresh_source_job(entity_id: str, db: DBSession) -> datetime:
+    """
+    Refreshes a source, and schedules refresh jobs for its videos.
+
+    Returns:
+        When the source is due for its next refresh (UTC).
+    """
+    db_source = await crud.source.fetch_source(source_id=entity_id, db=db)
+    await load_relationships(db, db_source, ["videos"])
+    await schedule_video_jobs(db=db, videos=db_source.videos)
+    return datetime.utcnow() + timedelta(minutes=settings.refresh_sources_interval_minutes)
+
+
+async def run_refresh_video_jobs(jobs: list[Job], bind: DBBind) -> None:
+    """
+    Runs the refresh jobs of a source's videos in one database session, so the videos
+    that are about to expire are fetched concurrently and written with one batched
+    update. Each job is then rescheduled, retried or deleted on its own, like in
+    `run_job`.
+
+    Args:
+        jobs: The refresh video jobs of one source.
+        bind: The database engine or connection.
+    """
+    with track_queries(
+        name=f"job {JobKind.REFRESH_VIDEO.value}", record=settings.query_stats_enabled
+    ):
+        async with open_session(bind=bind) as db:
+            try:
+                db_videos = {
+                    db_video.id: db_video
+                    for db_video in await crud.video.get_many(
+                        db, col(Video.id).in_([job.entity_id for job in jobs])
+                    )
+                }
+                videos_needing_refresh = get_videos_needing_refresh(videos=list(db_videos.values()))
+                refreshed_videos, errors = (
+                    await crud.video.fetch_videos_with_errors(
+                        video_ids=[video.id for video in videos_needing_refresh], db=db
+                    )
+                    if videos_needing_refresh
+                    else ([], {})
+                )
+            except Exception as e:  # pylint: disable=broad-except
+                await db_rollback(db)
+                for job in jobs:
+                    await fail_job(job=job, error=e, db=db)
+                return
+
+            db_videos.update({video.id: video for video in refreshed_videos})
+            for job in jobs:
+                if job.entity_id not in db_videos:
+                    logger.warning(f"Deleting Job(id='{job.id}'), as its entity no longer exists.")
+                    await crud.job.delete(id=job.id, db=db)
+                elif job.entity_id in errors:
+                    await fail_job(job=job, error=errors[job.entity_id], db=db)
+                else:
+                    await crud.job.complete(
+                        db=db,
+                        job_id=job.id,
+                        next_due_at=get_video_refresh_due_at(video=db_videos[job.entity_id]),
+                    )
+
+
+JOB_RUNNERS: dict[str, Callable[[str, DBSession], Awaitable[datetime]]] = {
+    JobKind.REFRESH_SOURCE.value: run_refresh_source_job,
+}
+
+
+async def fail_job(job: Job, error: Exception, db: DBSession) -> None:
+    """
+    Marks a job as failed, and schedules its retry with exponential backoff.
+
+    Args:
+        job: The job that failed.
+        error: The error the job failed with.
+        db (DBSession): The database session.
+    """
+    backoff_seconds = get_backoff_seconds(attempts=job.attempts + 1)
+    logger.error(
+        f"Job(id='{job.id}') failed {job.attempts + 1} time(s). "
+        f"Retrying in {backoff_seconds}s. {error}"
+    )
+    await crud.job.fail(
+        db=db,
+        job_id=job.id,
+        error=str(error),
+        next_due_at=datetime.utcnow() + timedelta(seconds=backoff_seconds),
+    )
+
+
+async def run_job(job: Job, bind: DBBind) -> bool:
+    """
+    Runs a job in its own database session, then reschedules it. A failed job is
+    retried with exponential backoff. A job for a deleted entity is deleted.
+
+    Args:
+        job: The job to run.
+        bind: The database engine or connection.
+
+    Returns:
+        True if the job succeeded.
+    """
+    with track_queries(name=f"job {job.kind}", record=settings.query_stats_enabled):
+        async with open_session(bind=bind) as db:
+            try:
+                next_due_at = await JOB_RUNNERS[job.kind](job.entity_id, db)
+            except crud.RecordNotFoundError:
+                logger.warning(f"Deleting Job(id='{job.id}'), as its entity no longer exists.")
+                await db_rollback(db)
+                await crud.job.delete(id=job.id, db=db)
+                return False
+            except Exception as e:  # pylint: disable=broad-except
+                await db_rollback(db)
+                await fail_job(job=job, error=e, db=db)
+                return False
+            await crud.job.complete(db=db, job_id=job.id, next_due_at=next_due_at)
+            return True
+
+
+async def run_due_jobs(bind: DBBind, limit: int | None = None) -> list[Job]:
+    """
+    Runs the jobs that are due, highest priority and most overdue first. The refresh
+    jobs of the videos of a source run as one batch.
+
+    Args:
+        bind: The database engine or connection.
+        limit: The maximum number of jobs to run. Defaults to `scheduler_batch_size`.
+
+    Returns:
+        The jobs that were run.
+    """
+    now = datetime.utcnow()
+    async with open_session(bind=bind) as db:
+        jobs = await crud.job.get_due(db=db, now=now, limit=limit or settings.scheduler_batch_size)
+        await crud.job.start(db=db, jobs=jobs, now=now)
+        video_jobs = [job for job in jobs if job.kind == JobKind.REFRESH_VIDEO.value]
+        source_ids = await crud.video.get_source_ids(
+            db=db, video_ids=[job.entity_id for job in video_jobs]
+        )
+
+    # Jobs of videos that no longer exist are batched together, and deleted.
+    video_jobs_by_source: dict[str | None, list[Job]] = {}
+    for job in video_jobs:
+        video_jobs_by_source.setdefault(source_ids.get(job.entity_id), []).append(job)
+
+    semaphore = asyncio.Semaphore(settings.scheduler_max_concurrency)
+
+    async def _run_job(job: Job) -> None:
+        async with semaphore:
+            await run_job(job=job, bind=bind)
+
+    async def _run_video_jobs(jobs: list[Job]) -> None:
+        async with semaphore:
+            await run_refresh_video_jobs(jobs=jobs, bind=bind)
+
+    await asyncio.gather(
+        *[_run_job(job=job) for job in jobs if job.kind != JobKind.REFRESH_VIDEO.value],
+        *[_run_video_jobs(jobs=batch) for batch in video_jobs_by_source.values()],
+    )
+    return jobs
+
+
+async def get_seconds_until_next_job(bind: DBBind) -> float:
+    """
+    Get the number of seconds until the next job is due, at most
+    `scheduler_poll_interval_seconds`.
+    """
+    async with open_session(bind=bind) as db:
+        next_due_at = await crud.job.get_next_due_at(db=db)
+    if next_due_at is None:
+        return settings.scheduler_poll_interval_seconds
+    seconds = (next_due_at - datetime.utcnow()).total_seconds()
+    return min(max(seconds, 0), settings.scheduler_poll_interval_seconds)
+
+
+async def run_scheduler(bind: DBBind) -> None:
+    """
+    The scheduler worker loop. Runs due jobs, then sleeps until the next job is due.
+
+    Args:
+        bind: The database engine or connection.
+    """
+    async with open_session(bind=bind) as db:
+        await crud.job.reset_started(db=db)
+        await sync_jobs(db=db)
+
+    while True:
+        try:
+            jobs = await run_due_jobs(bind=bind)
+            if jobs:
+                logger.debug(f"Scheduler ran {len(jobs)} jobs.")
+            await asyncio.sleep(await get_seconds_until_next_job(bind=bind))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:  # pylint: disable=broad-except
+            logger.error(f"Scheduler error. {e}")
+            await asyncio.sleep(settings.scheduler_poll_interval_seconds)
+
+
+def start_scheduler(bind: DBBind) -> None:
+    """
+    Starts the scheduler worker loop in the background.
+    """
+    global _scheduler_task  # pylint: disable=global-statement
+    if _scheduler_task is None or _scheduler_task.done():
+        _scheduler_task = asyncio.create_task(run_scheduler(bind=bind))
+
+
+async def stop_scheduler() -> None:
+    """
+    Stops the scheduler worker loop, if it is running.
+    """
+    global _scheduler_task  # pylint: disable=global-statement
+    if _scheduler_task is not None:
+        _scheduler_task.cancel()
+        try:
+            await _scheduler_task
+        except asyncio.CancelledError:
+            pass
+        _scheduler_task = None
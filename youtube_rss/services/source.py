@@ -1,11 +1,22 @@
 from typing import Any
 
-from sqlmodel import Session
-
-from youtube_rss import crud
-from youtube_rss.handlers import get_handler_from_url
+import asyncio
+import datetime
+
+from youtube_rss import crud, settings
+from youtube_rss.core.database import (
+    DBSession,
+    db_commit,
+    db_delete,
+    get_bind,
+    load_relationships,
+    open_session,
+)
+from youtube_rss.core.logger import logger
+from youtube_rss.handlers import get_domain_from_url, get_handler_from_url
 from youtube_rss.models.source import Source, SourceCreate
-from youtube_rss.models.video import Video, VideoCreate
+from youtube_rss.models.video import Video, VideoCreate, generate_video_id_from_url
+from youtube_rss.services.cache import source_info_cache
 from youtube_rss.services.ytdlp import get_info_dict
 
 
@@ -13,42 +24,51 @@ async def get_source_info_dict(
     source_id: str | None,
     url: str,
     extract_flat: bool,
+    use_cache: bool = True,
+    known_video_ids: set[str] | None = None,
 ) -> dict[str, Any]:
     """
     Retrieve the info_dict from yt-dlp for a Source
 
+    This function first checks if a cached version of the info dictionary is available,
+    and if it is, it returns that. Otherwise, it uses YouTube-DL to retrieve the
+    info dictionary and then stores it in the cache for future use.
+
     Parameters:
         source_id (Union[str, None]): An optional ID for the source. If not provided,
             a unique ID will be generated from the URL.
         url (str): The URL of the Source
         extract_flat (bool): Whether to extract a flat list of videos in the playlist.
+        use_cache (bool): Whether to use a cached info dictionary, if available.
+        known_video_ids (Optional[set[str]]): The ids of the Source's known videos.
+            If given, the playlist is only extracted up to the first known video,
+            and the info dictionary is not cached.
 
 
     Returns:
         dict: The info dictionary for the Source
 
     """
-    # source_id = source_id or await generate_source_id_from_url(url=url)
-    # cache_file = Path(SOURCE_INFO_CACHE_PATH / source_id)
-
-    # # Load Cache
-    # if use_cache and cache_file.exists():
-    #     return pickle.loads(cache_file.read_bytes())
-
-    # Get info_dict from yt-dlp
     handler = get_handler_from_url(url=url)
+    url = handler.sanitize_source_url(url=url)
     ydl_opts = handler.get_source_ydl_opts(extract_flat=extract_flat)
     custom_extractors = handler.YTDLP_CUSTOM_EXTRACTORS or []
     _source_info_dict = await get_info_dict(
         url=url,
         ydl_opts=ydl_opts,
         custom_extractors=custom_extractors,
+        concurrency_key=handler.name,
+        max_concurrency=handler.MAX_CONCURRENT_EXTRACTIONS,
+        cache=source_info_cache if known_video_ids is None else None,
+        cache_ttl=handler.SOURCE_INFO_CACHE_TTL,
+        use_cache=use_cache,
+        known_video_ids=known_video_ids,
+        get_entry_video_id=handler.get_video_id_from_entry_info_dict,
+        fields=handler.SOURCE_INFO_DICT_FIELDS,
+        entry_fields=handler.SOURCE_ENTRY_INFO_DICT_FIELDS,
         # ie_key="CustomRumbleChannel",
     )
     _source_info_dict["source_id"] = source_id
-
-    # Save Pickle
-    # cache_file.write_bytes(pickle.dumps(_source_info_dict))
     return _source_info_dict
 
 
@@ -89,7 +109,7 @@ async def get_source_videos_from_source_info_dict(
     """
     handler = get_handler_from_url(url=source_info_dict["metadata"]["url"])
     entries = source_info_dict["entries"]
-    playlists = entries if entries[0].get("entries") else [source_info_dict]
+    playlists = entries if entries and entries[0].get("entries") else [source_info_dict]
     video_dicts = [
         handler.map_source_info_dict_entity_to_video_dict(
             source_id=source_info_dict["source_id"], entry_info_dict=entry_info_dict
@@ -101,12 +121,12 @@ async def get_source_videos_from_source_info_dict(
     return videos
 
 
-async def refresh_all_sources(db: Session) -> list[Source]:
+async def refresh_all_sources(db: DBSession) -> list[Source]:
     """
     Fetches new data from yt-dlp for all Sources.
 
     Args:
-        db (Session): The database session.
+        db (DBSession): The database session.
 
     Returns:
         The list of refreshed Sources.
@@ -115,68 +135,140 @@ async def refresh_all_sources(db: Session) -> list[Source]:
     return await refresh_sources(sources=sources, db=db)
 
 
-async def refresh_sources(sources: list[Source], db: Session) -> list[Source]:
+async def refresh_sources(sources: list[Source], db: DBSession) -> list[Source]:
     """
-    Fetches new data from yt-dlp for each Source.
+    Fetches new data from yt-dlp for each Source, concurrently.
+
+    Sources are fanned out across workers, limited globally by
+    `settings.refresh_sources_max_concurrency` and per domain by
+    `settings.refresh_sources_max_concurrency_per_domain`. Each worker uses its own
+    database session. Sources that fail to refresh are logged and skipped.
 
     Args:
         sources: The list of sources to refresh.
-        db (Session): The database session.
+        db (DBSession): The database session.
 
     Returns:
-        The list of refreshed Sources.
+        The list of refreshed Sources, in the order they finished.
     """
-    return [await crud.source.fetch_source(source_id=source.id, db=db) for source in sources]
+    global_semaphore = asyncio.Semaphore(settings.refresh_sources_max_concurrency)
+    domain_semaphores: dict[str, asyncio.Semaphore] = {}
+
+    async def _refresh_source(source_id: str, domain: str) -> Source:
+        domain_semaphore = domain_semaphores.setdefault(
+            domain, asyncio.Semaphore(settings.refresh_sources_max_concurrency_per_domain)
+        )
+        async with domain_semaphore, global_semaphore:
+            async with open_session(bind=get_bind(db)) as worker_db:
+                return await crud.source.fetch_source(source_id=source_id, db=worker_db)
+
+    tasks = [
+        asyncio.create_task(
+            _refresh_source(source_id=source.id, domain=get_domain_from_url(url=source.url))
+        )
+        for source in sources
+    ]
+
+    refreshed_sources = []
+    for next_completed in asyncio.as_completed(tasks):
+        try:
+            refreshed_sources.append(await next_completed)
+        except Exception as e:  # pylint: disable=broad-except
+            logger.error(f"Failed to refresh Source. {e}")
+    return refreshed_sources
 
 
 async def add_new_source_videos_from_fetched_videos(
-    fetched_videos: list[VideoCreate], db_source: Source, db: Session
-) -> list[VideoCreate]:
+    fetched_videos: list[VideoCreate], db_source: Source, db: DBSession
+) -> list[Video]:
     """
     Add new videos from a list of fetched videos to a source in the database.
 
+    Videos are inserted in one transaction. Videos that are already in the database,
+    or archived, are skipped.
+
     Args:
         fetched_videos: A list of Video objects fetched from a source.
         db_source: The Source object in the database to add the new videos to.
-        db (Session): The database session.
+        db (DBSession): The database session.
 
     Returns:
         A list of Video objects that were added to the database.
     """
-    db_video_ids = [video.id for video in db_source.videos]
-
-    # Add videos that were fetched, but not in the database.
-    added_videos = []
-    for fetched_video in fetched_videos:
-        if fetched_video.id not in db_video_ids:
-            new_video = VideoCreate(**fetched_video.dict())
-            added_videos.append(new_video)
-            await crud.video.create(in_obj=new_video, db=db)
+    # Archived videos are only moved back when their media is requested.
+    fetched_video_ids = [
+        await generate_video_id_from_url(url=video.url) for video in fetched_videos
+    ]
+    archived_video_ids = await crud.video_archive.get_archived_ids(
+        db=db, video_ids=fetched_video_ids
+    )
+    added_videos = await crud.video.create_many(
+        in_objs=[
+            video
+            for video, video_id in zip(fetched_videos, fetched_video_ids)
+            if video_id not in archived_video_ids
+        ],
+        db=db,
+    )
 
+    # Reload the source's videos on next load, to include the added videos.
+    db.expire(db_source, ["videos"])
     return added_videos
 
 
+async def archive_source_videos(db_source: Source, db: DBSession) -> list[str]:
+    """
+    Archive a source's videos that are older than `archive_videos_after_days`, or not
+    among its `archive_videos_keep_per_source` newest videos, to keep the `video`
+    table small. Videos whose media was requested in the last
+    `archive_videos_skip_accessed_days` are kept.
+
+    Args:
+        db_source: The Source object in the database to archive videos from.
+        db (DBSession): The database session.
+
+    Returns:
+        The ids of the archived videos.
+    """
+    if not settings.archive_videos_enabled:
+        return []
+    now = datetime.datetime.utcnow()
+    archived_video_ids = await crud.video_archive.archive_source_videos(
+        db=db,
+        source_id=db_source.id,
+        published_before=now - datetime.timedelta(days=settings.archive_videos_after_days),
+        keep=settings.archive_videos_keep_per_source,
+        accessed_before=now - datetime.timedelta(days=settings.archive_videos_skip_accessed_days),
+    )
+    if archived_video_ids:
+        # Reload the source's videos on next load, without the archived videos.
+        db.expire(db_source, ["videos"])
+    return archived_video_ids
+
+
 async def delete_orphaned_source_videos(
-    fetched_videos: list[Video], db_source: Source, db: Session
+    fetched_videos: list[Video], db_source: Source, db: DBSession
 ) -> list[Video]:
     """
-    Delete videos that are no longer present in `fetched_videos`.
+    Delete videos that are no longer present in `fetched_videos`, in one transaction.
 
     Args:
         fetched_videos: The list of Videos to compare the videos against.
         db_source: The source object in the database to delete videos from.
-        db (Session): The database session.
+        db (DBSession): The database session.
 
     Returns:
         The list of deleted Videos.
     """
-    fetched_video_ids = [video.id for video in fetched_videos]
+    fetched_video_ids = {video.id for video in fetched_videos}
 
     # Iterate through the videos in the source in the database
     deleted_videos = []
+    await load_relationships(db, db_source, ["videos"])
     for db_video in db_source.videos:
         if db_video.id not in fetched_video_ids:
             deleted_videos.append(db_video)
-            await crud.video.delete(id=db_video.id, db=db)
+            await db_delete(db, db_video)
+    await db_commit(db)
 
     return deleted_videos
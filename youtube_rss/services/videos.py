@@ -1,17 +1,22 @@
 from typing import Any
 
-from datetime import datetime, timedelta
-
-from sqlmodel import Session
+import asyncio
+from datetime import datetime, timedelta, timezone
 
 from youtube_rss import crud, settings
+from youtube_rss.core.database import DBBind, DBSession, db_refresh, get_bind, open_session
 from youtube_rss.handlers import get_handler_from_url
 from youtube_rss.models.video import Video, VideoCreate
+from youtube_rss.services.cache import video_info_cache
 from youtube_rss.services.ytdlp import get_info_dict
 
+# In-flight media url fetches, by video id.
+_media_url_fetches: dict[str, asyncio.Task[str]] = {}
+
 
 async def get_video_info_dict(
     url: str,
+    use_cache: bool = True,
 ) -> dict[str, Any]:
     """
     Retrieve the info_dict for a Video.
@@ -22,28 +27,27 @@ async def get_video_info_dict(
 
     Parameters:
         url (str): The URL of the video.
+        use_cache (bool): Whether to use a cached info dictionary, if available.
 
 
     Returns:
         dict: The info dictionary for the video.
     """
-    # video_id = generate_video_id_from_url(url=url)
-    # cache_file = Path(VIDEO_INFO_CACHE_PATH / f"{video_id}.pickle")
-
-    # Load Cache
-    # if use_cache and cache_file.exists():
-    #     return pickle.loads(cache_file.read_bytes())
-
-    # Get info_dict from yt-dlp
     handler = get_handler_from_url(url=url)
+    url = handler.sanitize_video_url(url=url)
     ydl_opts = handler.get_video_ydl_opts()
     custom_extractors = handler.YTDLP_CUSTOM_EXTRACTORS
-    info_dict = await get_info_dict(url=url, ydl_opts=ydl_opts, custom_extractors=custom_extractors)
-
-    # Save Pickle
-    # cache_file.parent.mkdir(exist_ok=True, parents=True)
-    # cache_file.write_bytes(pickle.dumps(info_dict))
-    return info_dict
+    return await get_info_dict(
+        url=url,
+        ydl_opts=ydl_opts,
+        custom_extractors=custom_extractors,
+        concurrency_key=handler.name,
+        max_concurrency=handler.MAX_CONCURRENT_EXTRACTIONS,
+        cache=video_info_cache,
+        cache_ttl=handler.VIDEO_INFO_CACHE_TTL,
+        use_cache=use_cache,
+        fields=handler.VIDEO_INFO_DICT_FIELDS,
+    )
 
 
 async def get_video_from_video_info_dict(
@@ -52,67 +56,98 @@ async def get_video_from_video_info_dict(
     handler = get_handler_from_url(url=video_info_dict["webpage_url"])
     video_dict = handler.map_video_info_dict_entity_to_video_dict(entry_info_dict=video_info_dict)
     video_dict["source_id"] = source_id
+    if video_dict.get("media_url"):
+        video_dict["media_url_expires_at"] = handler.get_media_url_expires_at(
+            media_url=video_dict["media_url"]
+        )
     return VideoCreate(**video_dict)
 
 
-async def refresh_all_videos(older_than_hours: int, db: Session) -> list[Video]:
+async def fetch_videos(videos: list[Video], db: DBSession) -> list[Video]:
     """
-    Fetches new data from yt-dlp for all Videos that are older than a certain number of hours.
+    Fetches new data for a list of videos from yt-dlp, concurrently, and writes the
+    results in one statement.
 
     Args:
-        older_than_hours: The minimum age of the videos to refresh, in hours.
-        db (Session): The database session.
+        videos: The list of videos to fetch.
+        db (DBSession): The database session.
 
     Returns:
-        The refreshed list of videos.
+        The fetched list of videos.
     """
-    videos = await crud.video.get_all(db=db) or []
-    return await refresh_videos(videos=videos, older_than_hours=older_than_hours, db=db)
+    if not videos:
+        return []
+    return await crud.video.fetch_videos(video_ids=[video.id for video in videos], db=db)
 
 
-async def fetch_videos(videos: list[Video], db: Session) -> list[Video]:
+async def refresh_videos(
+    videos: list[Video],
+    db: DBSession,
+    refresh_margin_minutes: int = settings.media_url_refresh_margin_minutes,
+) -> list[Video]:
     """
-    Fetches new data for a list of videos from yt-dlp.
+    Fetches new data from yt-dlp for the videos that need a refresh, see
+    `get_videos_needing_refresh`.
 
     Args:
-        videos: The list of videos to fetch.
-        db (Session): The database session.
+        videos: The list of videos to refresh.
+        db (DBSession): The database session.
+        refresh_margin_minutes: How long before the `media_url` expires to refresh it.
 
     Returns:
-        The fetched list of videos.
+        The refreshed list of videos.
     """
-    return [await crud.video.fetch_video(video_id=video.id, db=db) for video in videos]
+    videos_needing_refresh = get_videos_needing_refresh(
+        videos=videos, refresh_margin_minutes=refresh_margin_minutes
+    )
+    sorted_videos_needing_refresh = await sort_videos_by_media_url_expires_at(
+        videos=videos_needing_refresh
+    )
+    return await fetch_videos(videos=sorted_videos_needing_refresh, db=db)
 
 
-async def refresh_videos(
-    videos: list[Video], db: Session, older_than_hours: int = settings.max_video_age_hours
+def get_videos_needing_refresh(
+    videos: list[Video],
+    refresh_margin_minutes: int = settings.media_url_refresh_margin_minutes,
 ) -> list[Video]:
     """
-    Fetches new data from yt-dlp for videos that meet all criteria.
+    Get the videos that meet any criteria:
+        - the video has no `released_at` or `media_url`.
+        - the `media_url` expires within `refresh_margin_minutes`.
 
     Args:
-        videos: The list of videos to refresh.
-        older_than_hours: The minimum age of the videos to refresh, in hours.
-        db (Session): The database session.
+        videos: The list of videos.
+        refresh_margin_minutes: How long before the `media_url` expires to refresh it.
 
     Returns:
-        The refreshed list of videos.
+        The videos that need a refresh.
     """
-    age_threshold = datetime.utcnow() - timedelta(hours=older_than_hours)
-    videos_needing_refresh = [
+    refresh_threshold = datetime.utcnow() + timedelta(minutes=refresh_margin_minutes)
+    return [
         video
         for video in videos
         if (
-            video.updated_at < age_threshold or video.released_at is None or video.media_url is None
+            video.released_at is None
+            or video.media_url is None
+            or video.media_url_expires_at is None
+            or get_naive_utc(video.media_url_expires_at) < refresh_threshold
         )
     ]
-    sorted_videos_needing_refresh = await sort_videos_by_updated_at(videos=videos_needing_refresh)
-    return await fetch_videos(videos=sorted_videos_needing_refresh, db=db)
 
 
-async def sort_videos_by_updated_at(videos: list[Video]) -> list[Video]:
+def get_naive_utc(value: datetime) -> datetime:
+    """
+    Returns a datetime as a naive UTC datetime, as SQLite stores them.
+    """
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+async def sort_videos_by_media_url_expires_at(videos: list[Video]) -> list[Video]:
     """
-    Sorts a list of videos by the `updated_at` property.
+    Sorts a list of videos by the `media_url_expires_at` property, soonest first.
+    Videos without a `media_url_expires_at` are sorted first.
 
     Args:
         videos: The list of videos to sort.
@@ -120,16 +155,31 @@ async def sort_videos_by_updated_at(videos: list[Video]) -> list[Video]:
     Returns:
         The sorted list of videos.
     """
-    return sorted(videos, key=lambda video: video.updated_at, reverse=False)
+    return sorted(
+        videos,
+        key=lambda video: get_naive_utc(video.media_url_expires_at or datetime.min),
+    )
 
 
-async def get_media_url_from_video_id(video_id: str, db: Session) -> str:
+def is_media_url_expired(video: Video) -> bool:
     """
-    Get the media URL for a video.
+    Returns True if the video has no `media_url`, or its `media_url` has expired.
+    """
+    if video.media_url is None:
+        return True
+    if video.media_url_expires_at is None:
+        return False
+    return get_naive_utc(video.media_url_expires_at) <= datetime.utcnow()
+
+
+async def fetch_media_url(video_id: str, bind: DBBind) -> str:
+    """
+    Fetches the media URL for a video from yt-dlp, using its own database session so
+    that it can outlive the request that started it.
 
     Args:
-        video_id: The id of the video to get the media URL for.
-        db (Session): The database session.
+        video_id: The id of the video to fetch the media URL for.
+        bind: The database engine or connection.
 
     Returns:
         The media URL for the video.
@@ -137,9 +187,47 @@ async def get_media_url_from_video_id(video_id: str, db: Session) -> str:
     Raises:
         ValueError: If the media URL for the video cannot be fetched.
     """
-    video = await crud.video.get(id=video_id, db=db)
-    if not video.media_url:
+    async with open_session(bind=bind) as db:
         video = await crud.video.fetch_video(video_id=video_id, db=db)
-        if not video.media_url:
-            raise ValueError("Unable to fetch media_url")
+    if not video.media_url:
+        raise ValueError("Unable to fetch media_url")
     return video.media_url
+
+
+async def get_media_url_from_video_id(
+    video_id: str, db: DBSession, timeout: float | None = None
+) -> str:
+    """
+    Get the media URL for a video, fetching it from yt-dlp if it is missing or expired.
+
+    Concurrent calls for the same video wait on a single fetch. If `timeout` is given,
+    waits at most `timeout` seconds. The fetch keeps running after a timeout, so a
+    later call can pick up its result.
+
+    Args:
+        video_id: The id of the video to get the media URL for.
+        db (DBSession): The database session.
+        timeout: The maximum number of seconds to wait for the fetch.
+
+    Returns:
+        The media URL for the video.
+
+    Raises:
+        RecordNotFoundError: If the video does not exist.
+        ValueError: If the media URL for the video cannot be fetched.
+        asyncio.TimeoutError: If the fetch did not complete within `timeout` seconds.
+    """
+    video = await crud.video.get(id=video_id, db=db)
+    if not is_media_url_expired(video=video) and video.media_url:
+        return video.media_url
+
+    fetch_task = _media_url_fetches.get(video_id)
+    if fetch_task is None:
+        fetch_task = asyncio.create_task(fetch_media_url(video_id=video_id, bind=get_bind(db)))
+        _media_url_fetches[video_id] = fetch_task
+        fetch_task.add_done_callback(lambda _: _media_url_fetches.pop(video_id, None))
+    media_url = await asyncio.wait_for(asyncio.shield(fetch_task), timeout=timeout)
+
+    # The fetch committed in its own session, so reload the video in this one.
+    await db_refresh(db, video)
+    return media_url
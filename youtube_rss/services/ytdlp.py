@@ -1,9 +1,24 @@
-from typing import Any, Type
+from typing import Any, Callable, Iterator, Type
+
+import asyncio
+import functools
+import hashlib
+import json
+import os
+import threading
+import time
+import weakref
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
 
 from yt_dlp import YoutubeDL
+from yt_dlp.extractor import gen_extractor_classes
 from yt_dlp.extractor.common import InfoExtractor
+from yt_dlp.utils import DateRange
 
+from youtube_rss import settings
 from youtube_rss.core.logger import logger
+from youtube_rss.services.cache import InfoDictCache
 
 YDL_OPTS_BASE: dict[str, Any] = {
     "logger": logger,
@@ -13,23 +28,527 @@ YDL_OPTS_BASE: dict[str, Any] = {
     # "verbose": True,
 }
 
+# ydl_opts that can not be sent to a worker process. These are set again in the worker.
+UNPICKLABLE_YDL_OPTS = ["logger"]
 
-async def get_info_dict(
+# info_dict keys that are not used and are not returned from a worker process.
+TRIMMED_INFO_DICT_KEYS = [
+    "automatic_captions",
+    "subtitles",
+    "requested_subtitles",
+    "heatmap",
+    "chapters",
+]
+
+# Fields kept from the selected format(s) when an info_dict is projected.
+FORMAT_INFO_DICT_FIELDS = ["format_id", "url", "ext", "filesize", "filesize_approx"]
+
+# How many `url` results are followed before an extracted page is processed.
+MAX_URL_RESULT_REDIRECTS = 5
+# Fields of a `url_transparent` result that are not kept over those of the page it
+# points to, as in `YoutubeDL.process_ie_result`.
+URL_TRANSPARENT_EXEMPTED_FIELDS = {"_type", "url", "ie_key", "id", "extractor", "extractor_key"}
+
+
+def get_key_default(obj: Any) -> str:
+    """
+    Serializes the yt-dlp options that are not JSON, for a pool key. Date ranges are
+    serialized by value, other objects by identity.
+    """
+    if isinstance(obj, DateRange):
+        return f"DateRange:{obj}"
+    return f"{type(obj).__name__}:{id(obj)}"
+
+
+class YoutubeDLPool:
+    """
+    A pool of long-lived `YoutubeDL` objects, keyed by a hash of their options.
+
+    Reusing a `YoutubeDL` object skips extractor setup and keeps its cookies between
+    extractions. An object is only used by one extraction at a time, is discarded if
+    its extraction failed, and is replaced once it is older than `max_lifetime` seconds.
+    """
+
+    def __init__(self, max_idle_per_key: int, max_lifetime: int) -> None:
+        """
+        Initialize the YoutubeDLPool object.
+
+        Args:
+            max_idle_per_key: The maximum number of idle objects kept per options hash.
+            max_lifetime: The maximum age of an object, in seconds.
+        """
+        self.max_idle_per_key = max_idle_per_key
+        self.max_lifetime = max_lifetime
+        self._idle: dict[str, list[tuple[YoutubeDL, float]]] = {}
+        self._created_at: dict[int, float] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_key(
+        ydl_opts: dict[str, Any], custom_extractors: list[Type[InfoExtractor]] | None = None
+    ) -> str:
+        """
+        Generates a pool key from the yt-dlp options and custom extractors.
+
+        Args:
+            ydl_opts: The yt-dlp options.
+            custom_extractors: The custom extractors registered on the object.
+
+        Returns:
+            str: The pool key.
+        """
+        key_data = json.dumps(
+            {
+                "ydl_opts": ydl_opts,
+                "custom_extractors": [ie.__name__ for ie in custom_extractors or []],
+            },
+            sort_keys=True,
+            default=get_key_default,
+        )
+        return hashlib.sha256(key_data.encode()).hexdigest()
+
+    def checkout(
+        self, ydl_opts: dict[str, Any], custom_extractors: list[Type[InfoExtractor]] | None = None
+    ) -> YoutubeDL:
+        """
+        Takes an idle `YoutubeDL` object from the pool, or creates a new one.
+
+        Args:
+            ydl_opts: The yt-dlp options.
+            custom_extractors: The custom extractors to register on a new object.
+
+        Returns:
+            YoutubeDL: A `YoutubeDL` object for exclusive use until it is checked in.
+        """
+        key = self.get_key(ydl_opts=ydl_opts, custom_extractors=custom_extractors)
+        with self._lock:
+            idle = self._idle.get(key, [])
+            while idle:
+                ydl, created_at = idle.pop()
+                if time.monotonic() - created_at < self.max_lifetime:
+                    self._created_at[id(ydl)] = created_at
+                    return ydl
+                self._close(ydl=ydl)
+
+        ydl = YoutubeDL(ydl_opts)
+        for custom_extractor in custom_extractors or []:
+            ydl.add_info_extractor(custom_extractor())
+        with self._lock:
+            self._created_at[id(ydl)] = time.monotonic()
+        return ydl
+
+    def checkin(
+        self,
+        ydl: YoutubeDL,
+        ydl_opts: dict[str, Any],
+        custom_extractors: list[Type[InfoExtractor]] | None = None,
+        healthy: bool = True,
+    ) -> None:
+        """
+        Returns a `YoutubeDL` object to the pool.
+
+        Unhealthy, expired or surplus objects are discarded instead.
+
+        Args:
+            ydl: The `YoutubeDL` object that was checked out.
+            ydl_opts: The yt-dlp options it was checked out with.
+            custom_extractors: The custom extractors it was checked out with.
+            healthy: Whether the last extraction succeeded.
+        """
+        key = self.get_key(ydl_opts=ydl_opts, custom_extractors=custom_extractors)
+        with self._lock:
+            created_at = self._created_at.pop(id(ydl), 0.0)
+            idle = self._idle.setdefault(key, [])
+            if (
+                not healthy
+                or time.monotonic() - created_at >= self.max_lifetime
+                or len(idle) >= self.max_idle_per_key
+            ):
+                self._close(ydl=ydl)
+                return
+            self._reset(ydl=ydl)
+            idle.append((ydl, created_at))
+
+    @contextmanager
+    def ydl(
+        self, ydl_opts: dict[str, Any], custom_extractors: list[Type[InfoExtractor]] | None = None
+    ) -> Iterator[YoutubeDL]:
+        """
+        Context manager that checks out a `YoutubeDL` object and checks it back in.
+        """
+        ydl = self.checkout(ydl_opts=ydl_opts, custom_extractors=custom_extractors)
+        healthy = False
+        try:
+            yield ydl
+            healthy = True
+        finally:
+            self.checkin(
+                ydl=ydl, ydl_opts=ydl_opts, custom_extractors=custom_extractors, healthy=healthy
+            )
+
+    def clear(self) -> None:
+        """
+        Discards all idle `YoutubeDL` objects.
+        """
+        with self._lock:
+            for idle in self._idle.values():
+                for ydl, _ in idle:
+                    self._close(ydl=ydl)
+            self._idle.clear()
+
+    @staticmethod
+    def _reset(ydl: YoutubeDL) -> None:
+        """
+        Resets the per-extraction state of a `YoutubeDL` object.
+        """
+        ydl._download_retcode = 0  # pylint: disable=protected-access
+        ydl._num_downloads = 0  # pylint: disable=protected-access
+        ydl._playlist_level = 0  # pylint: disable=protected-access
+        ydl._playlist_urls = set()  # pylint: disable=protected-access
+
+    @staticmethod
+    def _close(ydl: YoutubeDL) -> None:
+        """
+        Closes a `YoutubeDL` object, saving its cookies.
+        """
+        ydl.__exit__(None, None, None)
+
+
+ydl_pool = YoutubeDLPool(
+    max_idle_per_key=settings.ytdlp_pool_max_idle,
+    max_lifetime=settings.ytdlp_pool_max_lifetime_seconds,
+)
+
+_executor: Executor | None = None
+_semaphores: weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, dict[str, asyncio.Semaphore]
+] = weakref.WeakKeyDictionary()
+
+
+def get_executor() -> Executor:
+    """
+    Get the executor that yt-dlp extractions are run on, creating it if needed.
+
+    The executor type is chosen by `settings.ytdlp_executor` ("thread" or "process").
+
+    Returns:
+        Executor: The shared extraction executor.
+
+    Raises:
+        ValueError: If `settings.ytdlp_executor` is not a known executor type.
+    """
+    global _executor  # pylint: disable=global-statement
+    if _executor is None:
+        if settings.ytdlp_executor == "thread":
+            _executor = ThreadPoolExecutor(
+                max_workers=get_max_workers(), thread_name_prefix="ytdlp"
+            )
+        elif settings.ytdlp_executor == "process":
+            _executor = ProcessPoolExecutor(
+                max_workers=get_max_workers(), initializer=init_worker_process
+            )
+        else:
+            raise ValueError(f"Unknown yt-dlp executor: {settings.ytdlp_executor=}")
+    return _executor
+
+
+def get_max_workers() -> int:
+    """
+    Get the number of extraction workers.
+
+    Uses `settings.ytdlp_max_workers` if set. Otherwise the worker count is tuned to the
+    number of CPUs: one process per CPU, as extraction is CPU-bound once it runs in
+    parallel, or several threads per CPU, as threads spend most of their time waiting
+    on network I/O while holding no GIL.
+
+    Returns:
+        int: The number of extraction workers.
+    """
+    if settings.ytdlp_max_workers > 0:
+        return settings.ytdlp_max_workers
+    cpu_count = os.cpu_count() or 1
+    if settings.ytdlp_executor == "process":
+        return cpu_count
+    return min(32, cpu_count * 4)
+
+
+def init_worker_process() -> None:
+    """
+    Initializes an extraction worker process, importing yt-dlp's extractors once
+    instead of on the first extraction.
+    """
+    gen_extractor_classes()
+
+
+def get_picklable_ydl_opts(ydl_opts: dict[str, Any]) -> dict[str, Any]:
+    """
+    Returns the ydl_opts without the options that can not be pickled.
+    """
+    return {key: value for key, value in ydl_opts.items() if key not in UNPICKLABLE_YDL_OPTS}
+
+
+def trim_info_dict(info_dict: dict[str, Any]) -> dict[str, Any]:
+    """
+    Returns a copy of the info_dict without private and unused keys, recursing into
+    playlist entries.
+
+    Args:
+        info_dict: The info_dict returned by yt-dlp.
+
+    Returns:
+        dict[str, Any]: The trimmed info_dict.
+    """
+    trimmed = {
+        key: value
+        for key, value in info_dict.items()
+        if not key.startswith("_") and key not in TRIMMED_INFO_DICT_KEYS
+    }
+    if isinstance(trimmed.get("entries"), list):
+        trimmed["entries"] = [
+            trim_info_dict(info_dict=entry) if isinstance(entry, dict) else entry
+            for entry in trimmed["entries"]
+        ]
+    return trimmed
+
+
+def project_info_dict(
+    info_dict: dict[str, Any], fields: list[str], entry_fields: list[str] | None = None
+) -> dict[str, Any]:
+    """
+    Returns a copy of the info_dict with only the given fields.
+
+    The 'formats' field only keeps the format(s) selected by yt-dlp ('format_id'), with
+    only the `FORMAT_INFO_DICT_FIELDS`. Playlist entries are projected to `entry_fields`,
+    and nested playlists to `fields`.
+
+    Args:
+        info_dict: The info_dict returned by yt-dlp.
+        fields: The fields to keep.
+        entry_fields: The fields to keep for each playlist entry. If None, entries
+            are kept as is.
+
+    Returns:
+        dict[str, Any]: The projected info_dict.
+    """
+    projected = {key: info_dict[key] for key in fields if key in info_dict}
+
+    if isinstance(projected.get("formats"), list):
+        selected_format_ids = str(info_dict.get("format_id", "")).split("+")
+        projected["formats"] = [
+            {key: format_dict[key] for key in FORMAT_INFO_DICT_FIELDS if key in format_dict}
+            for format_dict in projected["formats"]
+            if format_dict.get("format_id") in selected_format_ids
+        ]
+
+    if isinstance(info_dict.get("entries"), list):
+        projected["entries"] = []
+        for entry in info_dict["entries"]:
+            if isinstance(entry, dict) and "entries" in entry:
+                entry = project_info_dict(info_dict=entry, fields=fields, entry_fields=entry_fields)
+            elif isinstance(entry, dict) and entry_fields is not None:
+                entry = project_info_dict(info_dict=entry, fields=entry_fields)
+            projected["entries"].append(entry)
+    return projected
+
+
+def shutdown_executor() -> None:
+    """
+    Shuts down the extraction executor, if one was created.
+    """
+    global _executor  # pylint: disable=global-statement
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+    ydl_pool.clear()
+
+
+def get_semaphore(concurrency_key: str, max_concurrency: int) -> asyncio.Semaphore:
+    """
+    Get the semaphore limiting concurrent extractions for a `concurrency_key`.
+
+    Semaphores are bound to an event loop, so one is kept per running loop.
+
+    Args:
+        concurrency_key: The key to limit concurrency for (ie. the handler name).
+        max_concurrency: The maximum number of concurrent extractions for the key.
+
+    Returns:
+        asyncio.Semaphore: The semaphore for the key.
+    """
+    loop = asyncio.get_running_loop()
+    loop_semaphores = _semaphores.setdefault(loop, {})
+    if concurrency_key not in loop_semaphores:
+        loop_semaphores[concurrency_key] = asyncio.Semaphore(max_concurrency)
+    return loop_semaphores[concurrency_key]
+
+
+def iter_playlist_entries(playlist_info_dict: dict[str, Any]) -> Iterator[dict[str, Any]]:
+    """
+    Lazily iterates the entries of an unprocessed playlist info_dict, recursing into
+    nested playlists. Pages of entries are only requested as they are iterated.
+
+    Args:
+        playlist_info_dict: The unprocessed playlist info_dict.
+
+    Yields:
+        dict[str, Any]: The info_dict of each entry.
+    """
+    for entry in playlist_info_dict.get("entries") or []:
+        if not entry:
+            continue
+        if entry.get("_type") == "playlist":
+            yield from iter_playlist_entries(playlist_info_dict=entry)
+        else:
+            yield entry
+
+
+def resolve_url_result(ydl: YoutubeDL, info_dict: dict[str, Any]) -> dict[str, Any] | None:
+    """
+    Follows `url` and `url_transparent` results, such as channel urls that redirect to
+    another page, without processing them. Like `YoutubeDL.process_ie_result`, the
+    fields of a `url_transparent` result are kept over those of the page it points to.
+
+    Args:
+        ydl: The `YoutubeDL` object to extract with.
+        info_dict: The unprocessed info_dict.
+
+    Returns:
+        The unprocessed info_dict of the page the result points to, or None if the
+        extraction failed.
+    """
+    resolved: dict[str, Any] | None = info_dict
+    for _ in range(MAX_URL_RESULT_REDIRECTS):
+        if resolved is None or resolved.get("_type") not in ("url", "url_transparent"):
+            break
+        result = resolved
+        resolved = ydl.extract_info(
+            result["url"], download=False, ie_key=result.get("ie_key"), process=False
+        )
+        if resolved is not None and result["_type"] == "url_transparent":
+            resolved = {
+                **resolved,
+                **{
+                    key: value
+                    for key, value in result.items()
+                    if value is not None and key not in URL_TRANSPARENT_EXEMPTED_FIELDS
+                },
+            }
+            if resolved.get("_type") == "url":
+                resolved["_type"] = "url_transparent"
+    return resolved
+
+
+def extract_unprocessed_info(ydl: YoutubeDL, url: str, ie_key: str | None) -> dict[str, Any] | None:
+    """
+    Extracts the unprocessed info_dict of a url, following redirects.
+
+    Args:
+        ydl: The `YoutubeDL` object to extract with.
+        url: The URL to extract.
+        ie_key: The name of the YouTube-DL info extractor to use.
+
+    Returns:
+        The unprocessed info_dict, or None if the extraction failed.
+    """
+    info_dict: dict[str, Any] | None = ydl.extract_info(
+        url, download=False, ie_key=ie_key, process=False
+    )
+    if info_dict is None:
+        return None
+    return resolve_url_result(ydl=ydl, info_dict=info_dict)
+
+
+def extract_new_playlist_entries(
+    ydl: YoutubeDL,
+    info_dict: dict[str, Any],
+    known_video_ids: set[str],
+    get_entry_video_id: Callable[[dict[str, Any]], str],
+) -> dict[str, Any]:
+    """
+    Processes an unprocessed playlist, newest entry first, stopping at the first entry
+    that is already known. Honors the 'playlistend', 'playlistreverse' and 'daterange'
+    options.
+
+    The playlist is finished the way `YoutubeDL.process_ie_result` finishes one, so
+    it matches a full extraction: thumbnails are sorted and sanitized, and entries
+    outside the date range are filtered out.
+
+    Args:
+        ydl: The `YoutubeDL` object to extract with.
+        info_dict: The unprocessed playlist info_dict.
+        known_video_ids: The ids of the videos that are already known.
+        get_entry_video_id: Returns the video id for an entry info_dict.
+
+    Returns:
+        dict[str, Any]: The playlist info_dict, with only the new entries.
+    """
+    playlistend = ydl.params.get("playlistend")
+    new_entries: list[dict[str, Any]] = []
+    for entry in iter_playlist_entries(playlist_info_dict=info_dict):
+        if playlistend and len(new_entries) >= playlistend:
+            break
+        try:
+            if get_entry_video_id(entry) in known_video_ids:
+                break
+        except (KeyError, ValueError):
+            pass
+        new_entries.append(entry)
+
+    if ydl.params.get("playlistreverse"):
+        new_entries.reverse()
+    # pylint: disable=protected-access
+    ydl._fill_common_fields(info_dict, False)
+    ydl._sanitize_thumbnails(info_dict)
+    info_dict["entries"] = [
+        entry
+        for entry in new_entries
+        if ydl._match_entry(entry, incomplete=True, silent=True) is None
+    ]
+    # pylint: enable=protected-access
+    return info_dict
+
+
+def get_ydl_params(ydl_opts: dict[str, Any]) -> dict[str, Any]:
+    """
+    Translates the 'dateafter' and 'datebefore' options, which are yt-dlp command line
+    options that `YoutubeDL` does not read, into the 'daterange' it does.
+    """
+    if "daterange" in ydl_opts or not {"dateafter", "datebefore"} & ydl_opts.keys():
+        return ydl_opts
+    return {
+        **ydl_opts,
+        "daterange": DateRange(start=ydl_opts.get("dateafter"), end=ydl_opts.get("datebefore")),
+    }
+
+
+def extract_info(
     url: str,
     ydl_opts: dict[str, Any],
     ie_key: str | None = None,
     custom_extractors: list[Type[InfoExtractor]] | None = None,
+    known_video_ids: set[str] | None = None,
+    get_entry_video_id: Callable[[dict[str, Any]], str] | None = None,
+    fields: list[str] | None = None,
+    entry_fields: list[str] | None = None,
 ) -> dict[str, Any]:
     """
-    Use YouTube-DL to get the info dictionary for a given URL.
+    Blocking call to yt-dlp to extract the info dictionary for a given URL.
+    This is run on the extraction executor, never on the event loop, using a
+    `YoutubeDL` object from `ydl_pool`.
 
     Parameters:
         url (str): The URL of the object to retrieve info for.
         ydl_opts (dict[str, Any]): The options to use with YouTube-DL.
         ie_key (Optional[str]): The name of the YouTube-DL info extractor to use.
-            If not provided, the default extractor will be used.
         custom_extractors (Optional[list[Type[InfoExtractor]]]): A list of
             Custom Extractors to make available to yt-dlp.
+        known_video_ids (Optional[set[str]]): If given, a playlist is only extracted
+            up to the first entry whose id is in this set.
+        get_entry_video_id (Optional[Callable]): Returns the video id for an entry
+            info_dict. Required with `known_video_ids`.
+        fields (Optional[list[str]]): If given, the info_dict is projected to these
+            fields as soon as it is extracted. See `project_info_dict`.
+        entry_fields (Optional[list[str]]): The fields to keep for each playlist entry.
 
     Returns:
         dict[str, Any]: The info dictionary for the object.
@@ -37,26 +556,149 @@ async def get_info_dict(
     Raises:
         ValueError: If the info dictionary could not be retrieved.
     """
-    with YoutubeDL(ydl_opts) as ydl:
-
-        # Add custom_extractors
-        if custom_extractors:
-            for custom_extractor in custom_extractors:
-                ydl.add_info_extractor(custom_extractor())
+    ydl_opts = get_ydl_params(ydl_opts=ydl_opts)
+    with ydl_pool.ydl(ydl_opts=ydl_opts, custom_extractors=custom_extractors) as ydl:
 
-        # Get Info Dict
-        info_dict: dict[str, Any] = ydl.extract_info(url, download=False, ie_key=ie_key)
+        # Get Info Dict. Redirects are followed before processing, which yt-dlp does
+        # not do for a top level result with 'extract_flat'.
+        info_dict = extract_unprocessed_info(ydl=ydl, url=url, ie_key=ie_key)
+        if (
+            info_dict is not None
+            and info_dict.get("_type") in ("playlist", "multi_video")
+            and known_video_ids is not None
+            and get_entry_video_id is not None
+        ):
+            info_dict = extract_new_playlist_entries(
+                ydl=ydl,
+                info_dict=info_dict,
+                known_video_ids=known_video_ids,
+                get_entry_video_id=get_entry_video_id,
+            )
+        elif info_dict is not None:
+            info_dict = ydl.process_ie_result(info_dict, download=False)
         if info_dict is None:
             raise ValueError(
                 f"yt-dlp did not download a info_dict object. {info_dict=} {url=} {ie_key=} {ydl_opts=}"
             )
+    if fields is not None:
+        info_dict = project_info_dict(info_dict=info_dict, fields=fields, entry_fields=entry_fields)
+    return info_dict
+
+
+def extract_trimmed_info(ydl_opts: dict[str, Any], **kwargs: Any) -> dict[str, Any]:
+    """
+    Runs `extract_info` in a worker process and returns a trimmed, picklable info_dict.
 
-        # Append Metadata to info_dict
-        info_dict["metadata"] = {
+    The `ydl_opts` must not include `UNPICKLABLE_YDL_OPTS`. They are set again here.
+    """
+    ydl_opts = {**ydl_opts, "logger": logger}
+    info_dict = extract_info(ydl_opts=ydl_opts, **kwargs)
+    return trim_info_dict(info_dict=info_dict)
+
+
+async def get_info_dict(
+    url: str,
+    ydl_opts: dict[str, Any],
+    ie_key: str | None = None,
+    custom_extractors: list[Type[InfoExtractor]] | None = None,
+    concurrency_key: str | None = None,
+    max_concurrency: int | None = None,
+    cache: InfoDictCache | None = None,
+    cache_ttl: int = 0,
+    use_cache: bool = True,
+    known_video_ids: set[str] | None = None,
+    get_entry_video_id: Callable[[dict[str, Any]], str] | None = None,
+    fields: list[str] | None = None,
+    entry_fields: list[str] | None = None,
+) -> dict[str, Any]:
+    """
+    Use YouTube-DL to get the info dictionary for a given URL.
+
+    The extraction is run on the extraction executor so that the event loop stays
+    responsive. If a `concurrency_key` is given, at most `max_concurrency`
+    extractions for that key will run at the same time. If a `cache` is given,
+    an info_dict younger than `cache_ttl` seconds is returned without running yt-dlp.
+
+    Parameters:
+        url (str): The URL of the object to retrieve info for.
+        ydl_opts (dict[str, Any]): The options to use with YouTube-DL.
+        ie_key (Optional[str]): The name of the YouTube-DL info extractor to use.
+            If not provided, the default extractor will be used.
+        custom_extractors (Optional[list[Type[InfoExtractor]]]): A list of
+            Custom Extractors to make available to yt-dlp.
+        concurrency_key (Optional[str]): The key to limit concurrent extractions by
+            (ie. the handler name).
+        max_concurrency (Optional[int]): The maximum number of concurrent extractions
+            for `concurrency_key`. Defaults to the number of extraction workers.
+        cache (Optional[InfoDictCache]): The cache to read from and save to.
+        cache_ttl (int): The maximum age of a cached info_dict, in seconds.
+        use_cache (bool): Whether to read from the cache. Set to False to force a fetch.
+            The fetched info_dict is still saved to the cache.
+        known_video_ids (Optional[set[str]]): If given, a playlist is only extracted
+            up to the first entry whose id is in this set.
+        get_entry_video_id (Optional[Callable]): Returns the video id for an entry
+            info_dict. Required with `known_video_ids`.
+        fields (Optional[list[str]]): If given, the info_dict is projected to these
+            fields right after extraction, before it is cached or returned.
+        entry_fields (Optional[list[str]]): The fields to keep for each playlist entry.
+
+    Returns:
+        dict[str, Any]: The info dictionary for the object.
+
+    Raises:
+        ValueError: If the info dictionary could not be retrieved.
+    """
+    cache_key = (
+        cache.get_key(
+            url=url, ydl_opts=ydl_opts, ie_key=ie_key, fields=fields, entry_fields=entry_fields
+        )
+        if cache
+        else None
+    )
+    loop = asyncio.get_running_loop()
+    info_dict: dict[str, Any] | None = None
+    if cache and cache_key and use_cache:
+        # The cache does blocking file I/O, so it is used on the default thread executor.
+        info_dict = await loop.run_in_executor(
+            None, functools.partial(cache.get, key=cache_key, ttl=cache_ttl)
+        )
+
+    if info_dict is None:
+        semaphore = get_semaphore(
+            concurrency_key=concurrency_key or "default",
+            max_concurrency=max_concurrency or get_max_workers(),
+        )
+        executor = get_executor()
+        extract_kwargs: dict[str, Any] = {
             "url": url,
-            "ydl_opts": ydl_opts,
             "ie_key": ie_key,
             "custom_extractors": custom_extractors,
+            "known_video_ids": known_video_ids,
+            "get_entry_video_id": get_entry_video_id,
+            "fields": fields,
+            "entry_fields": entry_fields,
         }
+        if isinstance(executor, ProcessPoolExecutor):
+            extract = functools.partial(
+                extract_trimmed_info,
+                ydl_opts=get_picklable_ydl_opts(ydl_opts=ydl_opts),
+                **extract_kwargs,
+            )
+        else:
+            extract = functools.partial(extract_info, ydl_opts=ydl_opts, **extract_kwargs)
+        async with semaphore:
+            extracted_info_dict: dict[str, Any] = await loop.run_in_executor(executor, extract)
+        info_dict = extracted_info_dict
+        if cache and cache_key and cache_ttl > 0:
+            await loop.run_in_executor(
+                None, functools.partial(cache.set, key=cache_key, info_dict=extracted_info_dict)
+            )
 
+    # Append Metadata to info_dict
+    info_dict["metadata"] = {
+        "url": url,
+        "ydl_opts": get_picklable_ydl_opts(ydl_opts=ydl_opts),
+        "ie_key": ie_key,
+        "custom_extractors": [extractor.__name__ for extractor in custom_extractors or []],
+    }
     return info_dict
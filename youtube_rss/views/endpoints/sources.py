@@ -1,10 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.responses import HTMLResponse, Response
 from fastapi.templating import Jinja2Templates
-from sqlmodel import Session
 
 from youtube_rss import crud, settings
 from youtube_rss.api.deps import get_db
+from youtube_rss.core.database import DBSession
 
 router = APIRouter()
 templates = Jinja2Templates(directory="youtube_rss/views/templates")
@@ -13,14 +13,14 @@ templates = Jinja2Templates(directory="youtube_rss/views/templates")
 @router.get(
     "/u/{username}", summary="Returns HTML Reponse with list of feeds", response_class=HTMLResponse
 )
-async def read_root(request: Request, username: str, db: Session = Depends(get_db)) -> Response:
+async def read_root(request: Request, username: str, db: DBSession = Depends(get_db)) -> Response:
     """
     Server root. Returns html response of all sources.
 
     Args:
         request(Request): The request object
         username: The username to display
-        db(Session): The database session.
+        db(DBSession): The database session.
 
     Returns:
         Response: HTML page with list of sources
@@ -29,7 +29,7 @@ async def read_root(request: Request, username: str, db: Session = Depends(get_d
         HTTPException: User not found
     """
     try:
-        user = await crud.user.get(username=username, db=db)
+        user = await crud.user.get(username=username, db=db, load="sources")
     except crud.RecordNotFoundError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,